@@ -0,0 +1,5 @@
+from flask import Blueprint
+
+api_v1_bp = Blueprint('api_v1', __name__, url_prefix='/api/v1')
+
+from . import users, rbac
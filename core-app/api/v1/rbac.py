@@ -0,0 +1,64 @@
+"""
+Batch RBAC API (bulk role assignment and module grants).
+"""
+from flask import jsonify, request
+from flask_login import current_user
+from extensions import db
+from auth.rbac_cache import invalidate_access
+from modules.admin.services import apply_rbac_batch
+from . import api_v1_bp
+
+
+# Permission needed for each part of a batch (admins may apply every part)
+BATCH_PERMISSIONS = {
+    'user_roles': 'admin.users.manage',
+    'role_modules': 'admin.groups.manage',
+}
+
+
+def _can(permission_name):
+    return current_user.has_role('admin') or current_user.has_permission(permission_name)
+
+
+@api_v1_bp.route('/rbac/batch', methods=['POST'])
+def rbac_batch():
+    """
+    Apply many RBAC changes in one transaction.
+
+    ``user_roles`` changes need ``admin.users.manage``, ``role_modules``
+    changes ``admin.groups.manage``. Denied requests get a JSON 401/403
+    rather than the login/dashboard redirect of the page decorators.
+
+    Body:
+        {"user_roles": [{"user": "jdoe", "role": "Lehrer", "action": "add"}, ...],
+         "role_modules": [{"role": "Lehrer", "module": "backup", "action": "remove"}, ...]}
+    """
+    if not current_user.is_authenticated:
+        return jsonify({'status': 'error', 'message': 'Authentication required'}), 401
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'status': 'error', 'message': 'Invalid data'}), 400
+
+    user_role_changes = data.get('user_roles', [])
+    role_module_changes = data.get('role_modules', [])
+    if not isinstance(user_role_changes, list) or not isinstance(role_module_changes, list):
+        return jsonify({'status': 'error', 'message': 'user_roles and role_modules must be lists'}), 400
+
+    required = [BATCH_PERMISSIONS[part] for part in BATCH_PERMISSIONS if data.get(part)]
+    if required:
+        allowed = all(_can(name) for name in required)
+    else:
+        # An empty batch changes nothing but still needs one of the permissions
+        allowed = any(_can(name) for name in BATCH_PERMISSIONS.values())
+    if not allowed:
+        missing = [name for name in (required or BATCH_PERMISSIONS.values()) if not _can(name)]
+        return jsonify({'status': 'error',
+                        'message': f"Permission denied: {', '.join(missing)} required."}), 403
+
+    result = apply_rbac_batch(user_role_changes, role_module_changes)
+    db.session.commit()
+    if result.changed:
+        invalidate_access()
+
+    return jsonify({'status': 'success', **result.as_dict()})
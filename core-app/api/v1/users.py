@@ -0,0 +1,25 @@
+"""
+User listing API (used by the admin user list for incremental loading).
+"""
+from flask import jsonify, request
+from auth.permissions import require_permission
+from modules.admin.services import DEFAULT_PAGE_SIZE, UserFilters, list_users, serialize_user
+from . import api_v1_bp
+
+
+@api_v1_bp.route('/users')
+@require_permission('admin.users.manage')
+def users():
+    """
+    Return one page of users.
+
+    Query args: q, role, department, sort (username|display_name|department),
+    direction (asc|desc), cursor, limit.
+    """
+    filters = UserFilters.from_args(request.args)
+    limit = request.args.get('limit', DEFAULT_PAGE_SIZE, type=int)
+    page = list_users(filters, cursor=request.args.get('cursor'), limit=limit)
+    return jsonify({
+        'users': [serialize_user(u) for u in page.users],
+        'next_cursor': page.next_cursor,
+    })
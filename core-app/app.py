@@ -1,11 +1,20 @@
 import os
 from flask import Flask, jsonify, redirect, url_for, Blueprint, render_template
 from flask_login import login_required, current_user
+from werkzeug.middleware.proxy_fix import ProxyFix
 from config import get_config
 from extensions import db, migrate, login_manager, csrf
-from utils.translation import get_text
+from auth.ldap_pool import init_ldap_pool
+from auth.group_cache import init_group_cache
+from auth.rbac_cache import init_access_cache
+from auth.role_sync import init_role_sync
+from auth.login_guard import init_login_guard
+from auth.ldap_executor import init_ldap_executor
+from utils.image_queue import init_image_queue
+from utils.templates import init_template_cache
+from utils.translation import init_translations
 from utils.context_processors import inject_sidebar_menu
-from modules.admin import admin_bp
+from utils.module_registry import ModuleRegistry, init_module_index
 
 # Import models to ensure they are registered with SQLAlchemy
 from models.user import User
@@ -18,11 +27,25 @@ def create_app(config_name=None):
     config = get_config(config_name)
     app.config.from_object(config)
     
+    # Client IPs (login throttling, logs) from the reverse proxy's headers
+    if app.config.get('PROXY_COUNT'):
+        proxies = app.config['PROXY_COUNT']
+        app.wsgi_app = ProxyFix(app.wsgi_app, x_for=proxies, x_proto=proxies, x_host=proxies)
+    
     # Initialize extensions
     db.init_app(app)
     migrate.init_app(app, db)
     login_manager.init_app(app)
     csrf.init_app(app)
+    init_ldap_pool(app)
+    init_group_cache(app)
+    init_access_cache(app)
+    init_role_sync(app)
+    init_login_guard(app)
+    init_ldap_executor(app)
+    init_image_queue(app)
+    init_translations(app)
+    init_template_cache(app)
     
     # Configure Login Manager
     login_manager.login_view = 'auth.login'
@@ -34,10 +57,13 @@ def create_app(config_name=None):
     # Register Blueprints
     from auth.routes import auth_bp
     app.register_blueprint(auth_bp, url_prefix='/auth')
-    app.register_blueprint(admin_bp)
 
-    from modules.profile import profile_bp
-    app.register_blueprint(profile_bp, url_prefix='/profile')
+    # Feature modules: discovered from modules/*/config.json, imported only if enabled
+    ModuleRegistry(app).register_blueprints()
+    init_module_index(app)
+
+    from api.v1 import api_v1_bp
+    app.register_blueprint(api_v1_bp)
     
     # Main Blueprint (Placeholder for Dashboard)
     main_bp = Blueprint('main', __name__)
@@ -51,45 +77,76 @@ def create_app(config_name=None):
     
     # Context processors
     app.context_processor(inject_sidebar_menu)
-    
-    @app.context_processor
-    def inject_helpers():
-        return dict(get_text=get_text)
         
     # Health check
     @app.route('/health')
     def health():
         return jsonify({'status': 'healthy'})
 
+    register_commands(app)
     return app
 
-app = create_app()
+def register_commands(app):
+    """Register the ``flask`` CLI commands on ``app``."""
+    import click
+    from flask import current_app
+    from flask.cli import with_appcontext
 
-import click
-from flask.cli import with_appcontext
-
-@app.cli.command("init-rbac")
-@with_appcontext
-def init_rbac_command():
-    """Initialize RBAC: sync modules and create default roles."""
-    from utils.module_registry import ModuleRegistry
-    
-    print("Initializing RBAC...")
-    # Sync Modules
-    registry = ModuleRegistry(app)
-    registry.sync_database()
+    @app.cli.command("init-rbac")
+    @click.option('--force', is_flag=True, help='Rewrite all modules even if their config.json is unchanged.')
+    @with_appcontext
+    def init_rbac_command(force):
+        """Initialize RBAC: sync modules and create default roles."""
+        from auth.rbac_cache import invalidate_access
+        
+        print("Initializing RBAC...")
+        # Sync Modules (only those whose config.json changed)
+        registry = ModuleRegistry(current_app._get_current_object())
+        changed = registry.sync_database(force=force)
+        print(f"Synced {len(changed)} module(s).")
     
-    # Create Admin Role
-    admin_role = Role.query.filter_by(name='admin').first()
-    if not admin_role:
-        admin_role = Role(name='admin', description='System Administrator', is_system=True)
-        db.session.add(admin_role)
-        db.session.commit()
-        print("Created 'admin' role.")
-    else:
-        print("'admin' role exists.")
+        # Create Admin Role
+        admin_role = Role.query.filter_by(name='admin').first()
+        if not admin_role:
+            admin_role = Role(name='admin', description='System Administrator', is_system=True)
+            db.session.add(admin_role)
+            db.session.commit()
+            invalidate_access()
+            print("Created 'admin' role.")
+        else:
+            print("'admin' role exists.")
         
-    print("RBAC Initialization complete.")
+        print("RBAC Initialization complete.")
+
+    @app.cli.group("templates")
+    def templates_group():
+        """Jinja template tools."""
+
+    @templates_group.command("compile")
+    @with_appcontext
+    def compile_templates_command():
+        """Precompile all templates into the Jinja bytecode cache."""
+        from utils.templates import compile_templates
+
+        cache = current_app.jinja_env.bytecode_cache
+        if cache is None:
+            print("JINJA_CACHE_DIR is not set (or not writable), nothing to write to.")
+            raise SystemExit(1)
+        names = compile_templates(current_app._get_current_object())
+        print(f"Compiled {len(names)} template(s) into {cache.directory}.")
+
+    @app.cli.command("sync-ldap-roles")
+    @with_appcontext
+    def sync_ldap_roles_command():
+        """Grant/revoke LDAP-backed roles from current group membership."""
+        from auth.role_sync import get_role_sync
+
+        result = get_role_sync().run()
+        if result is None:
+            print("Role sync skipped or failed, see log.")
+            raise SystemExit(1)
+        print(f"Synced {result.local_users} local user(s) against {result.directory_users} "
+              f"directory user(s): {result.added} role(s) granted, {result.removed} revoked.")
 
 if __name__ == '__main__':
-    app.run(host='0.0.0.0', port=5000)
+    create_app().run(host='0.0.0.0', port=5000)
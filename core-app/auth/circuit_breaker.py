@@ -0,0 +1,85 @@
+"""
+Circuit breaker for calls to the directory server.
+
+After ``failure_threshold`` consecutive communication failures (connect or
+receive timeouts, refused connections) the circuit opens and calls fail
+immediately for ``reset_timeout`` seconds instead of each waiting for the
+timeouts again. Then a single trial call is let through per window; the
+first success closes the circuit.
+"""
+import logging
+import threading
+import time
+from typing import Optional
+from ldap3.core.exceptions import LDAPCommunicationError, LDAPException, LDAPResponseTimeoutError
+
+logger = logging.getLogger(__name__)
+
+# Exceptions meaning the server could not be reached or did not answer
+COMMUNICATION_ERRORS = (LDAPCommunicationError, LDAPResponseTimeoutError)
+
+
+class LDAPUnavailableError(LDAPException):
+    """Raised without contacting the directory while the circuit is open."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure circuit breaker (thread-safe).
+
+    Attributes:
+        failure_threshold: Consecutive failures that open the circuit (0 disables it)
+        reset_timeout: Seconds the circuit stays open before a trial call
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, name: str = 'ldap'):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.name = name
+
+        self._failures = 0
+        self._open_until: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        return self._open_until is not None
+
+    def allow(self) -> bool:
+        """Return True if a call may go to the server now."""
+        if self._open_until is None:
+            return True
+        with self._lock:
+            if self._open_until is None:
+                return True
+            now = time.monotonic()
+            if now < self._open_until:
+                return False
+            # Half-open: this caller makes the trial call, others wait a window
+            self._open_until = now + self.reset_timeout
+            return True
+
+    def check(self) -> None:
+        """Raise ``LDAPUnavailableError`` if the circuit is open."""
+        if not self.allow():
+            raise LDAPUnavailableError(f"{self.name} circuit open, directory unavailable")
+
+    def record_success(self) -> None:
+        if self._failures == 0 and self._open_until is None:
+            return
+        with self._lock:
+            if self._open_until is not None:
+                logger.info(f"{self.name} circuit closed, directory reachable again.")
+            self._failures = 0
+            self._open_until = None
+
+    def record_failure(self) -> None:
+        if not self.failure_threshold:
+            return
+        with self._lock:
+            self._failures += 1
+            if self._failures >= self.failure_threshold:
+                if self._open_until is None:
+                    logger.error(f"{self.name} circuit opened after {self._failures} "
+                                 f"consecutive failures; failing fast for {self.reset_timeout}s.")
+                self._open_until = time.monotonic() + self.reset_timeout
@@ -0,0 +1,298 @@
+"""
+In-memory cache of the LDAP group directory.
+
+``/admin/group-permissions`` lists every group in the directory. Instead of
+a full subtree search per render, the directory is cached per worker
+process, served stale while a background thread refreshes it, and refreshed
+incrementally using ``uSNChanged`` (or ``whenChanged`` where no USN is
+available). A periodic full reload picks up deleted groups, which do not
+show up in incremental searches.
+
+The cache also keeps the group nesting graph, built from each group's own
+``memberOf`` (its parent groups), so member DNs are never fetched. Nesting
+changes bump only the parent's USN, so an incremental fetch must also
+return the current child groups of every changed group (marked
+``fetched_as_child``); links to a changed group from groups not returned
+are dropped. ``expand()`` resolves
+transitive membership from memory.
+
+Logins never wait for a load: each worker starts loading in the background
+(``preload_group_cache`` from gunicorn's ``post_fork``), and until the graph
+is ready logins use the user's direct ``memberOf`` groups. A failed load is
+not retried for ``retry_backoff`` seconds.
+"""
+import logging
+import threading
+import time
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional
+from flask import Flask, current_app
+
+logger = logging.getLogger(__name__)
+
+_init_lock = threading.Lock()
+
+# fetch(change_filter) -> list of group dicts, or None if the search failed
+GroupFetcher = Callable[[Optional[str]], Optional[List[Dict]]]
+
+
+class GroupDirectoryCache:
+    """
+    TTL cache of LDAP groups keyed by DN.
+
+    Attributes:
+        ttl: Seconds before cached groups are considered stale
+        full_refresh_interval: Seconds between full reloads
+        retry_backoff: Seconds after a failed refresh before the next attempt
+    """
+
+    def __init__(self, ttl: int = 300, full_refresh_interval: int = 3600, retry_backoff: int = 60):
+        self.ttl = ttl
+        self.full_refresh_interval = full_refresh_interval
+        self.retry_backoff = retry_backoff
+
+        self._groups: Dict[str, Dict] = {}
+        self._sorted: List[Dict] = []
+        self._highest_usn: Optional[int] = None
+        self._latest_change: Optional[str] = None
+        self._loaded_at: Optional[float] = None
+        self._full_loaded_at: Optional[float] = None
+        self._failed_at: Optional[float] = None
+        self._refreshing = False
+
+        # Nesting graph, keyed by lower-cased DN
+        self._dn_names: Dict[str, str] = {}
+        self._parents: Dict[str, List[str]] = {}
+        self._closures: Dict[str, FrozenSet[str]] = {}
+
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config) -> 'GroupDirectoryCache':
+        return cls(
+            ttl=config.get('LDAP_GROUP_CACHE_TTL', 300),
+            full_refresh_interval=config.get('LDAP_GROUP_CACHE_FULL_REFRESH', 3600),
+            retry_backoff=config.get('LDAP_GROUP_CACHE_RETRY', 60),
+        )
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._loaded_at is not None
+
+    def is_stale(self) -> bool:
+        return not self.is_loaded or time.monotonic() - self._loaded_at > self.ttl
+
+    def in_backoff(self) -> bool:
+        """True while a recent failed refresh must not be retried."""
+        return self._failed_at is not None and time.monotonic() - self._failed_at < self.retry_backoff
+
+    def _needs_full_refresh(self) -> bool:
+        if self._full_loaded_at is None:
+            return True
+        if self._highest_usn is None and self._latest_change is None:
+            return True
+        return time.monotonic() - self._full_loaded_at > self.full_refresh_interval
+
+    def _change_filter(self) -> Optional[str]:
+        """LDAP filter fragment selecting groups changed since the last refresh."""
+        if self._highest_usn is not None:
+            return f'(uSNChanged>={self._highest_usn + 1})'
+        if self._latest_change is not None:
+            return f'(whenChanged>={self._latest_change})'
+        return None
+
+    def refresh(self, fetch: GroupFetcher, full: bool = False) -> bool:
+        """
+        Refresh the cache using ``fetch``.
+
+        Args:
+            fetch: Callable running the LDAP group search for a change filter
+            full: Force a full reload instead of an incremental update
+
+        Returns:
+            True if the cache was updated
+        """
+        with self._refresh_lock:
+            full = full or self._needs_full_refresh()
+            try:
+                groups = fetch(None if full else self._change_filter())
+            except Exception:
+                self._failed_at = time.monotonic()
+                raise
+            if groups is None:
+                self._failed_at = time.monotonic()
+                logger.warning(f"Group cache refresh failed, next attempt in {self.retry_backoff}s.")
+                return False
+            self._failed_at = None
+
+            with self._lock:
+                merged = {} if full else dict(self._groups)
+                for group in groups:
+                    merged[group['dn']] = group
+                self._groups = merged
+                self._sorted = sorted(merged.values(), key=lambda x: x['cn'])
+                self._build_graph(groups, full)
+
+                usns = [g['usn'] for g in groups if g.get('usn') is not None]
+                if usns:
+                    self._highest_usn = max(usns + [self._highest_usn or 0])
+                changes = [g['when_changed'] for g in groups if g.get('when_changed')]
+                if changes:
+                    self._latest_change = max(changes + [self._latest_change or ''])
+
+                now = time.monotonic()
+                self._loaded_at = now
+                if full:
+                    self._full_loaded_at = now
+
+            logger.info(f"Group cache {'reloaded' if full else 'updated'}: "
+                        f"{len(groups)} group(s) fetched, {len(self._groups)} cached.")
+            return True
+
+    def _build_graph(self, fetched: List[Dict], full: bool) -> None:
+        """Rebuild the nesting graph after ``fetched`` groups were merged."""
+        dn_names = {dn.lower(): dn for dn in self._groups}
+        if not full:
+            # Every current child of a changed group was fetched with it, so
+            # older links to it from groups not fetched are gone
+            returned = {group['dn'].lower() for group in fetched}
+            changed = {group['dn'].lower() for group in fetched if not group.get('fetched_as_child')}
+            for group in self._groups.values():
+                links = group.get('parents')
+                if links and group['dn'].lower() not in returned:
+                    group['parents'] = [p for p in links if p not in changed]
+
+        parents: Dict[str, List[str]] = {}
+        for group in self._groups.values():
+            links = [p for p in group.get('parents', ()) if p in dn_names]
+            if links:
+                parents[group['dn'].lower()] = links
+
+        self._dn_names = dn_names
+        self._parents = parents
+        self._closures = {}
+
+    def _closure(self, key: str) -> FrozenSet[str]:
+        """Lower-cased DNs of ``key`` and every group it is nested in (memoized)."""
+        closures = self._closures
+        closure = closures.get(key)
+        if closure is None:
+            parents = self._parents
+            seen, stack = {key}, [key]
+            while stack:
+                for parent in parents.get(stack.pop(), ()):
+                    if parent not in seen:  # AD allows circular nesting
+                        seen.add(parent)
+                        stack.append(parent)
+            closure = frozenset(seen)
+            closures[key] = closure
+        return closure
+
+    def expand(self, group_dns: Iterable[str]) -> List[str]:
+        """
+        Add every group the given groups are nested in, transitively.
+
+        Args:
+            group_dns: Direct group DNs (e.g. a user's ``memberOf``)
+
+        Returns:
+            Direct and inherited group DNs; unknown DNs are passed through
+        """
+        dn_names = self._dn_names
+        result: Dict[str, str] = {}
+        for dn in group_dns:
+            dn = str(dn)
+            key = dn.lower()
+            result.setdefault(key, dn)
+            for ancestor in self._closure(key):
+                result.setdefault(ancestor, dn_names.get(ancestor, ancestor))
+        return list(result.values())
+
+    def refresh_in_background(self, app: Flask, fetch: GroupFetcher) -> None:
+        """Start a refresh thread unless one is running or a failure is recent."""
+        with self._lock:
+            if self._refreshing or self.in_backoff():
+                return
+            self._refreshing = True
+
+        def run():
+            with app.app_context():
+                try:
+                    self.refresh(fetch)
+                except Exception as e:
+                    logger.error(f"Background group cache refresh failed: {e}")
+                finally:
+                    self._refreshing = False
+
+        threading.Thread(target=run, name='ldap-group-cache-refresh', daemon=True).start()
+
+    def ensure_loaded(self, fetch: GroupFetcher, wait: bool = True) -> bool:
+        """
+        Load on first use; afterwards serve stale data while a single
+        background refresh runs. Nothing is fetched while a recent refresh
+        failed (see ``retry_backoff``).
+
+        Args:
+            fetch: Callable running the LDAP group search
+            wait: Load synchronously if nothing is cached yet; with False
+                the first load runs in the background (login path)
+
+        Returns:
+            True if groups are available
+        """
+        if not self.is_loaded:
+            if not wait:
+                self.refresh_in_background(current_app._get_current_object(), fetch)
+            elif not self.in_backoff():
+                self.refresh(fetch)
+        elif self.is_stale():
+            self.refresh_in_background(current_app._get_current_object(), fetch)
+        return self.is_loaded
+
+    def get_groups(self, fetch: GroupFetcher) -> List[Dict]:
+        """Return cached groups sorted by CN (see ``ensure_loaded``)."""
+        self.ensure_loaded(fetch)
+        return list(self._sorted)
+
+    def invalidate(self) -> None:
+        """Forget cached groups; the next read performs a full reload."""
+        with self._lock:
+            self._groups = {}
+            self._sorted = []
+            self._highest_usn = None
+            self._latest_change = None
+            self._loaded_at = None
+            self._full_loaded_at = None
+            self._failed_at = None
+            self._dn_names = {}
+            self._parents = {}
+            self._closures = {}
+
+
+def init_group_cache(app: Flask) -> GroupDirectoryCache:
+    """Create the group cache for ``app`` and store it in ``app.extensions``."""
+    cache = GroupDirectoryCache.from_config(app.config)
+    app.extensions['ldap_group_cache'] = cache
+    return cache
+
+
+def preload_group_cache(app: Flask) -> None:
+    """Start loading the nesting graph in the background (call once per worker)."""
+    if not app.config.get('LDAP_NESTED_GROUPS', True):
+        return
+    from auth.ldap_connector import LDAPConnector
+
+    with app.app_context():
+        connector = LDAPConnector()
+        if not connector.is_dev:
+            get_group_cache().refresh_in_background(app, connector.fetch_groups)
+
+
+def get_group_cache() -> GroupDirectoryCache:
+    """Return the current app's group cache, creating it lazily."""
+    app = current_app._get_current_object()
+    if 'ldap_group_cache' not in app.extensions:
+        with _init_lock:
+            if 'ldap_group_cache' not in app.extensions:
+                init_group_cache(app)
+    return app.extensions['ldap_group_cache']
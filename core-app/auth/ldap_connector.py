@@ -2,11 +2,16 @@
 LDAP Connector for Active Directory authentication and user management.
 """
 import logging
-import ssl
-from typing import Optional, Dict, List, Any
-from ldap3 import Server, Connection, ALL, SUBTREE, NTLM, Tls, SIMPLE
+from contextlib import contextmanager
+from typing import Optional, Dict, Iterator, List, Tuple, Any
+from ldap3 import NTLM, SIMPLE
 from ldap3.core.exceptions import LDAPException
+from ldap3.utils.conv import escape_filter_chars
 from flask import current_app
+from auth.circuit_breaker import COMMUNICATION_ERRORS, LDAPUnavailableError
+from auth.ldap_pool import get_ldap_pool
+from auth.group_cache import get_group_cache
+from auth.login_guard import get_unknown_user_cache
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
@@ -20,161 +25,196 @@ class LDAPConnector:
         self.base_dn = current_app.config.get('LDAP_BASE_DN')
         self.user_search_base = current_app.config.get('LDAP_USER_SEARCH_BASE')
         self.group_search_base = current_app.config.get('LDAP_GROUP_SEARCH_BASE')
+        self.count_members = current_app.config.get('LDAP_GROUP_COUNT_MEMBERS', True)
+        self.member_count_limit = current_app.config.get('LDAP_GROUP_MEMBER_COUNT_LIMIT', 1000)
+        self.nested_groups = current_app.config.get('LDAP_NESTED_GROUPS', True)
+        self.page_size = current_app.config.get('LDAP_PAGE_SIZE', 500)
         
         # Determine Dev Mode
         env = current_app.config.get('FLASK_ENV')
         self.is_dev = (env == 'development')
 
-        # Initialize connection as None
-        self.connection = None
-        self._init_connection()
+        # Shared per-process pool of bound service connections (see create_app)
+        self.pool = get_ldap_pool()
+        self.server = self.pool.server if self.pool else None
 
-    def _init_connection(self):
-        """Initialize LDAP connection object."""
-        if not self.server_uri:
-            return
+    def _service_connection(self):
+        """Context manager yielding a bound service connection from the pool."""
+        if not self.pool:
+            raise LDAPException("LDAP server not configured")
+        return self.pool.connection()
 
-        try:
-            # Create Server object with TLS (ignore self-signed certs)
-            tls_conf = Tls(validate=ssl.CERT_NONE, version=ssl.PROTOCOL_TLSv1_2)
-            self.server = Server(self.server_uri, use_ssl=True, tls=tls_conf, get_info=ALL)
-            
-            # Initialize Connection (Bind later)
-            # Default to NTLM if needed, or allow auto-negotiation
-            self.connection = Connection(
-                self.server, 
-                user=self.bind_dn, 
-                password=self.bind_password,
-                authentication=NTLM, # Default for AD often NTLM
-                auto_bind=False
+    USER_ATTRIBUTES = ['displayName', 'mail', 'sAMAccountName', 'memberOf']
+    GROUP_ATTRIBUTES = ['cn', 'uSNChanged', 'whenChanged']
+
+    DEMO_PROFILE = {
+        'username': 'admin',
+        'display_name': 'Administrator (Demo)',
+        'email': 'admin@demo.local',
+        'groups': ['Domain Admins', 'Schema Admins']
+    }
+
+    def _user_search_base(self) -> str:
+        return f"{self.user_search_base},{self.base_dn}" if self.user_search_base else self.base_dn
+
+    def _find_user(self, username, attributes):
+        """Search for a user entry with a pooled service connection."""
+        search_filter = f'(&(objectClass=user)(sAMAccountName={username}))'
+        with self._service_connection() as conn:
+            conn.search(
+                search_base=self._user_search_base(),
+                search_filter=search_filter,
+                attributes=attributes
             )
-        except Exception as e:
-            logger.error(f"Failed to initialize LDAP connection: {e}")
+            entries = conn.entries
+        return entries[0] if entries else None
 
-    def _bind_service_user(self):
-        """Helper to bind with service account."""
-        if not self.connection:
-            return False
-            
+    def _ntlm_domain(self) -> Optional[str]:
+        """NetBIOS-style domain for NTLM binds, taken from the first DC= of the base DN."""
         try:
-            # Try simple bind first (often works if DN is correct)
-            self.connection.authentication = SIMPLE
-            if self.connection.bind():
-                return True
-                
-            # If simple fails, try NTLM
-            self.connection.authentication = NTLM
-            if self.connection.bind():
-                return True
-                
-            logger.error("Failed to bind service user with both SIMPLE and NTLM.")
-            return False
-        except Exception as e:
-            logger.error(f"Error binding service user: {e}")
-            return False
+            return self.base_dn.split(',')[0].split('=')[1].upper()
+        except (AttributeError, IndexError):
+            return None
 
-    def authenticate(self, username, password) -> bool:
+    def _bind_as_user(self, user_dn, username, password) -> bool:
         """
-        Authenticate user against LDAP.
+        Verify the user's password with a direct bind.
+
+        SIMPLE (DN) and NTLM (DOMAIN\\user) are tried in turn until one
+        works; the pool then remembers that method for the domain and only
+        falls back to the other one on errors, so a wrong password costs a
+        single bind.
+        """
+        domain = self._ntlm_domain()
+        candidates = [(SIMPLE, user_dn)]
+        if domain:
+            candidates.append((NTLM, f"{domain}\\{username}"))
+
+        learned = self.pool.user_bind_methods.get(domain)
+        if learned:
+            candidates.sort(key=lambda candidate: candidate[0] != learned)
+
+        for method, user in candidates:
+            try:
+                if self.pool.bind_user(user, password, method):
+                    self.pool.user_bind_methods[domain] = method
+                    return True
+                if method == learned:
+                    # Rejected by the method known to work: wrong password
+                    return False
+            except (LDAPUnavailableError,) + COMMUNICATION_ERRORS:
+                # The other method cannot reach the server either
+                raise
+            except Exception as e:
+                logger.debug(f"User {method} bind failed: {e}")
+
+        return False
+
+    def _entry_to_profile(self, entry, username) -> Dict[str, Any]:
+        attrs = entry.entry_attributes_as_dict
+
+        def first(name):
+            values = attrs.get(name)
+            return str(values[0]) if values else None
+
+        return {
+            'username': first('sAMAccountName') or username,
+            'display_name': first('displayName') or username,
+            'email': first('mail') or '',
+            'groups': self._resolve_groups(attrs.get('memberOf', []))
+        }
+
+    def _resolve_groups(self, member_of) -> List[str]:
+        """
+        Group CNs for ``memberOf`` DNs, including groups they are nested in.
+
+        Nesting is resolved from the in-memory group graph (loaded once per
+        worker), so this adds no LDAP round trips per login. Until the graph
+        is loaded, only the direct ``memberOf`` groups are returned; the
+        load runs in the background and never delays a login.
+        """
+        if isinstance(member_of, str):
+            member_of = [member_of]
+        if self.nested_groups and not self.is_dev:
+            cache = get_group_cache()
+            if cache.ensure_loaded(self.fetch_groups, wait=False):
+                member_of = cache.expand(member_of)
+        return self._parse_groups(member_of)
+
+    def authenticate_and_fetch(self, username, password) -> Optional[Dict[str, Any]]:
+        """
+        Authenticate user and return their profile in a single LDAP pass.
+
+        One service search fetches the DN together with all profile
+        attributes, followed by one bind as the user. Usernames the
+        directory recently did not know are rejected without LDAP.
+
+        Returns:
+            Profile dict (username, display_name, email, groups) or None
+
+        Raises:
+            LDAPUnavailableError: If the directory is down or not answering
         """
         # 1. Dev Mode Bypass
         if self.is_dev and username == 'admin' and password == 'admin':
             logger.info("Authenticated using Demo Mode (admin/admin)")
-            return True
+            return dict(self.DEMO_PROFILE)
 
         if not username or not password:
-            return False
+            return None
 
         if not self.bind_dn or not self.bind_password:
             logger.error("LDAP Bind DN or Password not configured.")
-            return False
+            return None
 
         try:
-            # 2. Bind with Service Account
-            if not self._bind_service_user():
-                return False
-
-            # 3. Search for User DN
-            search_base = f"{self.user_search_base},{self.base_dn}" if self.user_search_base else self.base_dn
-            search_filter = f'(&(objectClass=user)(sAMAccountName={username}))'
-            
-            self.connection.search(
-                search_base=search_base,
-                search_filter=search_filter,
-                attributes=['distinguishedName']
-            )
-
-            if not self.connection.entries:
+            # 2. Search for user DN and profile attributes
+            unknown_users = get_unknown_user_cache()
+            if username in unknown_users:
+                logger.warning(f"User {username} not found in LDAP (cached).")
+                return None
+            entry = self._find_user(username, self.USER_ATTRIBUTES)
+            if entry is None:
                 logger.warning(f"User {username} not found in LDAP.")
-                return False
-
-            user_dn = self.connection.entries[0].distinguishedName.value
-
-            # 4. Attempt Bind as User
-            # Try Simple Bind with DN
-            try:
-                user_conn = Connection(self.server, user=user_dn, password=password, authentication=SIMPLE, auto_bind=True)
-                user_conn.unbind()
-                return True
-            except Exception as e:
-                logger.debug(f"User simple bind failed: {e}")
+                unknown_users.add(username)
+                return None
 
-            # Try NTLM (DOMAIN\User)
-            try:
-                domain_part = self.base_dn.split(',')[0].split('=')[1]
-                ntlm_user = f"{domain_part.upper()}\\{username}"
-                user_conn = Connection(self.server, user=ntlm_user, password=password, authentication=NTLM, auto_bind=True)
-                user_conn.unbind()
-                return True
-            except Exception as e:
-                logger.debug(f"User NTLM bind failed: {e}")
+            # 3. Attempt Bind as User
+            if not self._bind_as_user(entry.entry_dn, username, password):
+                return None
 
-            return False
+            return self._entry_to_profile(entry, username)
 
+        except LDAPUnavailableError:
+            raise
+        except COMMUNICATION_ERRORS as e:
+            logger.error(f"LDAP server unreachable during authentication: {str(e)}")
+            raise LDAPUnavailableError(str(e)) from e
         except LDAPException as e:
             logger.error(f"LDAP Error during authentication: {str(e)}")
-            return False
+            return None
         except Exception as e:
             logger.error(f"Unexpected error during LDAP authentication: {str(e)}")
-            return False
+            return None
+
+    def authenticate(self, username, password) -> bool:
+        """
+        Authenticate user against LDAP.
+        """
+        return self.authenticate_and_fetch(username, password) is not None
 
     def get_user_info(self, username) -> Optional[Dict[str, Any]]:
         """
         Get user details (Display Name, Email, Groups).
         """
         if self.is_dev and username == 'admin':
-            return {
-                'username': 'admin',
-                'display_name': 'Administrator (Demo)',
-                'email': 'admin@demo.local',
-                'groups': ['Domain Admins', 'Schema Admins']
-            }
+            return dict(self.DEMO_PROFILE)
 
         try:
-            if not self._bind_service_user():
+            entry = self._find_user(username, self.USER_ATTRIBUTES)
+            if entry is None:
                 return None
-
-            search_base = f"{self.user_search_base},{self.base_dn}" if self.user_search_base else self.base_dn
-            search_filter = f'(&(objectClass=user)(sAMAccountName={username}))'
-            attributes = ['displayName', 'mail', 'sAMAccountName', 'memberOf']
-
-            self.connection.search(
-                search_base=search_base,
-                search_filter=search_filter,
-                attributes=attributes
-            )
-
-            if not self.connection.entries:
-                return None
-
-            entry = self.connection.entries[0]
-            
-            return {
-                'username': str(entry.sAMAccountName),
-                'display_name': str(entry.displayName) if entry.displayName else username,
-                'email': str(entry.mail) if entry.mail else '',
-                'groups': self._parse_groups(entry.memberOf.values if entry.memberOf else [])
-            }
+            return self._entry_to_profile(entry, username)
 
         except Exception as e:
             logger.error(f"Error getting user info: {e}")
@@ -185,7 +225,7 @@ class LDAPConnector:
         return info.get('groups', []) if info else []
 
     def get_all_groups(self) -> List[Dict]:
-        """Get all LDAP groups."""
+        """Get all LDAP groups (served from the per-process group cache)."""
         if hasattr(self, 'is_dev') and self.is_dev:
             # Mock groups for dev mode testing
             return [
@@ -194,41 +234,164 @@ class LDAPConnector:
                 {'cn': 'Students', 'dn': 'CN=Students,CN=Users,DC=example,DC=com', 'member_count': 100}
             ]
 
-        try:
-            # Bind using helper to ensure correct auth method
-            if not self._bind_service_user():
-                logger.error("Bind failed in get_all_groups")
-                return []
+        return get_group_cache().get_groups(self.fetch_groups)
 
-            search_base = self.base_dn
-            search_filter = '(objectClass=group)'
-            attributes = ['cn', 'distinguishedName', 'member']
+    def iter_search(self, search_base: str, search_filter: str, attributes: List[str],
+                    page_size: Optional[int] = None, ranged: bool = False) -> Iterator[Dict[str, Any]]:
+        """
+        Stream search results using the Simple Paged Results control.
+
+        Only one page is held in memory at a time, and result sets larger
+        than the server's MaxPageSize are not truncated. The pooled
+        connection is held until the generator is exhausted or closed.
+
+        Args:
+            search_base: Base DN of the subtree search
+            search_filter: LDAP filter
+            attributes: Attributes to fetch
+            page_size: Entries per page (defaults to LDAP_PAGE_SIZE)
+            ranged: Return ranged values (``member;range=0-99``) as sent
+                instead of fetching the remaining ranges
 
-            self.connection.search(
+        Yields:
+            ldap3 response dicts with 'dn', 'attributes' and 'raw_attributes'
+        """
+        with self._service_connection() as pooled, self._range_mode(pooled, ranged) as conn:
+            results = conn.extend.standard.paged_search(
                 search_base=search_base,
                 search_filter=search_filter,
-                attributes=attributes
+                attributes=attributes,
+                paged_size=page_size or self.page_size,
+                generator=True
             )
+            for item in results:
+                if item.get('type') == 'searchResEntry':
+                    yield item
 
-            groups = []
-            for entry in self.connection.entries:
-                members = entry.member.values if hasattr(entry, 'member') and entry.member else []
-                cn = str(entry.cn) if hasattr(entry, 'cn') and entry.cn else "Unknown"
-                dn = str(entry.distinguishedName) if hasattr(entry, 'distinguishedName') and entry.distinguishedName else ""
-                
-                groups.append({
-                    'cn': cn,
-                    'dn': dn,
-                    'member_count': len(members),
-                    'members': members
-                })
-            
-            # Sort by CN
-            groups.sort(key=lambda x: x['cn'])
+    @staticmethod
+    @contextmanager
+    def _range_mode(conn, ranged: bool):
+        # ldap3 follows up ranged attributes with further searches (auto_range)
+        # and pads requested attributes it did not get (empty_attributes)
+        if not ranged:
+            yield conn
+            return
+        saved = conn.auto_range, conn.empty_attributes
+        conn.auto_range = conn.empty_attributes = False
+        try:
+            yield conn
+        finally:
+            conn.auto_range, conn.empty_attributes = saved
+
+    def iter_user_groups(self) -> Iterator[Tuple[str, List[str]]]:
+        """
+        Stream (username, group CNs) for every user that belongs to a group.
+
+        One paged search over the user base, reading the same ``memberOf``
+        values that login uses (nested groups included). Raises
+        LDAPException if the search fails.
+        """
+        if self.nested_groups:
+            # Pick up nesting changes before resolving every user
+            get_group_cache().refresh(self.fetch_groups)
+
+        search_filter = '(&(objectClass=user)(memberOf=*))'
+        for item in self.iter_search(self._user_search_base(), search_filter,
+                                     ['sAMAccountName', 'memberOf']):
+            raw = item['raw_attributes']
+            username = raw.get('sAMAccountName')
+            if not username:
+                continue
+            member_of = [dn.decode('utf-8') for dn in raw.get('memberOf') or []]
+            yield username[0].decode('utf-8'), self._resolve_groups(member_of)
+
+    def fetch_groups(self, change_filter: Optional[str] = None) -> Optional[List[Dict]]:
+        """
+        Search the directory for groups (uncached).
+
+        Args:
+            change_filter: Optional filter fragment restricting the search to
+                recently changed groups, e.g. ``(uSNChanged>=1234)``
+
+        Member DNs are never fetched: counts come from one capped range of
+        ``member`` and nesting from each group's own ``memberOf``. For a
+        change filter, the child groups of every changed group are returned
+        too (marked ``fetched_as_child``), as the group cache requires.
+
+        Returns:
+            List of group dicts, or None if the search failed
+        """
+        search_filter = '(objectClass=group)'
+        if change_filter:
+            search_filter = f'(&{search_filter}{change_filter})'
+
+        try:
+            groups = self._search_groups(search_filter)
+            if change_filter and self.nested_groups and groups:
+                groups += self._fetch_child_groups(groups)
             return groups
         except Exception as e:
             logger.error(f"Error fetching groups: {e}")
-            return []
+            return None
+
+    def _group_attributes(self) -> List[str]:
+        attributes = list(self.GROUP_ATTRIBUTES)
+        if self.count_members:
+            attributes.append(f'member;range=0-{self.member_count_limit - 1}')
+        if self.nested_groups:
+            attributes.append('memberOf')
+        return attributes
+
+    def _search_groups(self, search_filter: str) -> List[Dict]:
+        return [
+            self._entry_to_group(item)
+            for item in self.iter_search(self.base_dn, search_filter, self._group_attributes(), ranged=True)
+        ]
+
+    CHILD_FILTER_CHUNK = 50
+
+    def _fetch_child_groups(self, groups: List[Dict]) -> List[Dict]:
+        """Groups nested directly in any of ``groups`` that are not among them."""
+        seen = {group['dn'].lower() for group in groups}
+        dns = [group['dn'] for group in groups]
+        children = []
+        for start in range(0, len(dns), self.CHILD_FILTER_CHUNK):
+            parents = ''.join(f'(memberOf={escape_filter_chars(dn)})'
+                              for dn in dns[start:start + self.CHILD_FILTER_CHUNK])
+            for group in self._search_groups(f'(&(objectClass=group)(|{parents}))'):
+                if group['dn'].lower() not in seen:
+                    seen.add(group['dn'].lower())
+                    group['fetched_as_child'] = True
+                    children.append(group)
+        return children
+
+    def _count_members(self, raw) -> Tuple[int, bool]:
+        """(member count, True if capped at ``member_count_limit``)."""
+        for name, values in raw.items():
+            attribute, _, bounds = name.partition(';range=')
+            if bounds and attribute.lower() == 'member':
+                # 'member;range=0-*' is the last (here: only) range
+                return len(values), not bounds.endswith('-*')
+        return 0, False  # no members (or no range support)
+
+    def _entry_to_group(self, item) -> Dict[str, Any]:
+        raw = item['raw_attributes']
+        cn = raw.get('cn')
+        usn = raw.get('uSNChanged')
+        when_changed = raw.get('whenChanged')
+        group = {
+            'cn': cn[0].decode('utf-8') if cn else "Unknown",
+            'dn': item['dn'],
+            'member_count': None,
+            'member_count_capped': False,
+            'usn': int(usn[0]) if usn else None,
+            'when_changed': when_changed[0].decode('ascii') if when_changed else None
+        }
+        if self.count_members:
+            group['member_count'], group['member_count_capped'] = self._count_members(raw)
+        if self.nested_groups:
+            group['parents'] = [dn.decode('utf-8').lower() for dn in raw.get('memberOf') or []]
+        return group
 
     def _parse_groups(self, member_of_list) -> List[str]:
         groups = []
@@ -0,0 +1,101 @@
+"""
+Small thread pool for running LDAP calls off the request thread.
+
+Views that need both directory data and database rows can submit the LDAP
+call here and run their queries while it is in flight. The pool is bounded
+per worker process, so a slow domain controller can occupy at most
+``LDAP_EXECUTOR_WORKERS`` threads, and callers stop waiting after
+``LDAP_EXECUTOR_TIMEOUT`` seconds and render without the directory data.
+"""
+import logging
+import os
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError
+from typing import Any, Callable, Optional
+from flask import Flask, current_app
+
+logger = logging.getLogger(__name__)
+
+_init_lock = threading.Lock()
+
+
+class LDAPExecutor:
+    """
+    Bounded thread pool running callables inside an application context.
+
+    Attributes:
+        max_workers: Threads per worker process
+        timeout: Default seconds ``result()`` waits for a submitted call
+    """
+
+    def __init__(self, max_workers: int = 4, timeout: float = 15.0):
+        self.max_workers = max_workers
+        self.timeout = timeout
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config) -> 'LDAPExecutor':
+        return cls(
+            max_workers=config.get('LDAP_EXECUTOR_WORKERS', 4),
+            timeout=config.get('LDAP_EXECUTOR_TIMEOUT', 15.0),
+        )
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Threads are created lazily and never inherited across fork (gunicorn preload)
+        if self._executor is None or self._pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._pid != os.getpid():
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix='ldap'
+                    )
+                    self._pid = os.getpid()
+        return self._executor
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Future:
+        """Run ``fn(*args, **kwargs)`` in the pool within the current app's context."""
+        app = current_app._get_current_object()
+
+        def call():
+            with app.app_context():
+                return fn(*args, **kwargs)
+
+        return self._get_executor().submit(call)
+
+    def result(self, future: Future, default: Any = None, timeout: Optional[float] = None) -> Any:
+        """
+        Wait for ``future``; return ``default`` if it fails or takes too long.
+
+        A timed-out call keeps running in the pool and its result is dropped.
+        """
+        try:
+            return future.result(timeout=self.timeout if timeout is None else timeout)
+        except TimeoutError:
+            logger.error("LDAP call did not finish within the executor timeout.")
+        except Exception as e:
+            logger.error(f"LDAP call failed: {e}")
+        return default
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+def init_ldap_executor(app: Flask) -> LDAPExecutor:
+    """Create the LDAP executor for ``app`` and store it in ``app.extensions``."""
+    executor = LDAPExecutor.from_config(app.config)
+    app.extensions['ldap_executor'] = executor
+    return executor
+
+
+def get_ldap_executor() -> LDAPExecutor:
+    """Return the current app's LDAP executor, creating it lazily."""
+    app = current_app._get_current_object()
+    if 'ldap_executor' not in app.extensions:
+        with _init_lock:
+            if 'ldap_executor' not in app.extensions:
+                init_ldap_executor(app)
+    return app.extensions['ldap_executor']
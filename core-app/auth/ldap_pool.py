@@ -0,0 +1,286 @@
+"""
+Process-wide pool of bound LDAP service-account connections.
+
+Building a ``Server`` and binding the service account (SIMPLE, then NTLM)
+for every ``LDAPConnector`` call costs a TLS handshake and up to two binds.
+The pool keeps a bounded number of bound connections alive per worker
+process, health-checks them before reuse, evicts idle ones and remembers
+which bind methods the directory accepted.
+
+Every socket gets connect and receive timeouts, and a ``CircuitBreaker``
+makes calls fail fast with ``LDAPUnavailableError`` once the directory
+has stopped answering, instead of each request waiting for the timeouts.
+"""
+import logging
+import os
+import ssl
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from typing import Deque, Dict, Iterator, Optional, Tuple
+from ldap3 import Server, Connection, ALL, BASE, NTLM, SIMPLE, SYNC, Tls
+from ldap3.core.exceptions import LDAPException
+from flask import Flask, current_app
+from auth.circuit_breaker import COMMUNICATION_ERRORS, CircuitBreaker
+
+logger = logging.getLogger(__name__)
+
+_init_lock = threading.Lock()
+
+
+class LDAPConnectionPool:
+    """
+    Bounded pool of service-account connections sharing one ``Server``.
+
+    Attributes:
+        server: Shared ldap3 Server object (also used for user binds)
+        max_size: Maximum number of connections checked out at once
+        idle_timeout: Seconds after which an idle connection is closed
+        health_check_interval: Idle seconds after which a connection is
+            probed before being handed out again
+        connect_timeout: Seconds to wait for the TCP/TLS connection
+        receive_timeout: Seconds to wait for each response on an open connection
+        breaker: Circuit breaker shared by service and user binds
+    """
+
+    BIND_METHODS = (SIMPLE, NTLM)
+
+    def __init__(self, server_uri: str, bind_dn: str, bind_password: str,
+                 max_size: int = 5, idle_timeout: int = 300,
+                 health_check_interval: int = 60, acquire_timeout: int = 10,
+                 connect_timeout: int = 5, receive_timeout: int = 10,
+                 failure_threshold: int = 5, reset_timeout: int = 30,
+                 client_strategy: str = SYNC):
+        self.server_uri = server_uri
+        self.bind_dn = bind_dn
+        self.bind_password = bind_password
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.acquire_timeout = acquire_timeout
+        self.connect_timeout = connect_timeout
+        self.receive_timeout = receive_timeout
+        self.client_strategy = client_strategy
+
+        self.server = self._build_server()
+        self.breaker = CircuitBreaker(failure_threshold, reset_timeout)
+        self.bind_method: Optional[str] = None
+        # Domain -> bind method that verified a user password (see LDAPConnector._bind_as_user)
+        self.user_bind_methods: Dict[Optional[str], str] = {}
+
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._idle: Deque[Tuple[Connection, float]] = deque()
+        self._pid = os.getpid()
+
+    @classmethod
+    def from_config(cls, config) -> Optional['LDAPConnectionPool']:
+        """Build a pool from Flask config, or None if no server is configured."""
+        if not config.get('LDAP_SERVER'):
+            return None
+        return cls(
+            server_uri=config.get('LDAP_SERVER'),
+            bind_dn=config.get('LDAP_BIND_DN'),
+            bind_password=config.get('LDAP_BIND_PASSWORD'),
+            max_size=config.get('LDAP_POOL_SIZE', 5),
+            idle_timeout=config.get('LDAP_POOL_IDLE_TIMEOUT', 300),
+            health_check_interval=config.get('LDAP_POOL_HEALTH_CHECK_INTERVAL', 60),
+            acquire_timeout=config.get('LDAP_POOL_ACQUIRE_TIMEOUT', 10),
+            connect_timeout=config.get('LDAP_CONNECT_TIMEOUT', 5),
+            receive_timeout=config.get('LDAP_RECEIVE_TIMEOUT', 10),
+            failure_threshold=config.get('LDAP_CIRCUIT_FAILURE_THRESHOLD', 5),
+            reset_timeout=config.get('LDAP_CIRCUIT_RESET_TIMEOUT', 30),
+        )
+
+    def _build_server(self) -> Server:
+        # TLS without certificate validation (self-signed DC certificates)
+        tls_conf = Tls(validate=ssl.CERT_NONE, version=ssl.PROTOCOL_TLSv1_2)
+        return Server(self.server_uri, use_ssl=True, tls=tls_conf, get_info=ALL,
+                      connect_timeout=self.connect_timeout)
+
+    def _connection(self, user: str, password: str, authentication: str) -> Connection:
+        return Connection(
+            self.server,
+            user=user,
+            password=password,
+            authentication=authentication,
+            client_strategy=self.client_strategy,
+            receive_timeout=self.receive_timeout,
+            auto_bind=False
+        )
+
+    def _check_fork(self) -> None:
+        """Drop connections inherited from a parent process (e.g. preload + fork)."""
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                self._idle.clear()
+                self._slots = threading.BoundedSemaphore(self.max_size)
+                self._pid = os.getpid()
+
+    def _bind_service_user(self) -> Optional[Connection]:
+        """Open and bind a new service connection, remembering the working method."""
+        methods = self.BIND_METHODS
+        if self.bind_method:
+            methods = (self.bind_method,) + tuple(m for m in methods if m != self.bind_method)
+
+        for method in methods:
+            try:
+                conn = self._connection(self.bind_dn, self.bind_password, method)
+                if conn.bind():
+                    self.breaker.record_success()
+                    if self.bind_method != method:
+                        logger.info(f"LDAP service bind succeeded using {method}.")
+                        self.bind_method = method
+                    return conn
+            except COMMUNICATION_ERRORS as e:
+                # Another bind method will not reach the server either
+                logger.error(f"LDAP server unreachable: {e}")
+                self.breaker.record_failure()
+                raise
+            except Exception as e:
+                logger.debug(f"Service bind with {method} failed: {e}")
+
+        logger.error("Failed to bind service user with both SIMPLE and NTLM.")
+        self.bind_method = None
+        return None
+
+    def _is_healthy(self, conn: Connection) -> bool:
+        """Cheap liveness probe: base search on the root DSE."""
+        if conn.closed or not conn.bound:
+            return False
+        try:
+            conn.search('', '(objectClass=*)', search_scope=BASE, attributes=['1.1'])
+        except LDAPException as e:
+            logger.debug(f"Pooled LDAP connection failed health check: {e}")
+            return False
+        return conn.bound
+
+    def bind_user(self, user: str, password: str, authentication: str = SIMPLE) -> bool:
+        """
+        Verify user credentials with a short-lived, non-pooled bind.
+
+        Raises:
+            LDAPUnavailableError: If the circuit breaker is open
+        """
+        self.breaker.check()
+        conn = self._connection(user, password, authentication)
+        try:
+            result = conn.bind()
+            self.breaker.record_success()
+            return result
+        except COMMUNICATION_ERRORS:
+            self.breaker.record_failure()
+            raise
+        finally:
+            self._close(conn)
+
+    @staticmethod
+    def _close(conn: Connection) -> None:
+        try:
+            conn.unbind()
+        except Exception:
+            pass
+
+    def acquire(self) -> Connection:
+        """
+        Check out a bound service connection.
+
+        Raises:
+            LDAPUnavailableError: If the circuit breaker is open
+            LDAPCommunicationError: If the server cannot be reached
+            LDAPException: If the pool is exhausted or the service bind fails
+        """
+        self._check_fork()
+        self.breaker.check()
+        if not self._slots.acquire(timeout=self.acquire_timeout):
+            raise LDAPException("LDAP connection pool exhausted")
+
+        try:
+            now = time.monotonic()
+            while True:
+                with self._lock:
+                    if not self._idle:
+                        break
+                    conn, last_used = self._idle.pop()
+                idle_for = now - last_used
+                if idle_for > self.idle_timeout:
+                    self._close(conn)
+                    continue
+                if idle_for > self.health_check_interval and not self._is_healthy(conn):
+                    self._close(conn)
+                    continue
+                return conn
+
+            conn = self._bind_service_user()
+            if conn is None:
+                raise LDAPException("LDAP service bind failed")
+            return conn
+        except Exception:
+            self._slots.release()
+            raise
+
+    def release(self, conn: Connection, discard: bool = False) -> None:
+        """Return a connection to the pool, or close it if ``discard`` is set."""
+        if discard or conn.closed or not conn.bound or self._pid != os.getpid():
+            self._close(conn)
+        else:
+            with self._lock:
+                self._idle.append((conn, time.monotonic()))
+        self._slots.release()
+        self.evict_idle()
+
+    @contextmanager
+    def connection(self) -> Iterator[Connection]:
+        """Context manager yielding a pooled connection; broken ones are discarded."""
+        conn = self.acquire()
+        discard = True
+        try:
+            yield conn
+            discard = False
+            self.breaker.record_success()
+        except COMMUNICATION_ERRORS:
+            self.breaker.record_failure()
+            raise
+        finally:
+            # Also covers GeneratorExit from abandoned iter_search() generators,
+            # which may leave a paged search half-read on the connection
+            self.release(conn, discard=discard)
+
+    def evict_idle(self) -> None:
+        """Close connections that have been idle longer than ``idle_timeout``."""
+        cutoff = time.monotonic() - self.idle_timeout
+        stale = []
+        with self._lock:
+            # Oldest connections sit at the left end of the deque
+            while self._idle and self._idle[0][1] < cutoff:
+                stale.append(self._idle.popleft()[0])
+        for conn in stale:
+            self._close(conn)
+
+    def close(self) -> None:
+        """Close all idle connections."""
+        with self._lock:
+            idle = [conn for conn, _ in self._idle]
+            self._idle.clear()
+        for conn in idle:
+            self._close(conn)
+
+
+def init_ldap_pool(app: Flask) -> Optional[LDAPConnectionPool]:
+    """Create the LDAP pool for ``app`` and store it in ``app.extensions``."""
+    pool = LDAPConnectionPool.from_config(app.config)
+    app.extensions['ldap_pool'] = pool
+    return pool
+
+
+def get_ldap_pool() -> Optional[LDAPConnectionPool]:
+    """Return the current app's pool, creating it lazily (e.g. for debug scripts)."""
+    app = current_app._get_current_object()
+    if 'ldap_pool' not in app.extensions:
+        with _init_lock:
+            if 'ldap_pool' not in app.extensions:
+                init_ldap_pool(app)
+    return app.extensions['ldap_pool']
@@ -0,0 +1,182 @@
+"""
+Login throttling and "user not found" caching in front of the LDAP path.
+
+A failed login costs the domain controller a search and up to two binds.
+To keep that load bounded when a client hammers ``/auth/login``:
+
+* ``LoginRateLimiter`` keeps token buckets per username and per client IP.
+  Every attempt takes a token from both; a successful login gives the IP
+  token back and resets the username bucket, so only failures count. The
+  per-username burst should stay below the AD lockout threshold so an
+  attacker cannot lock accounts through this application.
+* ``UnknownUserCache`` remembers usernames the directory did not know for
+  a short time, so repeated attempts for them skip LDAP entirely.
+
+Both are per worker process and bounded in size.
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Optional, Tuple
+from flask import Flask, current_app
+
+_init_lock = threading.Lock()
+
+
+class LoginRateLimiter:
+    """
+    Token-bucket limiter for login attempts.
+
+    Attributes:
+        user_burst: Attempts allowed per username before throttling
+        user_interval: Seconds to regain one username attempt
+        ip_burst: Attempts allowed per client IP before throttling
+        ip_interval: Seconds to regain one IP attempt
+        max_entries: Buckets kept per kind (least recently used are dropped)
+    """
+
+    def __init__(self, user_burst: int = 5, user_interval: float = 60.0,
+                 ip_burst: int = 30, ip_interval: float = 2.0, max_entries: int = 10000):
+        self.user_burst = user_burst
+        self.user_interval = user_interval
+        self.ip_burst = ip_burst
+        self.ip_interval = ip_interval
+        self.max_entries = max_entries
+
+        self._users: 'OrderedDict[str, Tuple[float, float]]' = OrderedDict()
+        self._ips: 'OrderedDict[str, Tuple[float, float]]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config) -> 'LoginRateLimiter':
+        return cls(
+            user_burst=config.get('LOGIN_RATE_USER_BURST', 5),
+            user_interval=config.get('LOGIN_RATE_USER_INTERVAL', 60.0),
+            ip_burst=config.get('LOGIN_RATE_IP_BURST', 30),
+            ip_interval=config.get('LOGIN_RATE_IP_INTERVAL', 2.0),
+        )
+
+    @staticmethod
+    def _tokens(buckets, key: str, burst: int, interval: float, now: float) -> float:
+        tokens, updated = buckets.get(key, (burst, now))
+        return min(burst, tokens + (now - updated) / interval)
+
+    def _store(self, buckets, key: str, tokens: float, now: float) -> None:
+        buckets[key] = (tokens, now)
+        buckets.move_to_end(key)
+        while len(buckets) > self.max_entries:
+            buckets.popitem(last=False)
+
+    def acquire(self, username: str, ip: Optional[str]) -> float:
+        """
+        Take one attempt from the username and IP buckets.
+
+        Returns:
+            0 if the attempt may proceed, otherwise seconds until it may be retried
+        """
+        user_key, ip_key = username.lower(), ip or '-'
+        now = time.monotonic()
+        with self._lock:
+            user_tokens = self._tokens(self._users, user_key, self.user_burst, self.user_interval, now)
+            ip_tokens = self._tokens(self._ips, ip_key, self.ip_burst, self.ip_interval, now)
+
+            wait = 0.0
+            if user_tokens < 1:
+                wait = (1 - user_tokens) * self.user_interval
+            if ip_tokens < 1:
+                wait = max(wait, (1 - ip_tokens) * self.ip_interval)
+            if wait:
+                return wait
+
+            self._store(self._users, user_key, user_tokens - 1, now)
+            self._store(self._ips, ip_key, ip_tokens - 1, now)
+            return 0.0
+
+    def record_success(self, username: str, ip: Optional[str]) -> None:
+        """Forget the user's failures and return the attempt's IP token."""
+        now = time.monotonic()
+        with self._lock:
+            self._users.pop(username.lower(), None)
+            ip_key = ip or '-'
+            if ip_key in self._ips:
+                tokens = self._tokens(self._ips, ip_key, self.ip_burst, self.ip_interval, now)
+                self._store(self._ips, ip_key, min(self.ip_burst, tokens + 1), now)
+
+    def refund(self, username: str, ip: Optional[str]) -> None:
+        """Give back the attempt's tokens (the directory could not be asked)."""
+        now = time.monotonic()
+        with self._lock:
+            for buckets, key, burst, interval in (
+                (self._users, username.lower(), self.user_burst, self.user_interval),
+                (self._ips, ip or '-', self.ip_burst, self.ip_interval),
+            ):
+                if key in buckets:
+                    tokens = self._tokens(buckets, key, burst, interval, now)
+                    self._store(buckets, key, min(burst, tokens + 1), now)
+
+
+class UnknownUserCache:
+    """
+    Short-lived set of usernames the directory reported as not found.
+
+    Attributes:
+        ttl: Seconds a "not found" result is trusted
+        max_size: Maximum number of usernames kept
+    """
+
+    def __init__(self, ttl: float = 60.0, max_size: int = 10000):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: 'OrderedDict[str, float]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config) -> 'UnknownUserCache':
+        return cls(ttl=config.get('LDAP_UNKNOWN_USER_CACHE_TTL', 60.0))
+
+    def __contains__(self, username: str) -> bool:
+        if not self.ttl:
+            return False
+        key = username.lower()
+        with self._lock:
+            expires = self._entries.get(key)
+            if expires is None:
+                return False
+            if expires < time.monotonic():
+                del self._entries[key]
+                return False
+            return True
+
+    def add(self, username: str) -> None:
+        if not self.ttl:
+            return
+        with self._lock:
+            self._entries[username.lower()] = time.monotonic() + self.ttl
+            self._entries.move_to_end(username.lower())
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+
+def init_login_guard(app: Flask) -> None:
+    """Create the login limiter and unknown-user cache for ``app``."""
+    app.extensions['login_rate_limiter'] = LoginRateLimiter.from_config(app.config)
+    app.extensions['ldap_unknown_users'] = UnknownUserCache.from_config(app.config)
+
+
+def _get_extension(name: str):
+    app = current_app._get_current_object()
+    if name not in app.extensions:
+        with _init_lock:
+            if name not in app.extensions:
+                init_login_guard(app)
+    return app.extensions[name]
+
+
+def get_login_rate_limiter() -> LoginRateLimiter:
+    """Return the current app's login rate limiter, creating it lazily."""
+    return _get_extension('login_rate_limiter')
+
+
+def get_unknown_user_cache() -> UnknownUserCache:
+    """Return the current app's unknown-user cache, creating it lazily."""
+    return _get_extension('ldap_unknown_users')
@@ -50,3 +50,33 @@ def require_permission(permission_name):
             return f(*args, **kwargs)
         return decorated_function
     return decorator
+
+def require_module_access(module_name):
+    """
+    Decorator for module views: the module must be enabled in its config.json
+    (404 otherwise) and the user needs its ``<module>.access`` permission.
+    
+    Args:
+        module_name (str): The module's name (e.g. 'backup')
+    """
+    def decorator(f):
+        @wraps(f)
+        def decorated_function(*args, **kwargs):
+            from utils.module_registry import get_module_index
+
+            module = get_module_index().get(module_name)
+            if module is None or not module.enabled:
+                abort(404)
+            if not current_user.is_authenticated:
+                return redirect(url_for('auth.login'))
+            
+            if current_user.has_role('admin'):
+                return f(*args, **kwargs)
+                
+            if not current_user.has_permission(f"{module_name}.access"):
+                flash(f'Permission denied: {module_name}.access required.', 'danger')
+                return redirect(url_for('main.index'))
+                
+            return f(*args, **kwargs)
+        return decorated_function
+    return decorator
@@ -0,0 +1,220 @@
+"""
+Effective role and permission resolution for users.
+
+A user's role and permission names are resolved into frozensets and cached
+at two levels:
+
+* per request on ``flask.g``, so the sidebar, decorators and templates can
+  call ``has_role``/``has_permission`` as often as they like;
+* per worker process in an LRU keyed by user id and stamped with the
+  shared RBAC version (``rbac_version`` table), so steady-state requests
+  do not query roles or permissions at all.
+
+Every RBAC mutation calls ``invalidate_access()``, which bumps the shared
+version. Other workers notice the new version within
+``RBAC_VERSION_CHECK_INTERVAL`` seconds and drop their stale entries.
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import FrozenSet, NamedTuple, Optional, Tuple
+from flask import Flask, current_app, g, has_app_context
+from sqlalchemy import select, update
+from extensions import db
+
+logger = logging.getLogger(__name__)
+
+_G_KEY = '_rbac_access'
+_init_lock = threading.Lock()
+
+
+class EffectiveAccess(NamedTuple):
+    """
+    Role and permission names granted to a user, and whether the account
+    is active (changing ``User.is_active`` must call ``invalidate_access``).
+    """
+    roles: FrozenSet[str]
+    permissions: FrozenSet[str]
+    active: bool = True
+
+
+class AccessCache:
+    """
+    Process-wide LRU of effective access, validated against a shared version.
+
+    Attributes:
+        max_size: Maximum number of users kept in the LRU
+        version_check_interval: Seconds a fetched version is trusted before
+            the ``rbac_version`` row is read again
+    """
+
+    def __init__(self, max_size: int = 1024, version_check_interval: float = 2.0):
+        self.max_size = max_size
+        self.version_check_interval = version_check_interval
+
+        self._entries: 'OrderedDict[int, Tuple[int, EffectiveAccess]]' = OrderedDict()
+        self._version: Optional[int] = None
+        self._version_checked_at = 0.0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config) -> 'AccessCache':
+        return cls(
+            max_size=config.get('RBAC_CACHE_SIZE', 1024),
+            version_check_interval=config.get('RBAC_VERSION_CHECK_INTERVAL', 2.0),
+        )
+
+    def current_version(self) -> Optional[int]:
+        """Return the shared RBAC version, re-reading it at most once per interval."""
+        now = time.monotonic()
+        if self._version is not None and now - self._version_checked_at < self.version_check_interval:
+            return self._version
+
+        # Imported here: models.user imports this module
+        from models.rbac import RBACVersion
+        try:
+            # Own connection, not db.session: a failed read must not roll back
+            # the caller's pending changes (e.g. a user added during login)
+            with db.engine.connect() as connection:
+                version = connection.execute(
+                    select(RBACVersion.version).where(RBACVersion.id == 1)
+                ).scalar()
+        except Exception as e:
+            # Table missing (migration not applied): fall back to per-request caching
+            logger.warning(f"RBAC version unavailable, cross-request cache disabled: {e}")
+            return None
+
+        version = version or 0
+        with self._lock:
+            if version != self._version:
+                self._entries.clear()
+            self._version = version
+            self._version_checked_at = now
+        return version
+
+    def get(self, user_id: int, version: int) -> Optional[EffectiveAccess]:
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None or entry[0] != version:
+                return None
+            self._entries.move_to_end(user_id)
+            return entry[1]
+
+    def put(self, user_id: int, version: int, access: EffectiveAccess) -> None:
+        with self._lock:
+            self._entries[user_id] = (version, access)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def bump_version(self) -> None:
+        """Increment the shared version and forget all local entries."""
+        with self._lock:
+            self._entries.clear()
+            self._version = None
+
+        from models.rbac import RBACVersion
+        try:
+            result = db.session.execute(
+                update(RBACVersion).where(RBACVersion.id == 1)
+                .values(version=RBACVersion.version + 1)
+            )
+            if result.rowcount == 0:
+                db.session.add(RBACVersion(id=1, version=1))
+            db.session.commit()
+        except Exception as e:
+            db.session.rollback()
+            logger.error(f"Failed to bump RBAC version: {e}")
+
+
+def init_access_cache(app: Flask) -> AccessCache:
+    """Create the access cache for ``app`` and store it in ``app.extensions``."""
+    cache = AccessCache.from_config(app.config)
+    app.extensions['rbac_access_cache'] = cache
+    return cache
+
+
+def get_access_cache() -> AccessCache:
+    """Return the current app's access cache, creating it lazily."""
+    app = current_app._get_current_object()
+    if 'rbac_access_cache' not in app.extensions:
+        with _init_lock:
+            if 'rbac_access_cache' not in app.extensions:
+                init_access_cache(app)
+    return app.extensions['rbac_access_cache']
+
+
+def compute_access(user) -> EffectiveAccess:
+    """Resolve a user's role and permission names (two queries at most)."""
+    from models.rbac import Permission, role_permissions
+
+    roles = user.roles
+    role_ids = [r.id for r in roles if r.id is not None]
+    permissions = []
+    if role_ids:
+        permissions = db.session.execute(
+            select(Permission.name)
+            .join(role_permissions, role_permissions.c.permission_id == Permission.id)
+            .where(role_permissions.c.role_id.in_(role_ids))
+        ).scalars()
+    return EffectiveAccess(
+        roles=frozenset(r.name for r in roles),
+        permissions=frozenset(permissions),
+        active=user.is_active is not False,
+    )
+
+
+def get_effective_access(user) -> EffectiveAccess:
+    """Return the user's effective access from the request or process cache."""
+    if not has_app_context():
+        return compute_access(user)
+
+    request_cache = g.setdefault(_G_KEY, {})
+    access = request_cache.get(user.id)
+    if access is not None:
+        return access
+
+    cache = get_access_cache()
+    version = cache.current_version()
+    if version is not None:
+        access = cache.get(user.id, version)
+    if access is None:
+        access = compute_access(user)
+        if version is not None:
+            cache.put(user.id, version, access)
+
+    request_cache[user.id] = access
+    return access
+
+
+def get_cached_access(user_id: int) -> Optional[EffectiveAccess]:
+    """Process-cached access of ``user_id`` without loading the user (None on a miss)."""
+    cache = get_access_cache()
+    version = cache.current_version()
+    if version is None:
+        return None
+    return cache.get(user_id, version)
+
+
+def invalidate_access(user_id: Optional[int] = None) -> None:
+    """
+    Drop cached access after an RBAC change and notify other workers.
+
+    Call after the change has been committed.
+
+    Args:
+        user_id: Only forget this user for the current request; the
+            shared version is bumped either way
+    """
+    if not has_app_context():
+        return
+
+    request_cache = g.get(_G_KEY)
+    if request_cache:
+        if user_id is None:
+            request_cache.clear()
+        else:
+            request_cache.pop(user_id, None)
+
+    get_access_cache().bump_version()
@@ -0,0 +1,343 @@
+"""
+LDAP group -> role synchronization.
+
+Roles added from an LDAP group (``Role.ldap_group``) are granted to exactly
+the members of that group, and members of ``LDAP_ADMIN_GROUPS`` get the
+``admin`` role. Admin is only ever granted automatically, never revoked,
+and roles without ``ldap_group`` are left alone.
+
+* At login, ``GroupRoleMap`` (held per worker and rebuilt when the shared
+  RBAC version changes) turns the user's ``memberOf`` groups into role ids
+  without touching the roles table, and ``apply_role_diff`` updates that
+  user's LDAP-managed roles with a constant number of queries.
+* ``RoleSyncEngine.run()`` does the same for every local user from one
+  paged directory search, applying the differences in batches. It runs
+  from ``flask sync-ldap-roles`` (cron) or the group-permissions page.
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from typing import Dict, FrozenSet, Iterable, Optional, Set, Tuple
+from flask import Flask, current_app
+from sqlalchemy import delete, insert, select, tuple_
+from extensions import db
+from auth.rbac_cache import get_access_cache, invalidate_access
+
+logger = logging.getLogger(__name__)
+
+_init_lock = threading.Lock()
+
+
+@dataclass(frozen=True)
+class GroupRoleMap:
+    """
+    Lookup from LDAP group CN (case-insensitive) to role ids.
+
+    Attributes:
+        by_group: Lower-cased group CN -> ids of the roles it grants
+        managed_ids: Role ids fully owned by LDAP (granted and revoked)
+        admin_role_id: Id of the ``admin`` role, granted but never revoked
+    """
+    by_group: Dict[str, FrozenSet[int]]
+    managed_ids: FrozenSet[int]
+    admin_role_id: Optional[int] = None
+
+    @classmethod
+    def load(cls, admin_groups: Iterable[str]) -> 'GroupRoleMap':
+        """Build the map with one query on the roles table."""
+        from models.rbac import Role
+
+        rows = db.session.execute(
+            select(Role.id, Role.name, Role.ldap_group)
+            .where((Role.ldap_group.isnot(None)) | (Role.name == 'admin'))
+        ).all()
+
+        by_group: Dict[str, Set[int]] = {}
+        managed, admin_role_id = set(), None
+        for role_id, name, ldap_group in rows:
+            if name == 'admin':
+                admin_role_id = role_id
+                continue
+            by_group.setdefault(ldap_group.lower(), set()).add(role_id)
+            managed.add(role_id)
+
+        if admin_role_id is not None:
+            for group in admin_groups:
+                by_group.setdefault(group.lower(), set()).add(admin_role_id)
+
+        return cls(
+            by_group={k: frozenset(v) for k, v in by_group.items()},
+            managed_ids=frozenset(managed),
+            admin_role_id=admin_role_id,
+        )
+
+    @property
+    def is_empty(self) -> bool:
+        return not self.by_group
+
+    def role_ids_for(self, groups: Iterable[str]) -> Set[int]:
+        """Role ids granted by membership in ``groups``."""
+        role_ids: Set[int] = set()
+        for group in groups:
+            role_ids.update(self.by_group.get(group.lower(), ()))
+        return role_ids
+
+
+class GroupRoleMapCache:
+    """Per-worker ``GroupRoleMap``, rebuilt when the shared RBAC version changes."""
+
+    def __init__(self, admin_groups: Iterable[str] = ('Domain Admins',)):
+        self.admin_groups = tuple(admin_groups)
+        self._map: Optional[GroupRoleMap] = None
+        self._version: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def get(self) -> GroupRoleMap:
+        version = get_access_cache().current_version()
+        role_map = self._map
+        if role_map is not None and version is not None and version == self._version:
+            return role_map
+
+        role_map = GroupRoleMap.load(self.admin_groups)
+        with self._lock:
+            self._map = role_map
+            self._version = version
+        return role_map
+
+
+def get_group_role_map() -> GroupRoleMap:
+    """Return the current group -> role map for this app."""
+    app = current_app._get_current_object()
+    if 'ldap_group_role_map' not in app.extensions:
+        with _init_lock:
+            if 'ldap_group_role_map' not in app.extensions:
+                app.extensions['ldap_group_role_map'] = GroupRoleMapCache(
+                    app.config.get('LDAP_ADMIN_GROUPS', ['Domain Admins'])
+                )
+    return app.extensions['ldap_group_role_map'].get()
+
+
+def apply_role_diff(desired: Dict[int, Set[int]], role_map: GroupRoleMap,
+                    remove: bool = True) -> Tuple[int, int]:
+    """
+    Make the LDAP-managed roles of the given users match ``desired``.
+
+    Reads the users' current managed assignments with one query and
+    applies the difference with one bulk INSERT and one DELETE. Does not
+    commit.
+
+    Args:
+        desired: User id -> role ids the user should hold (from ``role_ids_for``)
+        role_map: Map that produced ``desired``
+        remove: Also revoke managed roles the user no longer qualifies for
+
+    Returns:
+        (added, removed) assignment counts
+    """
+    from models.rbac import user_roles
+
+    candidate_ids = set(role_map.managed_ids)
+    if role_map.admin_role_id is not None:
+        candidate_ids.add(role_map.admin_role_id)
+    if not desired or not candidate_ids:
+        return 0, 0
+
+    existing = set(db.session.execute(
+        select(user_roles.c.user_id, user_roles.c.role_id).where(
+            user_roles.c.user_id.in_(list(desired)),
+            user_roles.c.role_id.in_(candidate_ids)
+        )
+    ).all())
+
+    to_add = [
+        (user_id, role_id)
+        for user_id, role_ids in desired.items()
+        for role_id in role_ids
+        if (user_id, role_id) not in existing
+    ]
+    to_remove = []
+    if remove:
+        to_remove = [
+            (user_id, role_id) for user_id, role_id in existing
+            if role_id in role_map.managed_ids and role_id not in desired.get(user_id, ())
+        ]
+
+    if to_add:
+        db.session.execute(insert(user_roles), [
+            {'user_id': user_id, 'role_id': role_id} for user_id, role_id in to_add
+        ])
+    if to_remove:
+        db.session.execute(delete(user_roles).where(
+            tuple_(user_roles.c.user_id, user_roles.c.role_id).in_(to_remove)
+        ))
+    return len(to_add), len(to_remove)
+
+
+def sync_user_roles(user_id: int, groups: Iterable[str]) -> bool:
+    """
+    Update one user's LDAP-managed roles from their group CNs (login path).
+
+    Returns:
+        True if any assignment changed (the caller commits and invalidates)
+    """
+    role_map = get_group_role_map()
+    if role_map.is_empty:
+        return False
+    remove = current_app.config.get('LDAP_ROLE_SYNC_REMOVE', True)
+    added, removed = apply_role_diff({user_id: role_map.role_ids_for(groups)}, role_map, remove)
+    return bool(added or removed)
+
+
+@dataclass
+class RoleSyncResult:
+    """Summary of one ``RoleSyncEngine.run()``."""
+    directory_users: int = 0
+    local_users: int = 0
+    added: int = 0
+    removed: int = 0
+    duration: float = 0.0
+
+
+class RoleSyncEngine:
+    """
+    Bulk group -> role synchronization for all local users.
+
+    Attributes:
+        batch_size: Local users diffed and committed per transaction
+        remove_stale: Revoke LDAP-managed roles from users no longer in the group
+    """
+
+    def __init__(self, batch_size: int = 500, remove_stale: bool = True):
+        self.batch_size = batch_size
+        self.remove_stale = remove_stale
+        self.last_result: Optional[RoleSyncResult] = None
+        self._run_lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config) -> 'RoleSyncEngine':
+        return cls(
+            batch_size=config.get('LDAP_ROLE_SYNC_BATCH_SIZE', 500),
+            remove_stale=config.get('LDAP_ROLE_SYNC_REMOVE', True),
+        )
+
+    @property
+    def is_running(self) -> bool:
+        return self._run_lock.locked()
+
+    def run(self, connector=None) -> Optional[RoleSyncResult]:
+        """
+        Synchronize every local user's LDAP-managed roles.
+
+        The directory is read completely before anything is written, so a
+        failed search never revokes roles.
+
+        Args:
+            connector: LDAPConnector to use (a new one by default)
+
+        Returns:
+            Result summary, or None if the sync was skipped or failed
+        """
+        from auth.ldap_connector import LDAPConnector
+        from models.user import User
+
+        if not self._run_lock.acquire(blocking=False):
+            logger.info("Role sync already running, skipped.")
+            return None
+        try:
+            started = time.monotonic()
+            ldap = connector or LDAPConnector()
+            if ldap.is_dev:
+                logger.info("Role sync skipped in development mode.")
+                return None
+
+            role_map = get_group_role_map()
+            if role_map.is_empty:
+                return RoleSyncResult()
+
+            result = RoleSyncResult()
+            memberships: Dict[str, Set[int]] = {}
+            try:
+                for username, groups in ldap.iter_user_groups():
+                    result.directory_users += 1
+                    role_ids = role_map.role_ids_for(groups)
+                    if role_ids:
+                        memberships[username.lower()] = role_ids
+            except Exception as e:
+                logger.error(f"Role sync aborted, directory search failed: {e}")
+                return None
+
+            # Walk local users in id order, one transaction per batch
+            last_id = 0
+            while True:
+                batch = db.session.execute(
+                    select(User.id, User.username).where(User.id > last_id)
+                    .order_by(User.id).limit(self.batch_size)
+                ).all()
+                if not batch:
+                    break
+                last_id = batch[-1].id
+                result.local_users += len(batch)
+
+                desired = {
+                    user_id: memberships.get(username.lower(), set())
+                    for user_id, username in batch
+                }
+                added, removed = apply_role_diff(desired, role_map, self.remove_stale)
+                db.session.commit()
+                result.added += added
+                result.removed += removed
+
+            if result.added or result.removed:
+                invalidate_access()
+
+            result.duration = time.monotonic() - started
+            logger.info(
+                f"Role sync: {result.directory_users} directory user(s), "
+                f"{result.local_users} local user(s), +{result.added}/-{result.removed} "
+                f"assignment(s) in {result.duration:.2f}s."
+            )
+            self.last_result = result
+            return result
+        except Exception:
+            db.session.rollback()
+            raise
+        finally:
+            self._run_lock.release()
+
+    def start_background(self, app: Flask) -> bool:
+        """
+        Run ``run()`` in a daemon thread.
+
+        Returns:
+            False if a sync is already running
+        """
+        if self.is_running:
+            return False
+
+        def run():
+            with app.app_context():
+                try:
+                    self.run()
+                except Exception as e:
+                    logger.error(f"Background role sync failed: {e}")
+
+        threading.Thread(target=run, name='ldap-role-sync', daemon=True).start()
+        return True
+
+
+def init_role_sync(app: Flask) -> RoleSyncEngine:
+    """Create the role sync engine for ``app`` and store it in ``app.extensions``."""
+    engine = RoleSyncEngine.from_config(app.config)
+    app.extensions['ldap_role_sync'] = engine
+    return engine
+
+
+def get_role_sync() -> RoleSyncEngine:
+    """Return the current app's role sync engine, creating it lazily."""
+    app = current_app._get_current_object()
+    if 'ldap_role_sync' not in app.extensions:
+        with _init_lock:
+            if 'ldap_role_sync' not in app.extensions:
+                init_role_sync(app)
+    return app.extensions['ldap_role_sync']
@@ -1,14 +1,18 @@
 """
 Authentication routes (login, logout).
 """
+import math
 from datetime import datetime
-from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app
+from flask import Blueprint, render_template, request, redirect, url_for, flash, current_app, make_response
 from flask_login import login_user, logout_user, login_required, current_user
 from extensions import db
 from models.user import User
-from models.rbac import Role
 from auth.ldap_connector import LDAPConnector
+from auth.circuit_breaker import LDAPUnavailableError
 from auth.decorators import logout_required
+from auth.login_guard import get_login_rate_limiter
+from auth.rbac_cache import invalidate_access
+from auth.role_sync import sync_user_roles
 from utils.translation import get_text
 
 auth_bp = Blueprint('auth', __name__)
@@ -32,11 +36,27 @@ def login():
             flash(get_text('messages.error_save'), 'danger')
             return render_template('auth/login.html')
 
+        # Throttle failed attempts per username and client IP before LDAP
+        limiter = get_login_rate_limiter()
+        retry_after = limiter.acquire(username, request.remote_addr)
+        if retry_after:
+            flash(get_text('auth.too_many_attempts'), 'danger')
+            response = make_response(render_template('auth/login.html'), 429)
+            response.headers['Retry-After'] = str(math.ceil(retry_after))
+            return response
+
         ldap = LDAPConnector()
-        # Authenticate against LDAP
-        if ldap.authenticate(username, password):
+        # Authenticate against LDAP and fetch the profile in one pass
+        try:
+            user_info = ldap.authenticate_and_fetch(username, password)
+        except LDAPUnavailableError:
+            # Not the user's fault: don't count the attempt
+            limiter.refund(username, request.remote_addr)
+            flash(get_text('auth.directory_unavailable'), 'danger')
+            return render_template('auth/login.html'), 503
+        if user_info is not None:
+            limiter.record_success(username, request.remote_addr)
             # Auth success
-            user_info = ldap.get_user_info(username)
             user = User.query.filter_by(username=username).first()
             
             if not user:
@@ -47,24 +67,17 @@ def login():
             if user_info:
                 user.display_name = user_info.get('display_name')
                 user.email = user_info.get('email')
-                
-                # Sync Roles based on Groups
-                groups = user_info.get('groups', [])
-                admin_role = Role.query.filter_by(name='admin').first()
-                
-                if admin_role:
-                    if 'Domain Admins' in groups:
-                        if admin_role not in user.roles:
-                            user.roles.append(admin_role)
-                            # flash('Admin access granted.', 'info')
-                    # Optional: Remove admin role if removed from group?
-                    # else:
-                    #     if admin_role in user.roles:
-                    #         user.roles.remove(admin_role)
+            
+            # Sync LDAP-backed roles from group membership (in-memory map)
+            db.session.flush()
+            roles_changed = sync_user_roles(user.id, user_info.get('groups', []))
             
             user.last_login = datetime.utcnow()
+            reactivated = user.is_active is False
             user.is_active = True
             db.session.commit()
+            if roles_changed or reactivated:
+                invalidate_access(user.id)
             
             login_user(user)
             flash(get_text('auth.login_success'), 'success')
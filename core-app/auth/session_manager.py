@@ -13,8 +13,12 @@ def load_user(user_id):
         user_id (str): User ID from session
         
     Returns:
-        User: User instance or None
+        User: User instance or None (also for deactivated users, whose
+        sessions are treated as logged out)
     """
     if user_id is not None:
-        return User.query.get(int(user_id))
+        # Roles load lazily, only on an RBAC cache miss (see auth.rbac_cache)
+        user = User.query.get(int(user_id))
+        if user is not None and user.is_active:
+            return user
     return None
@@ -0,0 +1,3 @@
+"""
+Benchmarks for the Indigo Admin Panel (run from core-app/).
+"""
@@ -0,0 +1,34 @@
+"""
+pytest-benchmark suite for the main pages (see conftest.py for usage).
+"""
+from benchmarks.seed import login_form, photo_url
+
+
+def test_login(benchmark, bench_app):
+    def login():
+        return bench_app.test_client().post('/auth/login', data=login_form('user1'))
+
+    assert benchmark(login).status_code == 302
+
+
+def test_dashboard(benchmark, admin_client):
+    assert benchmark(admin_client.get, '/').status_code == 200
+
+
+def test_admin_users(benchmark, admin_client):
+    assert benchmark(admin_client.get, '/admin/users').status_code == 200
+
+
+def test_admin_group_permissions(benchmark, admin_client):
+    assert benchmark(admin_client.get, '/admin/group-permissions').status_code == 200
+
+
+def test_profile_photo(benchmark, bench_app, admin_client):
+    assert benchmark(admin_client.get, photo_url(bench_app, size=64)).status_code == 200
+
+
+def test_profile_photo_revalidate(benchmark, bench_app, admin_client):
+    url = photo_url(bench_app, size=64)
+    etag = admin_client.get(url).headers['ETag']
+    response = benchmark(admin_client.get, url, headers={'If-None-Match': etag})
+    assert response.status_code == 304
@@ -0,0 +1,24 @@
+"""
+Fixtures for the benchmark suite.
+
+``test_*.py`` modules (budgets and checks) run with a plain ``pytest``. The ``bench_*.py`` timing benchmarks need pytest-benchmark
+and are run explicitly:
+    pytest benchmarks/bench_pages.py --benchmark-columns=median,mean,max,ops
+"""
+import os
+import pytest
+
+os.environ.setdefault('SECRET_KEY', 'benchmarks')  # read by config.py at import
+
+from benchmarks.seed import SeedSizes, create_benchmark_app, login_client
+
+
+@pytest.fixture(scope='session')
+def bench_app():
+    # No app context is held open: each request must get its own flask.g
+    return create_benchmark_app(SeedSizes())
+
+
+@pytest.fixture(scope='session')
+def admin_client(bench_app):
+    return login_client(bench_app, user_id=1)
@@ -0,0 +1,82 @@
+"""
+Minimal HTTP load generator (stdlib only) for comparing server setups.
+
+Each client thread keeps one HTTP/1.1 connection open and issues GET
+requests back to back for the given duration.
+
+Usage (from core-app/):
+    python -m benchmarks.http_load http://127.0.0.1:5000/health --clients 16 --seconds 10
+"""
+import argparse
+import http.client
+import statistics
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+def worker(url, deadline, latencies, errors, lock):
+    parts = urlsplit(url)
+    path = parts.path or '/'
+    if parts.query:
+        path += '?' + parts.query
+    conn = http.client.HTTPConnection(parts.hostname, parts.port or 80, timeout=30)
+    local, failed = [], 0
+    while time.perf_counter() < deadline:
+        start = time.perf_counter()
+        try:
+            conn.request('GET', path)
+            response = conn.getresponse()
+            response.read()
+            if response.status >= 500:
+                failed += 1
+            if response.getheader('Connection', '').lower() == 'close':
+                conn.close()
+        except (OSError, http.client.HTTPException):
+            failed += 1
+            conn.close()
+            continue
+        local.append(time.perf_counter() - start)
+    conn.close()
+    with lock:
+        latencies.extend(local)
+        errors.append(failed)
+
+
+def run(url: str, clients: int, seconds: float) -> dict:
+    latencies, errors, lock = [], [], threading.Lock()
+    deadline = time.perf_counter() + seconds
+    threads = [
+        threading.Thread(target=worker, args=(url, deadline, latencies, errors, lock))
+        for _ in range(clients)
+    ]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    latencies.sort()
+    count = len(latencies)
+    return {
+        'requests': count,
+        'errors': sum(errors),
+        'rps': count / seconds,
+        'p50_ms': statistics.median(latencies) * 1000 if count else 0.0,
+        'p99_ms': latencies[min(count - 1, int(count * 0.99))] * 1000 if count else 0.0,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('url')
+    parser.add_argument('--clients', type=int, default=16)
+    parser.add_argument('--seconds', type=float, default=10)
+    args = parser.parse_args()
+
+    r = run(args.url, args.clients, args.seconds)
+    print(f"{r['requests']} requests, {r['errors']} errors, {r['rps']:.1f} req/s, "
+          f"p50 {r['p50_ms']:.1f} ms, p99 {r['p99_ms']:.1f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""
+Benchmark LDAP round trips and latency per login.
+
+Compares the legacy two-step flow (``authenticate`` + ``get_user_info``)
+with ``authenticate_and_fetch`` against an in-process MOCK_SYNC directory.
+
+Usage (from core-app/):
+    SECRET_KEY=dev python -m benchmarks.ldap_login --logins 200 --rtt-ms 2
+"""
+import argparse
+import statistics
+import time
+from flask import Flask
+from config import get_config
+from auth.ldap_connector import LDAPConnector
+from benchmarks.mock_ldap import RoundTripCounter, build_mock_pool, configure_app, USER_PASSWORD
+
+
+def legacy_login(ldap: LDAPConnector, username: str):
+    if ldap.authenticate(username, USER_PASSWORD):
+        return ldap.get_user_info(username)
+    return None
+
+
+def combined_login(ldap: LDAPConnector, username: str):
+    return ldap.authenticate_and_fetch(username, USER_PASSWORD)
+
+
+def run(flow, app, counter: RoundTripCounter, logins: int, num_users: int) -> dict:
+    latencies = []
+    with app.app_context():
+        ldap = LDAPConnector()
+        # Warm the pool and group graph so one-off LDAP work is not attributed to a login
+        flow(ldap, 'user0')
+        counter.reset()
+        for i in range(logins):
+            start = time.perf_counter()
+            profile = flow(ldap, f'user{i % num_users}')
+            latencies.append((time.perf_counter() - start) * 1000)
+            assert profile is not None, 'mock login failed'
+    latencies.sort()
+    return {
+        'round_trips': counter.total / logins,
+        'searches': counter.counts['search'] / logins,
+        'binds': counter.counts['bind'] / logins,
+        'p50_ms': statistics.median(latencies),
+        'p99_ms': latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--logins', type=int, default=200)
+    parser.add_argument('--users', type=int, default=50)
+    parser.add_argument('--rtt-ms', type=float, default=1.0,
+                        help='simulated network round-trip time per LDAP operation')
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config.from_object(get_config('testing'))
+    configure_app(app, build_mock_pool(num_users=args.users))
+
+    print(f"{'flow':<10} {'round trips':>12} {'searches':>9} {'binds':>6} {'p50 ms':>8} {'p99 ms':>8}")
+    for name, flow in (('legacy', legacy_login), ('combined', combined_login)):
+        with RoundTripCounter(rtt_ms=args.rtt_ms) as counter:
+            r = run(flow, app, counter, args.logins, args.users)
+        print(f"{name:<10} {r['round_trips']:>12.2f} {r['searches']:>9.2f} {r['binds']:>6.2f} "
+              f"{r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,47 @@
+"""
+Locust scenario against a running deployment (nginx or gunicorn).
+
+Requires real LDAP test accounts; set BENCH_USERNAME/BENCH_PASSWORD
+(an account with the admin role) before starting:
+
+    BENCH_USERNAME=teacher1 BENCH_PASSWORD=... \
+        locust -f benchmarks/locustfile.py --host http://localhost:8080
+"""
+import os
+from locust import HttpUser, between, task
+
+USERNAME = os.getenv('BENCH_USERNAME', 'admin')
+PASSWORD = os.getenv('BENCH_PASSWORD', 'admin')
+PHOTO_USER_ID = int(os.getenv('BENCH_PHOTO_USER_ID', '1'))
+
+
+class AdminPanelUser(HttpUser):
+    wait_time = between(0.5, 2)
+
+    def on_start(self):
+        self.login()
+
+    def login(self):
+        self.client.post('/auth/login', data={'username': USERNAME, 'password': PASSWORD},
+                         name='/auth/login')
+
+    @task(10)
+    def dashboard(self):
+        self.client.get('/', name='/')
+
+    @task(3)
+    def admin_users(self):
+        self.client.get('/admin/users', name='/admin/users')
+
+    @task(2)
+    def group_permissions(self):
+        self.client.get('/admin/group-permissions', name='/admin/group-permissions')
+
+    @task(10)
+    def profile_photo(self):
+        self.client.get(f'/profile/photo/{PHOTO_USER_ID}', name='/profile/photo/<id>')
+
+    @task(1)
+    def relogin(self):
+        self.client.get('/auth/logout', name='/auth/logout')
+        self.login()
@@ -0,0 +1,72 @@
+"""
+Measure directory load while ``/auth/login`` is hammered with bad credentials.
+
+Runs the same attack against the MOCK_SYNC directory twice:
+
+* guarded: default settings (login throttling, unknown-user cache and the
+  learned per-domain bind method);
+* unguarded: throttling and the unknown-user cache disabled, and the
+  learned bind method forgotten before every attempt (previous behaviour).
+
+Every attempt comes from one client IP and alternates between a wrong
+password for an existing account and a rotating set of unknown usernames.
+
+Note: MOCK_SYNC accepts any NTLM bind, so the unguarded run's NTLM fallback
+"logs in" with the wrong password; only the operation counts are meaningful.
+
+Usage (from core-app/):
+    SECRET_KEY=dev python -m benchmarks.login_attack --attempts 200
+"""
+import argparse
+from collections import Counter
+from auth.login_guard import init_login_guard
+from benchmarks.mock_ldap import RoundTripCounter
+from benchmarks.seed import SeedSizes, create_benchmark_app, login_form
+
+
+def run(guarded: bool, attempts: int) -> dict:
+    app = create_benchmark_app(SeedSizes(users=20, roles=3, modules=2, groups=3))
+    if not guarded:
+        app.config.update(LOGIN_RATE_USER_BURST=10 ** 9, LOGIN_RATE_IP_BURST=10 ** 9,
+                          LDAP_UNKNOWN_USER_CACHE_TTL=0)
+        init_login_guard(app)
+    pool = app.extensions['ldap_pool']
+
+    # One real login warms the pool and group graph and teaches the bind method
+    app.test_client().post('/auth/login', data=login_form('user1'))
+
+    statuses = Counter()
+    with RoundTripCounter() as counter:
+        for i in range(attempts):
+            if not guarded:
+                pool.user_bind_methods.clear()
+            username = 'user2' if i % 2 == 0 else f'intruder{i % 10}'
+            # A fresh client per attempt: no session carries over
+            response = app.test_client().post(
+                '/auth/login', data={'username': username, 'password': 'wrong-password'}
+            )
+            statuses[response.status_code] += 1
+
+    return {
+        'operations': counter.total,
+        'per_attempt': counter.total / attempts,
+        'searches': counter.counts['search'],
+        'binds': counter.counts['bind'],
+        'throttled': statuses[429],
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--attempts', type=int, default=200)
+    args = parser.parse_args()
+
+    print(f"{'mode':<10} {'LDAP ops':>9} {'per attempt':>12} {'searches':>9} {'binds':>6} {'throttled':>10}")
+    for name, guarded in (('unguarded', False), ('guarded', True)):
+        r = run(guarded, args.attempts)
+        print(f"{name:<10} {r['operations']:>9} {r['per_attempt']:>12.2f} {r['searches']:>9} "
+              f"{r['binds']:>6} {r['throttled']:>10}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+"""
+In-process stand-in for the Active Directory server used by benchmarks.
+
+Builds an ``LDAPConnectionPool`` on ldap3's MOCK_SYNC strategy, seeds it
+with a service account, users and groups, and counts LDAP operations
+(optionally adding a simulated network round-trip time to each one).
+
+Note: MOCK_SYNC only verifies SIMPLE binds; NTLM binds always succeed, so
+the mock is not suitable for measuring wrong-password behaviour.
+"""
+import threading
+import time
+from typing import Callable, Dict, Iterable, Optional
+from ldap3 import Connection, MOCK_SYNC
+from auth.ldap_pool import LDAPConnectionPool
+
+BASE_DN = 'dc=school,dc=local'
+USERS_DN = f'cn=Users,{BASE_DN}'
+SERVICE_DN = f'cn=svc-indigo,{USERS_DN}'
+SERVICE_PASSWORD = 'service-secret'
+USER_PASSWORD = 'pupil-secret'
+
+
+class RoundTripCounter:
+    """Counts LDAP operations on all ldap3 connections while installed."""
+
+    OPERATIONS = ('bind', 'search', 'unbind')
+
+    def __init__(self, rtt_ms: float = 0.0):
+        self.rtt = rtt_ms / 1000.0
+        self.counts: Dict[str, int] = {op: 0 for op in self.OPERATIONS}
+        self._originals = {}
+        self._lock = threading.Lock()
+
+    @property
+    def total(self) -> int:
+        return sum(self.counts.values())
+
+    def reset(self) -> None:
+        with self._lock:
+            for op in self.counts:
+                self.counts[op] = 0
+
+    def _wrap(self, op, original):
+        counter = self
+
+        def wrapper(conn, *args, **kwargs):
+            with counter._lock:
+                counter.counts[op] += 1
+            if counter.rtt:
+                time.sleep(counter.rtt)
+            return original(conn, *args, **kwargs)
+        return wrapper
+
+    def __enter__(self):
+        for op in self.OPERATIONS:
+            original = getattr(Connection, op)
+            self._originals[op] = original
+            setattr(Connection, op, self._wrap(op, original))
+        return self
+
+    def __exit__(self, *exc):
+        for op, original in self._originals.items():
+            setattr(Connection, op, original)
+        self._originals.clear()
+
+
+def user_dn(username: str) -> str:
+    return f'cn={username},{USERS_DN}'
+
+
+def group_dn(cn: str) -> str:
+    return f'cn={cn},{USERS_DN}'
+
+
+def build_mock_pool(num_users: int = 10, groups: Iterable[str] = ('Teachers', 'Students'),
+                    max_size: int = 5,
+                    member_of: Optional[Callable[[int], Iterable[str]]] = None) -> LDAPConnectionPool:
+    """
+    Create a pool backed by a seeded MOCK_SYNC directory.
+
+    Users are named ``user0`` .. ``user<N-1>`` with password ``USER_PASSWORD``.
+    ``member_of(i)`` returns the group CNs of ``user<i>``; by default every
+    user is a member of every group in ``groups``.
+    """
+    pool = LDAPConnectionPool(
+        server_uri='ldap://mock-dc',
+        bind_dn=SERVICE_DN,
+        bind_password=SERVICE_PASSWORD,
+        max_size=max_size,
+        client_strategy=MOCK_SYNC
+    )
+    seed = Connection(pool.server, user=SERVICE_DN, password=SERVICE_PASSWORD,
+                      client_strategy=MOCK_SYNC)
+    seed.strategy.add_entry(SERVICE_DN, {
+        'objectClass': ['top', 'person'],
+        'cn': 'svc-indigo',
+        'userPassword': SERVICE_PASSWORD,
+    })
+
+    usernames = [f'user{i}' for i in range(num_users)]
+    groups = list(groups)
+    memberships = {
+        username: list(member_of(i)) if member_of else groups
+        for i, username in enumerate(usernames)
+    }
+    for cn in groups + sorted({g for gs in memberships.values() for g in gs} - set(groups)):
+        seed.strategy.add_entry(group_dn(cn), {
+            'objectClass': ['top', 'group'],
+            'cn': cn,
+            'distinguishedName': group_dn(cn),
+            'member': [user_dn(u) for u in usernames if cn in memberships[u]],
+        })
+    for username in usernames:
+        seed.strategy.add_entry(user_dn(username), {
+            'objectClass': ['top', 'person', 'user'],
+            'cn': username,
+            'sAMAccountName': username,
+            'distinguishedName': user_dn(username),
+            'displayName': f'Pupil {username}',
+            'mail': f'{username}@school.local',
+            'memberOf': [group_dn(cn) for cn in memberships[username]],
+            'userPassword': USER_PASSWORD,
+        })
+    return pool
+
+
+def configure_app(app, pool: LDAPConnectionPool) -> None:
+    """Point ``app`` at the mock directory and disable the demo-mode bypass."""
+    app.config.update(
+        FLASK_ENV='testing',
+        LDAP_SERVER=pool.server_uri,
+        LDAP_BIND_DN=SERVICE_DN,
+        LDAP_BIND_PASSWORD=SERVICE_PASSWORD,
+        LDAP_BASE_DN=BASE_DN,
+        LDAP_USER_SEARCH_BASE='cn=Users',
+    )
+    app.extensions['ldap_pool'] = pool
@@ -0,0 +1,77 @@
+"""
+Measure p50/p99 latency and throughput of the main pages in-process.
+
+Runs against ``create_benchmark_app`` (mocked LDAP, seeded database) using
+Flask's test client, so results reflect application cost only.
+
+Usage (from core-app/):
+    SECRET_KEY=dev python -m benchmarks.pages --users 3000 --requests 200
+"""
+import argparse
+import statistics
+import time
+from typing import Callable, Dict, List
+from benchmarks.seed import SeedSizes, create_benchmark_app, login_client, login_form, photo_url
+
+
+def scenarios(app) -> Dict[str, Callable[[], int]]:
+    """Return name -> callable issuing one request and returning its status code."""
+    admin = login_client(app, user_id=1)
+    photo = photo_url(app, size=64)
+    photo_etag = admin.get(photo).headers['ETag']
+
+    def login():
+        # Fresh client per request: an authenticated session would be redirected
+        return app.test_client().post('/auth/login', data=login_form('user1')).status_code
+
+    return {
+        'POST /auth/login': login,
+        'GET /': lambda: admin.get('/').status_code,
+        'GET /admin/users': lambda: admin.get('/admin/users').status_code,
+        'GET /admin/group-permissions': lambda: admin.get('/admin/group-permissions').status_code,
+        'GET /profile/photos/<hash>': lambda: admin.get(photo).status_code,
+        'GET photo (304)': lambda: admin.get(
+            photo, headers={'If-None-Match': photo_etag}).status_code,
+    }
+
+
+def measure(request: Callable[[], int], count: int, warmup: int = 5) -> Dict[str, float]:
+    for _ in range(warmup):
+        request()
+
+    latencies: List[float] = []
+    started = time.perf_counter()
+    for _ in range(count):
+        start = time.perf_counter()
+        status = request()
+        latencies.append((time.perf_counter() - start) * 1000)
+        assert status in (200, 302, 304), f'unexpected status {status}'
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        'p50_ms': statistics.median(latencies),
+        'p99_ms': latencies[min(count - 1, int(count * 0.99))],
+        'rps': count / elapsed,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--users', type=int, default=SeedSizes.users)
+    parser.add_argument('--roles', type=int, default=SeedSizes.roles)
+    parser.add_argument('--modules', type=int, default=SeedSizes.modules)
+    parser.add_argument('--groups', type=int, default=SeedSizes.groups)
+    parser.add_argument('--requests', type=int, default=100, help='requests per page')
+    args = parser.parse_args()
+
+    app = create_benchmark_app(SeedSizes(args.users, args.roles, args.modules, args.groups))
+    # No outer app context: each request must get its own flask.g
+    print(f"{'page':<30} {'p50 ms':>8} {'p99 ms':>8} {'req/s':>8}")
+    for name, request in scenarios(app).items():
+        r = measure(request, args.requests)
+        print(f"{name:<30} {r['p50_ms']:>8.2f} {r['p99_ms']:>8.2f} {r['rps']:>8.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+"""
+Benchmark profile photo processing per upload.
+
+Compares the legacy path (full decode, LANCZOS resize to one 300x300 JPEG)
+with ``FileUploadHandler.render_variants`` (reduced-scale JPEG decode, then
+every configured size in WebP and JPEG) on a synthetic phone-sized photo.
+
+Usage (from core-app/):
+    SECRET_KEY=dev python -m benchmarks.photo_pipeline --uploads 20
+"""
+import argparse
+import io
+import os
+import statistics
+import tempfile
+import time
+from PIL import Image, ImageDraw
+from flask import Flask
+from config import get_config
+from utils.file_upload import FileUploadHandler
+
+
+def make_photo(width: int, height: int) -> bytes:
+    """A JPEG with some detail, so encoders do not get a trivially flat image."""
+    image = Image.new('RGB', (width, height), (40, 90, 160))
+    draw = ImageDraw.Draw(image)
+    for i in range(0, width, 40):
+        draw.line([(i, 0), (width - i, height)], fill=(i % 255, 200, 100), width=7)
+    out = io.BytesIO()
+    image.save(out, 'JPEG', quality=92)
+    return out.getvalue()
+
+
+def legacy_save(data: bytes, folder: str, i: int) -> None:
+    image = Image.open(io.BytesIO(data))
+    image = image.convert('RGB')
+    resample = getattr(Image, 'Resampling', Image).LANCZOS
+    image = image.resize((300, 300), resample)
+    image.save(os.path.join(folder, f'user_{i}.jpg'), 'JPEG', quality=85)
+
+
+def pipeline_save(data: bytes, folder: str, i: int) -> None:
+    # A distinct digest per upload, so no variant is skipped as already written
+    FileUploadHandler.render_variants(io.BytesIO(data), f'{i:024x}')
+
+
+def run(save, data: bytes, uploads: int) -> dict:
+    latencies = []
+    with tempfile.TemporaryDirectory() as folder:
+        FileUploadHandler.UPLOAD_FOLDER = folder
+        save(data, folder, uploads)  # warm-up
+        for i in range(uploads):
+            start = time.perf_counter()
+            save(data, folder, i)
+            latencies.append((time.perf_counter() - start) * 1000)
+        written = sum(os.path.getsize(os.path.join(folder, f)) for f in os.listdir(folder))
+        files = len(os.listdir(folder))
+    return {
+        'p50_ms': statistics.median(latencies),
+        'max_ms': max(latencies),
+        'files': files // (uploads + 1),
+        'kb_per_upload': written / (uploads + 1) / 1024,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--uploads', type=int, default=20)
+    parser.add_argument('--width', type=int, default=4032)
+    parser.add_argument('--height', type=int, default=3024)
+    args = parser.parse_args()
+
+    app = Flask(__name__)
+    app.config.from_object(get_config('testing'))
+    data = make_photo(args.width, args.height)
+
+    print(f"source: {args.width}x{args.height} JPEG, {len(data) / 1024:.0f} KB")
+    print(f"{'path':<10} {'p50 ms':>8} {'max ms':>8} {'files':>6} {'KB out':>7}")
+    with app.app_context():
+        for name, save in (('legacy', legacy_save), ('pipeline', pipeline_save)):
+            r = run(save, data, args.uploads)
+            print(f"{name:<10} {r['p50_ms']:>8.1f} {r['max_ms']:>8.1f} {r['files']:>6} "
+                  f"{r['kb_per_upload']:>7.1f}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,44 @@
+"""
+SQL statement counting for benchmarks and query budgets.
+"""
+from contextlib import contextmanager
+from typing import Iterator, List
+from sqlalchemy import event
+from extensions import db
+
+
+class QueryCounter:
+    """Records every SQL statement executed on the app's engine."""
+
+    def __init__(self):
+        self.statements: List[str] = []
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def _record(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+
+@contextmanager
+def count_queries(app) -> Iterator[QueryCounter]:
+    """Count SQL statements issued inside the ``with`` block."""
+    with app.app_context():
+        engine = db.engine
+    counter = QueryCounter()
+    event.listen(engine, 'before_cursor_execute', counter._record)
+    try:
+        yield counter
+    finally:
+        event.remove(engine, 'before_cursor_execute', counter._record)
+
+
+@contextmanager
+def assert_max_queries(app, limit: int) -> Iterator[QueryCounter]:
+    """Fail if the ``with`` block issues more than ``limit`` SQL statements."""
+    with count_queries(app) as counter:
+        yield counter
+    assert counter.count <= limit, (
+        f"{counter.count} queries executed, budget is {limit}:\n" + "\n".join(counter.statements)
+    )
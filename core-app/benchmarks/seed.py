@@ -0,0 +1,137 @@
+"""
+Build a seeded application for benchmarks.
+
+``create_benchmark_app`` returns ``create_app('testing')`` wired to the
+MOCK_SYNC directory from ``benchmarks.mock_ldap`` and a database seeded
+with users, roles, permissions, modules and one profile photo.
+"""
+import io
+import tempfile
+from dataclasses import dataclass
+from typing import Optional
+from PIL import Image
+from app import create_app
+from extensions import db
+from models.user import User
+from models.rbac import Role, Module, Permission
+from utils.file_upload import FileUploadHandler
+from benchmarks.mock_ldap import build_mock_pool, configure_app, USER_PASSWORD
+
+
+@dataclass
+class SeedSizes:
+    """Row counts for a benchmark run."""
+    users: int = 500
+    roles: int = 20
+    modules: int = 15
+    groups: int = 50
+
+
+def _seed_database(sizes: SeedSizes) -> None:
+    db.create_all()
+
+    modules = [
+        Module(name=f'module{i}', display_name=f'Module {i}', icon='fa-cube', url_prefix=f'/module{i}')
+        for i in range(sizes.modules)
+    ]
+    modules.append(Module(name='admin', display_name='Administration', icon='fa-cogs', url_prefix='/admin'))
+    db.session.add_all(modules)
+    db.session.flush()
+
+    permissions = [
+        Permission(name=f'{m.name}.access', display_name=f'Access {m.display_name}', module_id=m.id)
+        for m in modules
+    ]
+    permissions += [
+        Permission(name=name, display_name=name, module_id=modules[-1].id)
+        for name in ('admin.roles.read', 'admin.roles.write', 'admin.users.manage', 'admin.groups.manage')
+    ]
+    db.session.add_all(permissions)
+
+    admin = Role(name='admin', description='System Administrator', is_system=True)
+    roles = [
+        Role(name=f'Group {i}', description=f'LDAP-Gruppe: Group {i}', ldap_group=f'Group {i}',
+             permissions=permissions[i % len(permissions):][:3])
+        for i in range(sizes.roles)
+    ]
+    db.session.add_all([admin] + roles)
+
+    # Photo shared by all users that have one (only the lookup/streaming is measured)
+    source = io.BytesIO()
+    Image.new('RGB', (600, 600), (90, 120, 200)).save(source, 'JPEG')
+    photo_name = FileUploadHandler.render_variants(
+        source, FileUploadHandler.content_digest(source.getvalue(), 'benchmark')
+    )
+
+    for i in range(sizes.users):
+        if i == 0:
+            user_roles = [admin]
+        else:
+            user_roles = [roles[i % len(roles)]] if roles else []
+        user = User(
+            username=f'user{i}',
+            display_name=f'Pupil user{i}',
+            email=f'user{i}@school.local',
+            department=f'Class {i % 12}',
+            profile_photo=photo_name if i % 2 == 0 else None,
+            roles=user_roles
+        )
+        db.session.add(user)
+    db.session.commit()
+
+
+def _directory_groups(i: int, sizes: SeedSizes):
+    """LDAP groups of ``user<i>``, matching the roles seeded in the database."""
+    if i == 0:
+        return ['Domain Admins']
+    return [f'Group {i % sizes.roles}'] if sizes.roles else []
+
+
+def create_benchmark_app(sizes: Optional[SeedSizes] = None):
+    """
+    Create and seed an app for benchmarking.
+
+    The database is TestingConfig's (in-memory SQLite by default). Set
+    ``TEST_DATABASE_URL`` to an empty PostgreSQL database to benchmark
+    against the production backend.
+
+    Args:
+        sizes: Row counts to seed (defaults to ``SeedSizes()``)
+
+    Returns:
+        Flask app; ``user0`` is the admin, every user's LDAP password is
+        ``benchmarks.mock_ldap.USER_PASSWORD``
+    """
+    sizes = sizes or SeedSizes()
+    workdir = tempfile.mkdtemp(prefix='indigo-bench-')
+
+    app = create_app('testing')
+    configure_app(app, build_mock_pool(
+        num_users=sizes.users,
+        groups=[f'Group {i}' for i in range(sizes.groups)],
+        member_of=lambda i: _directory_groups(i, sizes)
+    ))
+    FileUploadHandler.UPLOAD_FOLDER = workdir
+
+    with app.app_context():
+        _seed_database(sizes)
+    return app
+
+
+def login_client(app, user_id: int = 1):
+    """Return a test client with an authenticated session for ``user_id``."""
+    client = app.test_client()
+    with client.session_transaction() as session:
+        session['_user_id'] = str(user_id)
+        session['_fresh'] = True
+    return client
+
+
+def photo_url(app, user_id: int = 1, size: Optional[int] = None) -> str:
+    """Versioned profile photo URL of ``user_id`` (as rendered in templates)."""
+    with app.test_request_context():
+        return db.session.get(User, user_id).get_profile_photo_url(size)
+
+
+def login_form(username: str = 'user1') -> dict:
+    return {'username': username, 'password': USER_PASSWORD}
@@ -0,0 +1,104 @@
+"""
+Access checks: denied JSON API requests get a JSON error, never a redirect
+to an HTML page, page scripts can pass CSRF protection, and deactivated
+accounts lose access to cached endpoints (see conftest.py for how to run).
+"""
+import re
+import pytest
+from benchmarks.seed import SeedSizes, create_benchmark_app, login_client, photo_url
+from auth.rbac_cache import invalidate_access
+from extensions import db
+from models.rbac import Permission, Role
+from models.user import User
+
+
+@pytest.fixture(scope='module')
+def app():
+    app = create_benchmark_app(SeedSizes(users=10, roles=3, modules=3, groups=5))
+    with app.app_context():
+        manage_users = Permission.query.filter_by(name='admin.users.manage').one()
+        managers = Role(name='User managers', permissions=[manage_users])
+        db.session.add_all([
+            User(username='manager', roles=[managers]),
+            User(username='nobody'),
+        ])
+        db.session.commit()
+    return app
+
+
+def _client(app, username):
+    with app.app_context():
+        user_id = User.query.filter_by(username=username).one().id
+    return login_client(app, user_id=user_id)
+
+
+def _role_names(app, username):
+    with app.app_context():
+        return {r.name for r in User.query.filter_by(username=username).one().roles}
+
+
+def test_user_manager_can_assign_roles(app):
+    client = _client(app, 'manager')
+    response = client.post('/api/v1/rbac/batch', json={
+        'user_roles': [{'user': 'user3', 'role': 'Group 1', 'action': 'add'}],
+    })
+    assert response.status_code == 200, response.data
+    assert response.get_json()['user_roles_added'] == 1
+
+
+def test_user_manager_cannot_grant_modules(app):
+    client = _client(app, 'manager')
+    before = _role_names(app, 'user3')
+    response = client.post('/api/v1/rbac/batch', json={
+        'user_roles': [{'user': 'user3', 'role': 'Group 2', 'action': 'add'}],
+        'role_modules': [{'role': 'Group 1', 'module': 'module0', 'action': 'add'}],
+    })
+    assert response.status_code == 403
+    assert 'admin.groups.manage' in response.get_json()['message']
+    # Nothing of the batch was applied
+    assert _role_names(app, 'user3') == before
+
+
+@pytest.mark.parametrize('payload', [
+    {'user_roles': [{'user': 'user3', 'role': 'Group 1', 'action': 'add'}]},
+    {},
+])
+def test_user_without_permissions_gets_json_403(app, payload):
+    response = _client(app, 'nobody').post('/api/v1/rbac/batch', json=payload)
+    assert response.status_code == 403
+    assert response.get_json()['status'] == 'error'
+
+
+def test_anonymous_gets_json_401(app):
+    response = app.test_client().post('/api/v1/rbac/batch', json={})
+    assert response.status_code == 401
+    assert response.get_json()['status'] == 'error'
+
+
+def test_deactivated_user_cannot_fetch_photos(app):
+    with app.app_context():
+        user = User.query.filter_by(username='user2').one()
+        user_id = user.id
+    url = photo_url(app, size=64)
+    client = login_client(app, user_id=user_id)
+    assert client.get(url).status_code == 200  # access now cached as active
+
+    with app.app_context():
+        db.session.get(User, user_id).is_active = False
+        db.session.commit()
+        invalidate_access(user_id)
+    assert client.get(url).status_code in (302, 401)
+
+
+def test_bulk_role_bar_posts_with_page_csrf_token(app, monkeypatch):
+    monkeypatch.setitem(app.config, 'WTF_CSRF_ENABLED', True)
+    client = _client(app, 'manager')
+    page = client.get('/admin/users')
+    assert page.status_code == 200
+    match = re.search(r'<meta name="csrf-token" content="([^"]+)">', page.get_data(as_text=True))
+    assert match, 'users page has no csrf-token meta tag'
+
+    payload = {'user_roles': [{'user': 'user4', 'role': 'Group 1', 'action': 'add'}]}
+    assert client.post('/api/v1/rbac/batch', json=payload).status_code == 400
+    response = client.post('/api/v1/rbac/batch', json=payload, headers={'X-CSRFToken': match.group(1)})
+    assert response.status_code == 200, response.data
@@ -0,0 +1,69 @@
+"""
+Photo job queue: the backlog is bounded and an older upload never replaces
+a newer one (see conftest.py for how to run).
+"""
+import io
+import os
+import pytest
+from PIL import Image
+from benchmarks.seed import SeedSizes, create_benchmark_app, login_client
+from extensions import db
+from models.user import User
+from utils.file_upload import FileUploadHandler
+from utils.image_queue import DONE, SUPERSEDED, ImageJobQueue
+
+
+@pytest.fixture(scope='module')
+def app():
+    return create_benchmark_app(SeedSizes(users=4, roles=2, modules=2, groups=2))
+
+
+def _jpeg(color) -> bytes:
+    out = io.BytesIO()
+    Image.new('RGB', (120, 120), color).save(out, 'JPEG')
+    return out.getvalue()
+
+
+def _photo(app, user_id):
+    with app.app_context():
+        return db.session.get(User, user_id).profile_photo
+
+
+def test_older_job_does_not_replace_newer_photo(app):
+    queue = ImageJobQueue(app, max_workers=0)
+    older, newer = _jpeg((200, 0, 0)), _jpeg((0, 200, 0))
+    older_id = FileUploadHandler.content_digest(older, 2)
+
+    newer_id = queue.submit(2, newer)
+    assert FileUploadHandler.photo_digest(_photo(app, 2)) == newer_id
+    # The older upload finishes last, e.g. on another worker
+    queue._run(2, older, older_id)
+
+    assert FileUploadHandler.photo_digest(_photo(app, 2)) == newer_id
+    with app.app_context():
+        user = db.session.get(User, 2)
+        assert queue.status(older_id, user) == SUPERSEDED
+        assert queue.status(newer_id, user) == DONE
+    # The discarded job removed its own files only
+    files = os.listdir(FileUploadHandler.UPLOAD_FOLDER)
+    assert any(f.startswith(newer_id) for f in files)
+    assert not any(f.startswith(older_id) for f in files)
+
+
+@pytest.mark.parametrize('limits, status', [
+    ({'max_pending_per_user': 0}, 429),
+    ({'max_pending': 0}, 503),
+])
+def test_full_queue_refuses_uploads(app, monkeypatch, limits, status):
+    queue = app.extensions['image_queue']
+    for name, value in limits.items():
+        monkeypatch.setattr(queue, name, value)
+    before = _photo(app, 3)
+
+    response = login_client(app, user_id=3).post('/profile/upload-photo', data={
+        'file': (io.BytesIO(_jpeg((0, 0, 200))), 'photo.jpg'),
+    })
+    assert response.status_code == status, response.data
+    assert response.headers['Retry-After']
+    assert _photo(app, 3) == before
+    assert not queue._pending
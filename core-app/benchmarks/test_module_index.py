@@ -0,0 +1,66 @@
+"""
+Module index hot reload: ``@require_module_access`` follows config.json edits
+without a restart, and only the syncing process writes them to the database
+(see conftest.py for how to run).
+"""
+import json
+import os
+import pytest
+from benchmarks.query_count import count_queries
+from benchmarks.seed import SeedSizes, create_benchmark_app, login_client
+from auth.permissions import require_module_access
+from extensions import db
+from models.rbac import Module
+from utils.module_registry import ModuleRegistry
+
+URL = '/_test/module0'
+
+
+@pytest.fixture(scope='module')
+def app():
+    app = create_benchmark_app(SeedSizes(users=4, roles=3, modules=3, groups=2))
+    app.add_url_rule(URL, 'module0_index', require_module_access('module0')(lambda: 'module0'))
+    return app
+
+
+@pytest.fixture
+def modules_dir(app, tmp_path, monkeypatch):
+    """Point the module index at a tree holding only ``module0``."""
+    monkeypatch.setattr(ModuleRegistry, 'modules_dir', property(lambda self: str(tmp_path)))
+    (tmp_path / 'module0').mkdir()
+    return tmp_path
+
+
+def _write_config(modules_dir, **config):
+    path = modules_dir / 'module0' / 'config.json'
+    path.write_text(json.dumps({'name': 'module0', 'url_prefix': '/module0', **config}))
+    # Guarantee a new mtime even on coarse filesystem clocks
+    stat = path.stat()
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+
+def test_disabling_a_module_takes_effect_without_restart(app, modules_dir):
+    index = app.extensions['module_index']
+    _write_config(modules_dir, enabled=True)
+    assert index.check()
+
+    admin = login_client(app, user_id=1)
+    assert admin.get(URL).status_code == 200
+    # user3 (id 4) holds 'Group 0' with module0.access, user1 (id 2) does not
+    assert login_client(app, user_id=4).get(URL).status_code == 200
+    assert login_client(app, user_id=2).get(URL).status_code == 302
+
+    _write_config(modules_dir, enabled=False)
+    with count_queries(app) as counter:
+        assert index.check()
+    assert counter.count == 0, 'a worker rebuild must not touch the database'
+    assert admin.get(URL).status_code == 404
+
+
+def test_syncing_process_writes_config_changes(app, modules_dir):
+    index = app.extensions['module_index']
+    _write_config(modules_dir, enabled=False, display_name='Module Zero')
+    assert index.check(sync=True)
+    with app.app_context():
+        module = db.session.scalars(db.select(Module).filter_by(name='module0')).one()
+        assert (module.display_name, module.is_enabled) == ('Module Zero', False)
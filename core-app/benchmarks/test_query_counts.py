@@ -0,0 +1,119 @@
+"""
+Query budgets: admin pages must issue a constant number of SQL statements
+regardless of row count (see conftest.py for how to run).
+"""
+import pytest
+from benchmarks.seed import SeedSizes, create_benchmark_app, login_client, login_form, photo_url
+from benchmarks.query_count import assert_max_queries
+
+PAGE_BUDGETS = {
+    '/admin/users': 4,
+    '/admin/roles': 3,
+    '/admin/group-permissions': 3,
+}
+
+
+@pytest.fixture(scope='module')
+def small_and_large_apps():
+    small = create_benchmark_app(SeedSizes(users=10, roles=3, modules=3, groups=5))
+    large = create_benchmark_app(SeedSizes(users=400, roles=40, modules=20, groups=5))
+    return small, large
+
+
+@pytest.mark.parametrize('path', sorted(PAGE_BUDGETS))
+def test_admin_page_query_count_is_constant(small_and_large_apps, path):
+    counts = []
+    for app in small_and_large_apps:
+        client = login_client(app, user_id=1)
+        client.get(path)  # warm per-process caches (RBAC, sidebar, LDAP groups)
+        with assert_max_queries(app, PAGE_BUDGETS[path]) as counter:
+            assert client.get(path).status_code == 200
+        counts.append(counter.count)
+    assert counts[0] == counts[1], f'{path}: {counts[0]} queries for small seed, {counts[1]} for large'
+
+
+# Load the role, all modules, their access permissions and the role's
+# current permissions, then one bulk insert/delete plus the commit and
+# the RBAC version bump.
+GROUP_UPDATE_BUDGET = 12
+
+
+def test_group_permission_update_query_count_is_constant(small_and_large_apps):
+    counts = []
+    for app, num_modules in zip(small_and_large_apps, (3, 20)):
+        client = login_client(app, user_id=1)
+        client.get('/admin/users')  # warm per-process caches
+        # Start from no module grants so both seeds apply the same kind of diff
+        client.post('/admin/group-permissions/update/3', json={'modules': []})
+        payload = {'modules': [f'module{i}' for i in range(num_modules)]}
+        with assert_max_queries(app, GROUP_UPDATE_BUDGET) as counter:
+            response = client.post('/admin/group-permissions/update/3', json=payload)
+        assert response.status_code == 200, response.data
+        counts.append(counter.count)
+    assert counts[0] == counts[1], f'group update: {counts[0]} queries for small seed, {counts[1]} for large'
+
+
+# Resolve users, roles, modules, permissions (one IN query each), read the
+# existing user_roles and role_permissions rows, then one bulk insert/delete
+# per table plus the commit. The RBAC version bump adds its own UPDATE/COMMIT.
+BATCH_BUDGET = 14
+
+
+def _batch_payload(num_users):
+    return {
+        'user_roles': [
+            {'user': f'user{i}', 'role': 'Group 0', 'action': 'add' if i % 2 else 'remove'}
+            for i in range(1, num_users)
+        ],
+        'role_modules': [
+            {'role': 'Group 1', 'module': f'module{i}', 'action': 'add'} for i in range(3)
+        ] + [{'role': 'Group 2', 'module': 'module0', 'action': 'remove'}],
+    }
+
+
+def test_rbac_batch_query_count_is_constant(small_and_large_apps):
+    counts = []
+    for app, num_users in zip(small_and_large_apps, (10, 400)):
+        client = login_client(app, user_id=1)
+        client.get('/admin/users')  # warm per-process caches
+        payload = _batch_payload(num_users)
+        with assert_max_queries(app, BATCH_BUDGET) as counter:
+            response = client.post('/api/v1/rbac/batch', json=payload)
+        assert response.status_code == 200, response.data
+        assert response.get_json()['skipped'] == []
+        counts.append(counter.count)
+    assert counts[0] == counts[1], f'batch: {counts[0]} queries for small seed, {counts[1]} for large'
+
+
+
+# Look up the user, read their LDAP-managed role rows, update last_login
+# and reload the user for the redirect; the group -> role map is in memory.
+# One more statement is allowed for an RBAC version re-check.
+LOGIN_BUDGET = 5
+
+
+def test_login_query_count_is_constant(small_and_large_apps):
+    counts = []
+    for app in small_and_large_apps:
+        # The first login may fix up roles changed by earlier tests (bumping the
+        # RBAC version); the second rebuilds the group -> role map
+        for _ in range(2):
+            app.test_client().post('/auth/login', data=login_form('user2'))
+        with assert_max_queries(app, LOGIN_BUDGET) as counter:
+            response = app.test_client().post('/auth/login', data=login_form('user2'))
+        assert response.status_code == 302, response.data
+        counts.append(counter.count)
+    assert counts[0] == counts[1], f'login: {counts[0]} queries for small seed, {counts[1]} for large'
+
+
+def test_profile_photo_needs_no_queries(small_and_large_apps):
+    app = small_and_large_apps[0]
+    client = login_client(app, user_id=1)
+    url = photo_url(app, size=64)
+    accept = {'Accept': 'image/webp,image/*'}
+    client.get(url, headers=accept)  # warm the process-wide access cache (active flag)
+    with assert_max_queries(app, 0):
+        response = client.get(url, headers=accept)
+        assert response.status_code == 200
+        revalidated = client.get(url, headers={**accept, 'If-None-Match': response.headers['ETag']})
+        assert revalidated.status_code == 304
@@ -0,0 +1,73 @@
+"""
+Startup budget: ``python -X importtime`` of the app module and the WSGI
+entry point, each in a fresh interpreter (see conftest.py for how to run).
+
+``import app`` must not import any feature module (blueprints are
+discovered from config.json and imported by the factory), and the summed
+self time of all imports must stay under a budget. The budgets are loose
+on purpose, so a slow CI box passes; override them with
+``STARTUP_BUDGET_MS`` / ``WSGI_STARTUP_BUDGET_MS`` when tracking a regression.
+"""
+import json
+import os
+import subprocess
+import sys
+import pytest
+
+CORE_APP = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+STARTUP_BUDGET_MS = float(os.environ.get('STARTUP_BUDGET_MS', 2500))
+WSGI_STARTUP_BUDGET_MS = float(os.environ.get('WSGI_STARTUP_BUDGET_MS', 3500))
+
+
+def import_times(module: str, **env) -> dict:
+    """Module name -> self import time (ms) for ``import module`` in a new interpreter."""
+    environ = dict(os.environ, PYTHONDONTWRITEBYTECODE='1', **env)
+    environ.setdefault('DATABASE_URL', 'sqlite://')  # no DB driver needed to import
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=CORE_APP, env=environ, capture_output=True, text=True, timeout=60,
+    )
+    assert result.returncode == 0, result.stderr[-2000:]
+
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, _, name = line[len('import time:'):].split('|')
+        times[name.strip()] = int(self_us) / 1000
+    return times
+
+
+def module_configs() -> dict:
+    """Package name -> config.json of every module in the tree."""
+    modules_dir = os.path.join(CORE_APP, 'modules')
+    configs = {}
+    for name in os.listdir(modules_dir):
+        config_file = os.path.join(modules_dir, name, 'config.json')
+        if os.path.exists(config_file):
+            with open(config_file) as f:
+                configs[name] = json.load(f)
+    return configs
+
+
+def imported_modules(times: dict) -> set:
+    return {name.split('.')[1] for name in times if name.startswith('modules.')}
+
+
+def test_import_app_loads_no_feature_modules():
+    times = import_times('app')
+    assert not imported_modules(times), 'app.py imports module code at import time'
+    total = sum(times.values())
+    assert total < STARTUP_BUDGET_MS, f'import app took {total:.0f} ms (budget {STARTUP_BUDGET_MS:.0f} ms)'
+
+
+@pytest.mark.parametrize('enabled', ['', '*'])
+def test_wsgi_imports_only_enabled_modules(enabled):
+    times = import_times('wsgi', ENABLED_MODULES=enabled)
+    configs = module_configs()
+    expected = {name for name, config in configs.items() if enabled == '*' or config.get('core')}
+    assert imported_modules(times) == expected
+    total = sum(times.values())
+    assert total < WSGI_STARTUP_BUDGET_MS, \
+        f'import wsgi took {total:.0f} ms (budget {WSGI_STARTUP_BUDGET_MS:.0f} ms)'
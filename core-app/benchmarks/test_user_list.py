@@ -0,0 +1,49 @@
+"""
+Keyset pagination of the user list API: cursors continue the listing and
+invalid or tampered cursors restart from the first page (see conftest.py
+for how to run).
+"""
+import base64
+import json
+import pytest
+from benchmarks.seed import SeedSizes, create_benchmark_app, login_client
+
+
+@pytest.fixture(scope='module')
+def client():
+    app = create_benchmark_app(SeedSizes(users=10, roles=3, modules=3, groups=5))
+    return login_client(app, user_id=1)
+
+
+def _cursor(payload) -> str:
+    return base64.urlsafe_b64encode(json.dumps(payload).encode('utf-8')).decode('ascii')
+
+
+def _usernames(client, **args):
+    response = client.get('/api/v1/users', query_string={'limit': 4, **args})
+    assert response.status_code == 200, response.data
+    data = response.get_json()
+    return [u['username'] for u in data['users']], data['next_cursor']
+
+
+def test_cursor_continues_after_last_row(client):
+    first, cursor = _usernames(client)
+    second, _ = _usernames(client, cursor=cursor)
+    assert second and not set(first) & set(second)
+    assert sorted(first + second) == first + second
+
+
+@pytest.mark.parametrize('cursor', [
+    _cursor([['user1'], 3]),
+    _cursor([{'a': 1}, 3]),
+    _cursor([7, 3]),
+    _cursor(['user1', 'x']),
+    _cursor(['user1', True]),
+    _cursor('user1'),
+    'not base64 !',
+])
+def test_tampered_cursor_restarts_from_first_page(client, cursor):
+    first, _ = _usernames(client)
+    for sort in ('username', 'display_name', 'department'):
+        assert _usernames(client, cursor=cursor, sort=sort)[0] == _usernames(client, sort=sort)[0]
+    assert _usernames(client, cursor=cursor)[0] == first
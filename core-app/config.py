@@ -32,6 +32,87 @@ class Config:
     LDAP_USER_SEARCH_BASE: str = config('LDAP_USER_SEARCH_BASE', default='cn=Users')
     LDAP_GROUP_SEARCH_BASE: str = config('LDAP_GROUP_SEARCH_BASE', default='cn=Groups')
     
+    # LDAP connection pool settings (per worker process)
+    LDAP_POOL_SIZE: int = config('LDAP_POOL_SIZE', default=5, cast=int)
+    LDAP_POOL_IDLE_TIMEOUT: int = config('LDAP_POOL_IDLE_TIMEOUT', default=300, cast=int)  # seconds
+    LDAP_POOL_HEALTH_CHECK_INTERVAL: int = config('LDAP_POOL_HEALTH_CHECK_INTERVAL', default=60, cast=int)
+    LDAP_POOL_ACQUIRE_TIMEOUT: int = config('LDAP_POOL_ACQUIRE_TIMEOUT', default=10, cast=int)
+    
+    # LDAP socket timeouts (seconds) and circuit breaker for an unreachable DC
+    LDAP_CONNECT_TIMEOUT: int = config('LDAP_CONNECT_TIMEOUT', default=5, cast=int)
+    LDAP_RECEIVE_TIMEOUT: int = config('LDAP_RECEIVE_TIMEOUT', default=10, cast=int)
+    LDAP_CIRCUIT_FAILURE_THRESHOLD: int = config('LDAP_CIRCUIT_FAILURE_THRESHOLD', default=5, cast=int)
+    LDAP_CIRCUIT_RESET_TIMEOUT: int = config('LDAP_CIRCUIT_RESET_TIMEOUT', default=30, cast=int)
+    
+    # Threads per worker for LDAP calls run alongside DB queries (group-permissions page)
+    LDAP_EXECUTOR_WORKERS: int = config('LDAP_EXECUTOR_WORKERS', default=4, cast=int)
+    LDAP_EXECUTOR_TIMEOUT: int = config('LDAP_EXECUTOR_TIMEOUT', default=15, cast=int)
+    
+    # Simple Paged Results page size; keep below AD's MaxPageSize (1000)
+    LDAP_PAGE_SIZE: int = config('LDAP_PAGE_SIZE', default=500, cast=int)
+    
+    # LDAP group directory cache (admin group-permissions page)
+    LDAP_GROUP_CACHE_TTL: int = config('LDAP_GROUP_CACHE_TTL', default=300, cast=int)  # seconds
+    LDAP_GROUP_CACHE_FULL_REFRESH: int = config('LDAP_GROUP_CACHE_FULL_REFRESH', default=3600, cast=int)
+    # Seconds before a failed group load/refresh is retried
+    LDAP_GROUP_CACHE_RETRY: int = config('LDAP_GROUP_CACHE_RETRY', default=60, cast=int)
+    # Set False to hide member counts
+    LDAP_GROUP_COUNT_MEMBERS: bool = config('LDAP_GROUP_COUNT_MEMBERS', default=True, cast=bool)
+    # Member DNs read per group to count them (one ranged value set, at most
+    # AD's MaxValRange of 1500); larger groups show "<limit>+"
+    LDAP_GROUP_MEMBER_COUNT_LIMIT: int = config('LDAP_GROUP_MEMBER_COUNT_LIMIT', default=1000, cast=int)
+    # Resolve nested group membership from the cached group graph at login and role sync
+    LDAP_NESTED_GROUPS: bool = config('LDAP_NESTED_GROUPS', default=True, cast=bool)
+    
+    # LDAP group -> role sync: members of these groups get the 'admin' role
+    LDAP_ADMIN_GROUPS: list = config(
+        'LDAP_ADMIN_GROUPS',
+        default='Domain Admins',
+        cast=lambda x: [g.strip() for g in x.split(',') if g.strip()]
+    )
+    LDAP_ROLE_SYNC_BATCH_SIZE: int = config('LDAP_ROLE_SYNC_BATCH_SIZE', default=500, cast=int)
+    # Revoke LDAP-backed roles from users who left the group (admin is never revoked)
+    LDAP_ROLE_SYNC_REMOVE: bool = config('LDAP_ROLE_SYNC_REMOVE', default=True, cast=bool)
+    
+    # RBAC cache: per-worker LRU of effective permissions, validated against
+    # the shared rbac_version row at most once per check interval
+    RBAC_CACHE_SIZE: int = config('RBAC_CACHE_SIZE', default=1024, cast=int)
+    RBAC_VERSION_CHECK_INTERVAL: float = config('RBAC_VERSION_CHECK_INTERVAL', default=2.0, cast=float)  # seconds
+    
+    # Login throttling (per worker process). Failed attempts per username are
+    # limited to LOGIN_RATE_USER_BURST, regaining one every INTERVAL seconds;
+    # keep the burst below the AD account lockout threshold.
+    LOGIN_RATE_USER_BURST: int = config('LOGIN_RATE_USER_BURST', default=5, cast=int)
+    LOGIN_RATE_USER_INTERVAL: float = config('LOGIN_RATE_USER_INTERVAL', default=60.0, cast=float)  # seconds
+    LOGIN_RATE_IP_BURST: int = config('LOGIN_RATE_IP_BURST', default=30, cast=int)
+    LOGIN_RATE_IP_INTERVAL: float = config('LOGIN_RATE_IP_INTERVAL', default=2.0, cast=float)  # seconds
+    # How long "user not found in LDAP" is remembered (0 disables)
+    LDAP_UNKNOWN_USER_CACHE_TTL: float = config('LDAP_UNKNOWN_USER_CACHE_TTL', default=60.0, cast=float)  # seconds
+    # Number of reverse proxies in front of the app whose X-Forwarded-* headers are trusted
+    PROXY_COUNT: int = config('PROXY_COUNT', default=0, cast=int)
+    
+    # Profile photo derivatives: square sizes (px) and extra formats besides JPEG
+    # (webp, avif; formats the installed Pillow cannot encode are skipped)
+    PROFILE_PHOTO_SIZES: list = config(
+        'PROFILE_PHOTO_SIZES',
+        default='32,64,300',
+        cast=lambda x: [int(s) for s in x.split(',') if s.strip()]
+    )
+    PROFILE_PHOTO_FORMATS: list = config(
+        'PROFILE_PHOTO_FORMATS',
+        default='webp',
+        cast=lambda x: [f.strip().lower() for f in x.split(',') if f.strip()]
+    )
+    # Browser cache lifetime of versioned photo URLs (content never changes)
+    PROFILE_PHOTO_MAX_AGE: int = config('PROFILE_PHOTO_MAX_AGE', default=31536000, cast=int)  # seconds
+    # nginx internal location serving the upload folder; empty streams photos from Flask
+    PROFILE_PHOTO_ACCEL_PREFIX: str = config('PROFILE_PHOTO_ACCEL_PREFIX', default='')
+    # Threads per worker resizing uploaded photos in the background (0 = in the request)
+    PHOTO_QUEUE_WORKERS: int = config('PHOTO_QUEUE_WORKERS', default=2, cast=int)
+    # Uploads waiting or in progress per worker (each holds the raw file); more get 503/429
+    PHOTO_QUEUE_MAX_PENDING: int = config('PHOTO_QUEUE_MAX_PENDING', default=20, cast=int)
+    PHOTO_QUEUE_MAX_PER_USER: int = config('PHOTO_QUEUE_MAX_PER_USER', default=2, cast=int)
+    
     # Session settings
     SESSION_COOKIE_NAME: str = 'indigo_session'
     SESSION_COOKIE_HTTPONLY: bool = True
@@ -47,17 +128,26 @@ class Config:
     APP_VERSION: str = '1.0.0'
     DEFAULT_LANGUAGE: str = 'de'
     SUPPORTED_LANGUAGES: list = ['de', 'en']
+    # Re-read translation files when they change (on in development)
+    TRANSLATIONS_AUTO_RELOAD: bool = config('TRANSLATIONS_AUTO_RELOAD', default=False, cast=bool)
+
+    # Compiled Jinja templates shared by all workers (empty disables the cache;
+    # fill it with `flask templates compile`)
+    JINJA_CACHE_DIR: str = config('JINJA_CACHE_DIR', default='')
     
     # Logging settings
     LOG_LEVEL: str = config('LOG_LEVEL', default='INFO')
     LOG_FILE: str = config('LOG_FILE', default='/app/logs/app.log')
     
-    # Module settings
+    # Module settings: blueprints imported at startup ('*' = all; modules
+    # with "core": true in config.json always load)
     ENABLED_MODULES: list = config(
         'ENABLED_MODULES',
         default='dashboard,users,pfsense,fileserver,backup,fog',
         cast=lambda x: [m.strip() for m in x.split(',')]
     )
+    # Seconds between config.json change checks per worker (0 disables hot reload)
+    MODULE_WATCH_INTERVAL: int = config('MODULE_WATCH_INTERVAL', default=5, cast=int)
 
 
 class DevelopmentConfig(Config):
@@ -66,6 +156,7 @@ class DevelopmentConfig(Config):
     DEBUG: bool = True
     FLASK_ENV: str = 'development'
     SQLALCHEMY_ECHO: bool = True
+    TRANSLATIONS_AUTO_RELOAD: bool = True
 
 
 class ProductionConfig(Config):
@@ -76,6 +167,9 @@ class ProductionConfig(Config):
     # Allow overriding secure cookie in production (e.g. for HTTP-only internal networks)
     SESSION_COOKIE_SECURE: bool = config('SESSION_COOKIE_SECURE', default=True, cast=bool)
     
+    # Templates only change with a deploy; skip the per-render mtime check
+    TEMPLATES_AUTO_RELOAD: bool = False
+    
     # Override secret key requirement
     SECRET_KEY: str = config('SECRET_KEY')  # Must be set in production
 
@@ -85,8 +179,9 @@ class TestingConfig(Config):
     
     TESTING: bool = True
     DEBUG: bool = True
-    SQLALCHEMY_DATABASE_URI: str = 'sqlite:///:memory:'
+    SQLALCHEMY_DATABASE_URI: str = config('TEST_DATABASE_URL', default='sqlite:///:memory:')
     WTF_CSRF_ENABLED: bool = False
+    MODULE_WATCH_INTERVAL: int = 0
 
 
 # Configuration dictionary
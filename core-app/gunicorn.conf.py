@@ -0,0 +1,63 @@
+"""
+Gunicorn configuration for the production container.
+
+All settings can be overridden through environment variables, e.g.
+``GUNICORN_WORKERS=8 GUNICORN_THREADS=2``. Start with:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Graceful reload: ``kill -HUP <master pid>`` restarts workers after they
+finish in-flight requests. Because the app is preloaded in the master,
+code changes need a full restart (or USR2 + WINCH on the master).
+"""
+import multiprocessing
+import os
+
+# Socket
+bind = os.getenv('GUNICORN_BIND', '0.0.0.0:5000')
+backlog = int(os.getenv('GUNICORN_BACKLOG', '2048'))
+
+# Workers: threaded workers so nginx upstream keep-alive connections are reused
+worker_class = 'gthread'
+workers = int(os.getenv('GUNICORN_WORKERS', str(multiprocessing.cpu_count() * 2 + 1)))
+threads = int(os.getenv('GUNICORN_THREADS', '4'))
+
+# Build create_app() once in the master; workers fork with the app loaded
+preload_app = os.getenv('GUNICORN_PRELOAD', 'True').lower() in ('1', 'true', 'yes')
+
+# Timeouts (seconds). keepalive must exceed nginx's upstream keepalive_timeout.
+timeout = int(os.getenv('GUNICORN_TIMEOUT', '60'))
+graceful_timeout = int(os.getenv('GUNICORN_GRACEFUL_TIMEOUT', '30'))
+keepalive = int(os.getenv('GUNICORN_KEEPALIVE', '75'))
+
+# Recycle workers periodically to bound memory growth
+max_requests = int(os.getenv('GUNICORN_MAX_REQUESTS', '2000'))
+max_requests_jitter = int(os.getenv('GUNICORN_MAX_REQUESTS_JITTER', '200'))
+
+# Logging to stdout/stderr (collected by Docker)
+accesslog = os.getenv('GUNICORN_ACCESS_LOG', '-')
+errorlog = '-'
+loglevel = os.getenv('LOG_LEVEL', 'info').lower()
+
+# Trust X-Forwarded-* from the nginx-proxy container
+forwarded_allow_ips = os.getenv('GUNICORN_FORWARDED_ALLOW_IPS', '*')
+
+
+def when_ready(server):
+    """Write module config.json changes to the database from the master only."""
+    from wsgi import app
+    from utils.module_registry import start_module_sync
+
+    start_module_sync(app)
+
+
+def post_fork(server, worker):
+    """Drop database connections inherited from the preloading master and warm the LDAP group cache."""
+    from wsgi import app
+    from extensions import db
+    from auth.group_cache import preload_group_cache
+
+    with app.app_context():
+        db.engine.dispose(close=False)
+    # Load the LDAP nesting graph now, so logins never wait for it
+    preload_group_cache(app)
@@ -0,0 +1,41 @@
+"""Add user search indexes
+
+Revision ID: b5f1c8e07a23
+Revises: 7c3e2a9d41b6
+Create Date: 2026-10-17 11:40:05.517902
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b5f1c8e07a23'
+down_revision = '7c3e2a9d41b6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.create_index('ix_users_username_trgm', ['username'], unique=False,
+                              postgresql_using='gin', postgresql_ops={'username': 'gin_trgm_ops'})
+        batch_op.create_index('ix_users_display_name_trgm', ['display_name'], unique=False,
+                              postgresql_using='gin', postgresql_ops={'display_name': 'gin_trgm_ops'})
+        batch_op.create_index('ix_users_department', ['department'], unique=False)
+
+    with op.batch_alter_table('user_roles', schema=None) as batch_op:
+        batch_op.create_index('ix_user_roles_role_id', ['role_id'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user_roles', schema=None) as batch_op:
+        batch_op.drop_index('ix_user_roles_role_id')
+
+    with op.batch_alter_table('users', schema=None) as batch_op:
+        batch_op.drop_index('ix_users_department')
+        batch_op.drop_index('ix_users_display_name_trgm')
+        batch_op.drop_index('ix_users_username_trgm')
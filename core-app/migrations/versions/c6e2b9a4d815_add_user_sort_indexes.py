@@ -0,0 +1,32 @@
+"""Add user keyset sort indexes
+
+Revision ID: c6e2b9a4d815
+Revises: a4d7c2e9f1b3
+Create Date: 2026-10-17 19:02:44.183025
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c6e2b9a4d815'
+down_revision = 'a4d7c2e9f1b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # (sort key, id) for each sortable column of the admin user list; nullable
+    # columns are coalesced exactly as in modules/admin/services.USER_SORT_KEYS
+    op.create_index('ix_users_sort_username', 'users', ['username', 'id'], unique=False)
+    op.create_index('ix_users_sort_display_name', 'users',
+                    [sa.text("coalesce(display_name, '')"), 'id'], unique=False)
+    op.create_index('ix_users_sort_department', 'users',
+                    [sa.text("coalesce(department, '')"), 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_users_sort_department', table_name='users')
+    op.drop_index('ix_users_sort_display_name', table_name='users')
+    op.drop_index('ix_users_sort_username', table_name='users')
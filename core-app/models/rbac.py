@@ -12,7 +12,9 @@ role_permissions = db.Table('role_permissions',
 
 user_roles = db.Table('user_roles',
     db.Column('user_id', db.Integer, db.ForeignKey('users.id'), primary_key=True),
-    db.Column('role_id', db.Integer, db.ForeignKey('roles.id'), primary_key=True)
+    db.Column('role_id', db.Integer, db.ForeignKey('roles.id'), primary_key=True),
+    # Role -> users lookups (the primary key only covers user_id first)
+    db.Index('ix_user_roles_role_id', 'role_id')
 )
 
 class Role(BaseModel):
@@ -22,14 +24,18 @@ class Role(BaseModel):
         name: Unique role name (e.g., 'admin', 'user')
         description: Role description
         is_system: If True, cannot be deleted (e.g., 'admin')
+        ldap_group: CN of the LDAP group whose members get this role
+            (kept in sync by auth.role_sync); None for manual roles
     """
     __tablename__ = 'roles'
     id = db.Column(db.Integer, primary_key=True)
     name = db.Column(db.String(50), unique=True, nullable=False)
     description = db.Column(db.String(255))
     is_system = db.Column(db.Boolean, default=False)
+    ldap_group = db.Column(db.String(255))
     
-    permissions = db.relationship('Permission', secondary=role_permissions, lazy='subquery',
+    # Loaded on access; listing views choose an eager strategy per query
+    permissions = db.relationship('Permission', secondary=role_permissions, lazy='select',
         backref=db.backref('roles', lazy=True))
 
     def __repr__(self):
@@ -46,7 +52,8 @@ class Role(BaseModel):
             role = cls(
                 name=ldap_group_cn,
                 description=f"LDAP-Gruppe: {ldap_group_cn}",
-                is_system=False
+                is_system=False,
+                ldap_group=ldap_group_cn
             )
             db.session.add(role)
             db.session.commit()
@@ -69,6 +76,8 @@ class Module(BaseModel):
     icon = db.Column(db.String(50))
     is_enabled = db.Column(db.Boolean, default=True)
     url_prefix = db.Column(db.String(50))
+    # SHA-256 of the synced config.json rows (see ModuleRegistry.sync_database)
+    config_hash = db.Column(db.String(64))
     
     permissions = db.relationship('Permission', backref='module', lazy=True, cascade="all, delete-orphan")
 
@@ -91,3 +100,16 @@ class Permission(BaseModel):
 
     def __repr__(self):
         return f'<Permission {self.name}>'
+
+class RBACVersion(db.Model):
+    """
+    Single-row counter bumped on every RBAC change.
+    Workers compare it against their cached permission sets to detect
+    changes made by other processes.
+    """
+    __tablename__ = 'rbac_version'
+    id = db.Column(db.Integer, primary_key=True)
+    version = db.Column(db.BigInteger, nullable=False, default=0)
+
+    def __repr__(self):
+        return f'<RBACVersion {self.version}>'
@@ -1,12 +1,15 @@
 """
 User model implementation.
 """
-from typing import Optional
+from typing import FrozenSet, Optional
 from datetime import datetime
+from flask import url_for
 from flask_login import UserMixin
 from extensions import db
 from models.base import BaseModel
 from models.rbac import Role, user_roles
+from auth.rbac_cache import get_effective_access
+from utils.file_upload import FileUploadHandler
 
 class User(BaseModel, UserMixin):
     """
@@ -26,6 +29,18 @@ class User(BaseModel, UserMixin):
         updated_at (datetime): Last update timestamp
     """
     __tablename__ = 'users'
+    __table_args__ = (
+        # Substring search in the admin user list (pg_trgm GIN on PostgreSQL)
+        db.Index('ix_users_username_trgm', 'username',
+                 postgresql_using='gin', postgresql_ops={'username': 'gin_trgm_ops'}),
+        db.Index('ix_users_display_name_trgm', 'display_name',
+                 postgresql_using='gin', postgresql_ops={'display_name': 'gin_trgm_ops'}),
+        db.Index('ix_users_department', 'department'),
+        # Keyset pagination of the admin user list: (sort key, id) per sortable column
+        db.Index('ix_users_sort_username', 'username', 'id'),
+        db.Index('ix_users_sort_display_name', db.text("coalesce(display_name, '')"), 'id'),
+        db.Index('ix_users_sort_department', db.text("coalesce(department, '')"), 'id'),
+    )
     
     id = db.Column(db.Integer, primary_key=True)
     username = db.Column(db.String(150), unique=True, nullable=False, index=True)
@@ -42,7 +57,8 @@ class User(BaseModel, UserMixin):
     updated_at = db.Column(db.DateTime, nullable=True)
     
     # Relationships
-    roles = db.relationship('Role', secondary=user_roles, lazy='subquery',
+    # Loaded on access; listing views choose an eager strategy per query
+    roles = db.relationship('Role', secondary=user_roles, lazy='select',
         backref=db.backref('users', lazy=True))
     
     def __repr__(self) -> str:
@@ -62,23 +78,35 @@ class User(BaseModel, UserMixin):
         """Return False as regular users are not anonymous."""
         return False
 
+    def get_role_names(self) -> FrozenSet[str]:
+        """Return the names of the user's roles (memoized per request)."""
+        return get_effective_access(self).roles
+
+    def get_permission_names(self) -> FrozenSet[str]:
+        """Return the names of all permissions granted via roles (memoized per request)."""
+        return get_effective_access(self).permissions
+
     def has_role(self, role_name: str) -> bool:
         """Check if user has a specific role."""
-        return any(r.name == role_name for r in self.roles)
+        return role_name in get_effective_access(self).roles
 
     def has_permission(self, permission_name: str) -> bool:
         """Check if user has a specific permission via any role."""
-        for role in self.roles:
-            for perm in role.permissions:
-                if perm.name == permission_name:
-                    return True
-        return False
+        return permission_name in get_effective_access(self).permissions
+
+    def get_profile_photo_url(self, size: Optional[int] = None) -> Optional[str]:
+        """
+        Return URL of profile photo, optionally for a display size in px.
 
-    def get_profile_photo_url(self) -> Optional[str]:
-        """Return URL of profile photo."""
-        if self.profile_photo:
-            return f'/profile/photo/{self.id}'
-        return None
+        Photos stored under a content hash get a versioned URL that can be
+        cached forever; a new upload changes the URL.
+        """
+        if not self.profile_photo:
+            return None
+        digest = FileUploadHandler.photo_digest(self.profile_photo)
+        if digest is None:
+            return url_for('profile.get_photo', user_id=self.id)
+        return url_for('profile.photo_variant', digest=digest, size=FileUploadHandler.closest_size(size))
 
     def update_profile(self, data: dict):
         """Update profile information."""
@@ -1,13 +1,21 @@
 from flask import jsonify
+from sqlalchemy.orm import selectinload
 from auth.ldap_connector import LDAPConnector
-from flask import render_template, redirect, url_for, flash, request
+from auth.ldap_executor import get_ldap_executor
+from auth.group_cache import get_group_cache
+from flask import render_template, redirect, url_for, flash, request, current_app
 from flask_login import login_required
 from extensions import db
 from models.rbac import Role, Permission, Module
 from models.user import User
 from auth.permissions import require_role, require_permission
+from auth.rbac_cache import invalidate_access
+from auth.role_sync import get_role_sync
+from utils.module_registry import get_module_index
+from utils.translation import get_text
 from . import admin_bp
 from .forms import RoleForm, UserRoleForm
+from .services import UserFilters, access_permissions, list_users
 
 @admin_bp.route('/')
 @require_role('admin')
@@ -17,7 +25,7 @@ def index():
 @admin_bp.route('/roles')
 @require_permission('admin.roles.read')
 def roles():
-    roles = Role.query.all()
+    roles = Role.query.options(selectinload(Role.permissions)).all()
     return render_template('admin/roles.html', roles=roles)
 
 @admin_bp.route('/roles/create', methods=['GET', 'POST'])
@@ -33,6 +41,7 @@ def create_role():
         role.permissions = selected_perms
         db.session.add(role)
         db.session.commit()
+        invalidate_access()
         flash('Role created successfully.', 'success')
         return redirect(url_for('admin.roles'))
         
@@ -58,6 +67,7 @@ def edit_role(id):
         selected_perms = Permission.query.filter(Permission.id.in_(form.permissions.data)).all()
         role.permissions = selected_perms
         db.session.commit()
+        invalidate_access()
         flash('Role updated successfully.', 'success')
         return redirect(url_for('admin.roles'))
         
@@ -66,8 +76,14 @@ def edit_role(id):
 @admin_bp.route('/users')
 @require_permission('admin.users.manage')
 def users():
-    users = User.query.all()
-    return render_template('admin/users.html', users=users)
+    filters = UserFilters.from_args(request.args)
+    page = list_users(filters, cursor=request.args.get('cursor'))
+    roles = Role.query.order_by(Role.name).all()
+    return render_template('admin/users.html',
+                           users=page.users,
+                           next_cursor=page.next_cursor,
+                           filters=filters,
+                           roles=roles)
 
 @admin_bp.route('/users/<int:id>/roles', methods=['GET', 'POST'])
 @require_permission('admin.users.manage')
@@ -83,6 +99,7 @@ def manage_user_roles(id):
         selected_roles = Role.query.filter(Role.id.in_(form.roles.data)).all()
         user.roles = selected_roles
         db.session.commit()
+        invalidate_access(user.id)
         flash(f'Roles updated for {user.username}.', 'success')
         return redirect(url_for('admin.users'))
         
@@ -93,17 +110,24 @@ def manage_user_roles(id):
 def group_permissions():
     """Show group permission management page."""
     ldap = LDAPConnector()
-    ldap_groups = ldap.get_all_groups()
+    # Fetch directory groups while the role and module queries run
+    executor = get_ldap_executor()
+    groups_future = executor.submit(ldap.get_all_groups)
     
-    local_roles = Role.query.all()
-    modules = Module.query.order_by(Module.display_name).all()
+    local_roles = Role.query.options(selectinload(Role.permissions)).all()
+    modules = get_module_index().all()
     
     editable_roles = [r for r in local_roles if not r.is_system]
     
+    ldap_groups = executor.result(groups_future, default=[])
+    if not ldap_groups and not ldap.is_dev and not get_group_cache().is_loaded:
+        flash(get_text('admin.group_permissions.ldap_unavailable'), 'warning')
+    
     return render_template('admin/group_permissions.html', 
                            ldap_groups=ldap_groups, 
                            roles=editable_roles,
-                           modules=modules)
+                           modules=modules,
+                           role_sync=get_role_sync())
 
 @admin_bp.route('/group-permissions/add', methods=['POST'])
 @require_role('admin')
@@ -115,9 +139,22 @@ def add_group():
         return redirect(url_for('admin.group_permissions'))
         
     role = Role.create_from_ldap_group(group_cn)
+    invalidate_access()
+    # Grant the new role to the group's current members
+    get_role_sync().start_background(current_app._get_current_object())
     flash(f'Group {role.name} added successfully.', 'success')
     return redirect(url_for('admin.group_permissions'))
 
+@admin_bp.route('/group-permissions/sync', methods=['POST'])
+@require_role('admin')
+def sync_group_roles():
+    """Start a background LDAP group -> role sync."""
+    if get_role_sync().start_background(current_app._get_current_object()):
+        flash(get_text('admin.group_permissions.sync_started'), 'info')
+    else:
+        flash(get_text('admin.group_permissions.sync_running'), 'warning')
+    return redirect(url_for('admin.group_permissions'))
+
 @admin_bp.route('/group-permissions/update/<int:role_id>', methods=['POST'])
 @require_role('admin')
 def update_group_permissions(role_id):
@@ -130,44 +167,27 @@ def update_group_permissions(role_id):
     if not data:
          return jsonify({'status': 'error', 'message': 'Invalid data'}), 400
          
-    module_names = data.get('modules', [])
-    
-    all_modules = Module.query.all()
-    
-    # Remove all access permissions first
-    current_perms = list(role.permissions)
-    new_perms = []
-    
-    access_perm_names = [f"{m.name}.access" for m in all_modules]
-    
-    for p in current_perms:
-        if p.name not in access_perm_names:
-            new_perms.append(p)
-            
-    # Add new access permissions
-    for mod_name in module_names:
-        perm_name = f"{mod_name}.access"
-        perm = Permission.query.filter_by(name=perm_name).first()
-        
-        # Robustness check: if permission doesn't exist but module does, create it
-        if not perm:
-            module = Module.query.filter_by(name=mod_name).first()
-            if module:
-                perm = Permission(
-                    name=perm_name,
-                    display_name=f"Access {module.display_name}",
-                    description=f"Access permission for {module.display_name}",
-                    module_id=module.id
-                )
-                db.session.add(perm)
-                # db.session.flush() # Not strictly needed as we just append the object
-        
-        if perm:
-            new_perms.append(perm)
-            
-    role.permissions = new_perms
+    module_names = set(data.get('modules', []))
+
+    # One query each for modules, their access permissions and the role's
+    # current permissions, whatever the number of modules
+    modules = {m.name: m for m in Module.query.all()}
+    granted = access_permissions(modules[name] for name in module_names if name in modules)
+    access_perm_names = {f"{name}.access" for name in modules}
+
+    # Keep non-access permissions, replace access permissions with the selection
+    current_perms = set(role.permissions)
+    new_perms = {p for p in current_perms if p.name not in access_perm_names}
+    new_perms.update(granted.values())
+
+    changed = new_perms != current_perms
+    if changed:
+        role.permissions = list(new_perms)
+    # Also persists access permissions created for modules that lacked one
     db.session.commit()
-    
+    if changed:
+        invalidate_access()
+
     return jsonify({'status': 'success', 'message': 'Permissions updated'})
 
 @admin_bp.route('/group-permissions/delete/<int:role_id>', methods=['POST'])
@@ -180,4 +200,5 @@ def delete_group(role_id):
          
     db.session.delete(role)
     db.session.commit()
+    invalidate_access()
     return jsonify({'status': 'success', 'message': 'Group deleted'})
@@ -0,0 +1,317 @@
+"""
+Business logic for the admin module.
+"""
+import base64
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy import delete, func, insert, select, tuple_
+from sqlalchemy.orm import selectinload
+from extensions import db
+from models.rbac import Module, Permission, Role, role_permissions, user_roles
+from models.user import User
+
+# Sortable columns; nullable ones are coalesced so keyset comparisons stay total
+USER_SORT_KEYS = {
+    'username': User.username,
+    'display_name': func.coalesce(User.display_name, ''),
+    'department': func.coalesce(User.department, ''),
+}
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+@dataclass
+class UserFilters:
+    """Search criteria for the admin user list."""
+    q: str = ''
+    role: str = ''
+    department: str = ''
+    sort: str = 'username'
+    direction: str = 'asc'
+
+    @classmethod
+    def from_args(cls, args) -> 'UserFilters':
+        """Build filters from request args, falling back to defaults for invalid values."""
+        sort = args.get('sort', 'username')
+        direction = args.get('direction', 'asc')
+        return cls(
+            q=(args.get('q') or '').strip(),
+            role=(args.get('role') or '').strip(),
+            department=(args.get('department') or '').strip(),
+            sort=sort if sort in USER_SORT_KEYS else 'username',
+            direction=direction if direction in ('asc', 'desc') else 'asc',
+        )
+
+    def as_args(self) -> Dict[str, str]:
+        """Non-empty filters as query-string arguments."""
+        return {k: v for k, v in self.__dict__.items() if v}
+
+
+@dataclass
+class UserPage:
+    """One page of users plus the cursor for the next page (None on the last page)."""
+    users: List[User] = field(default_factory=list)
+    next_cursor: Optional[str] = None
+
+
+def encode_cursor(sort_value: Any, user_id: int) -> str:
+    raw = json.dumps([sort_value, user_id]).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii')
+
+
+def decode_cursor(cursor: Optional[str], sort: str = 'username') -> Optional[List[Any]]:
+    """
+    Decode a cursor for the ``sort`` key.
+
+    Invalid cursors (including a sort value of the wrong type, e.g. from
+    another sort order or a tampered cursor) restart from the first page.
+    """
+    if not cursor:
+        return None
+    try:
+        value, user_id = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')))
+    except (ValueError, TypeError):
+        return None
+    # bool is an int subclass; JSON true/false is never a valid id
+    if not isinstance(user_id, int) or isinstance(user_id, bool):
+        return None
+    if not isinstance(value, USER_SORT_KEYS[sort].type.python_type):
+        return None
+    return [value, user_id]
+
+
+def escape_like(value: str) -> str:
+    """Escape LIKE wildcards so ``value`` is matched literally (escape char ``\\``)."""
+    return value.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+
+
+def list_users(filters: UserFilters, cursor: Optional[str] = None,
+               limit: int = DEFAULT_PAGE_SIZE) -> UserPage:
+    """
+    Return one keyset-paginated page of users.
+
+    Pages are ordered by the sort key with the user id as tie-breaker.
+    ``(sort key, id)`` matches the ``ix_users_sort_*`` expression indexes,
+    so each page is an index range scan instead of an OFFSET.
+
+    Args:
+        filters: Search, role/department filters and sort order
+        cursor: Opaque cursor from a previous page
+        limit: Page size (capped at MAX_PAGE_SIZE)
+    """
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    sort_key = USER_SORT_KEYS[filters.sort]
+    descending = filters.direction == 'desc'
+
+    query = User.query.options(selectinload(User.roles))
+
+    if filters.q:
+        pattern = f"%{escape_like(filters.q)}%"
+        query = query.filter(User.username.ilike(pattern, escape='\\')
+                             | User.display_name.ilike(pattern, escape='\\'))
+    if filters.department:
+        query = query.filter(User.department == filters.department)
+    if filters.role:
+        query = query.filter(User.id.in_(
+            user_roles.select().with_only_columns(user_roles.c.user_id)
+            .join(Role, Role.id == user_roles.c.role_id)
+            .where(Role.name == filters.role)
+        ))
+
+    position = decode_cursor(cursor, filters.sort)
+    if position is not None:
+        keyset = tuple_(sort_key, User.id)
+        query = query.filter(keyset < tuple_(*position) if descending else keyset > tuple_(*position))
+
+    if descending:
+        query = query.order_by(sort_key.desc(), User.id.desc())
+    else:
+        query = query.order_by(sort_key.asc(), User.id.asc())
+
+    # Fetch one extra row to know whether another page exists
+    users = query.limit(limit + 1).all()
+    page = UserPage(users=users[:limit])
+    if len(users) > limit:
+        last = page.users[-1]
+        page.next_cursor = encode_cursor(getattr(last, filters.sort) or '', last.id)
+    return page
+
+
+def serialize_user(user: User) -> Dict[str, Any]:
+    """JSON representation used by the admin user list API."""
+    return {
+        'id': user.id,
+        'username': user.username,
+        'display_name': user.display_name,
+        'department': user.department,
+        'email': user.email,
+        'is_active': user.is_active,
+        'last_login': user.last_login.isoformat() if user.last_login else None,
+        'roles': [r.name for r in user.roles],
+    }
+
+
+BATCH_ACTIONS = ('add', 'remove')
+
+
+@dataclass
+class RBACBatchResult:
+    """Outcome of ``apply_rbac_batch``; ``skipped`` explains every ignored entry."""
+    user_roles_added: int = 0
+    user_roles_removed: int = 0
+    role_modules_added: int = 0
+    role_modules_removed: int = 0
+    skipped: List[str] = field(default_factory=list)
+
+    @property
+    def changed(self) -> bool:
+        return any((self.user_roles_added, self.user_roles_removed,
+                    self.role_modules_added, self.role_modules_removed))
+
+    def as_dict(self) -> Dict[str, Any]:
+        return dict(self.__dict__)
+
+
+def access_permissions(modules: Iterable[Module]) -> Dict[str, Permission]:
+    """
+    Map module names to their ``<module>.access`` permission.
+
+    All permissions are loaded with one ``IN`` query. Missing ones are
+    created (and flushed) so a module can always be granted.
+    """
+    modules = list(modules)
+    if not modules:
+        return {}
+
+    names = {f"{m.name}.access": m for m in modules}
+    existing = {
+        p.name: p for p in Permission.query.filter(Permission.name.in_(names)).all()
+    }
+
+    result = {}
+    for perm_name, module in names.items():
+        perm = existing.get(perm_name)
+        if perm is None:
+            perm = Permission(
+                name=perm_name,
+                display_name=f"Access {module.display_name}",
+                description=f"Access permission for {module.display_name}",
+                module_id=module.id
+            )
+            db.session.add(perm)
+        result[module.name] = perm
+
+    if len(existing) < len(names):
+        db.session.flush()
+    return result
+
+
+def _parse_changes(entries, first: str, second: str,
+                   result: RBACBatchResult) -> List[Tuple[str, str, str]]:
+    """Validate raw batch entries into (action, first, second) triples."""
+    changes = []
+    for index, entry in enumerate(entries or []):
+        if not isinstance(entry, dict):
+            result.skipped.append(f"{first}/{second} #{index}: not an object")
+            continue
+        action = entry.get('action', 'add')
+        a, b = entry.get(first), entry.get(second)
+        if action not in BATCH_ACTIONS or not isinstance(a, str) or not isinstance(b, str) or not a or not b:
+            result.skipped.append(f"{first}/{second} #{index}: invalid entry")
+            continue
+        changes.append((action, a, b))
+    return changes
+
+
+def _apply_pairs(table, left, right, wanted: Dict[Tuple[int, int], str]) -> Tuple[int, int]:
+    """
+    Insert/delete association rows so every pair in ``wanted`` matches its action.
+
+    Existing rows are read with one query; inserts and deletes are single
+    bulk statements. Returns (added, removed).
+    """
+    if not wanted:
+        return 0, 0
+
+    left_ids = {l for l, _ in wanted}
+    right_ids = {r for _, r in wanted}
+    existing = set(db.session.execute(
+        select(left, right).where(left.in_(left_ids), right.in_(right_ids))
+    ).all())
+
+    to_add = [pair for pair, action in wanted.items() if action == 'add' and pair not in existing]
+    to_remove = [pair for pair, action in wanted.items() if action == 'remove' and pair in existing]
+
+    if to_add:
+        db.session.execute(insert(table), [{left.key: l, right.key: r} for l, r in to_add])
+    if to_remove:
+        db.session.execute(delete(table).where(tuple_(left, right).in_(to_remove)))
+    return len(to_add), len(to_remove)
+
+
+def apply_rbac_batch(user_role_changes: Optional[List[Dict]] = None,
+                     role_module_changes: Optional[List[Dict]] = None) -> RBACBatchResult:
+    """
+    Apply many role assignments and module grants in one pass.
+
+    Users, roles, modules and access permissions are each resolved with a
+    single ``IN`` query and the association tables are changed with bulk
+    statements. Entries are idempotent (adding an existing assignment is a
+    no-op) and later entries win over earlier ones for the same pair.
+    Unknown names and system roles are reported in ``skipped``.
+
+    The caller commits and calls ``invalidate_access()``.
+
+    Args:
+        user_role_changes: ``{"user": username, "role": name, "action": "add"|"remove"}``
+        role_module_changes: ``{"role": name, "module": name, "action": "add"|"remove"}``
+    """
+    result = RBACBatchResult()
+    user_changes = _parse_changes(user_role_changes, 'user', 'role', result)
+    module_changes = _parse_changes(role_module_changes, 'role', 'module', result)
+
+    usernames = {u for _, u, _ in user_changes}
+    role_names = {r for _, _, r in user_changes} | {r for _, r, _ in module_changes}
+    module_names = {m for _, _, m in module_changes}
+
+    users: Dict[str, int] = {}
+    if usernames:
+        users = dict(db.session.execute(
+            select(User.username, User.id).where(User.username.in_(usernames))
+        ).all())
+    roles: Dict[str, Role] = {}
+    if role_names:
+        roles = {r.name: r for r in Role.query.filter(Role.name.in_(role_names)).all()}
+    modules: Dict[str, Module] = {}
+    if module_names:
+        modules = {m.name: m for m in Module.query.filter(Module.name.in_(module_names)).all()}
+
+    wanted_user_roles: Dict[Tuple[int, int], str] = {}
+    for action, username, role_name in user_changes:
+        if username not in users:
+            result.skipped.append(f"Unknown user: {username}")
+        elif role_name not in roles:
+            result.skipped.append(f"Unknown role: {role_name}")
+        else:
+            wanted_user_roles[(users[username], roles[role_name].id)] = action
+
+    permissions = access_permissions(modules.values())
+    wanted_role_perms: Dict[Tuple[int, int], str] = {}
+    for action, role_name, module_name in module_changes:
+        role = roles.get(role_name)
+        if role is None:
+            result.skipped.append(f"Unknown role: {role_name}")
+        elif role.is_system:
+            result.skipped.append(f"Cannot modify system role: {role_name}")
+        elif module_name not in permissions:
+            result.skipped.append(f"Unknown module: {module_name}")
+        else:
+            wanted_role_perms[(role.id, permissions[module_name].id)] = action
+
+    result.user_roles_added, result.user_roles_removed = _apply_pairs(
+        user_roles, user_roles.c.user_id, user_roles.c.role_id, wanted_user_roles)
+    result.role_modules_added, result.role_modules_removed = _apply_pairs(
+        role_permissions, role_permissions.c.role_id, role_permissions.c.permission_id, wanted_role_perms)
+    return result
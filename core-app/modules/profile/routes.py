@@ -1,7 +1,11 @@
-from flask import render_template, request, flash, redirect, url_for, send_from_directory, current_app, jsonify
+import os
+from flask import (render_template, request, flash, redirect, url_for, send_from_directory,
+                   current_app, jsonify, session, abort)
 from flask_login import login_required, current_user
+from auth.rbac_cache import get_cached_access, get_effective_access
 from utils.translation import get_text
 from utils.file_upload import FileUploadHandler
+from utils.image_queue import DONE, FAILED, SUPERSEDED, QueueFullError, get_image_queue
 from . import profile_bp
 from .forms import ProfileForm
 from models.user import User
@@ -42,21 +46,46 @@ def upload_photo():
     if not valid:
         return jsonify({'error': error}), 400
         
-    # Delete old photo if exists
-    if current_user.profile_photo:
-        FileUploadHandler.delete_profile_photo(current_user.profile_photo)
-        
-    filename = FileUploadHandler.save_profile_photo(file, current_user.id)
-    if filename:
-        current_user.profile_photo = filename
-        current_user.update_profile({}) # Trigger updated_at
-        return jsonify({
-            'success': True, 
-            'message': get_text('profile.photo_updated'),
-            'url': url_for('profile.get_photo', user_id=current_user.id)
-        })
+    data = file.read()
+    if not FileUploadHandler.is_supported_image(data):
+        return jsonify({'error': get_text('profile.error_file_type')}), 400
     
-    return jsonify({'error': get_text('profile.error_upload')}), 500
+    # Decode and resize in the background; the page polls the job status
+    try:
+        job_id = get_image_queue().submit(current_user.id, data)
+    except QueueFullError as e:
+        current_app.logger.warning(f"Photo upload refused: {e}")
+        response = jsonify({'error': get_text('profile.error_busy')})
+        response.status_code = 429 if e.per_user else 503
+        response.headers['Retry-After'] = '5'
+        return response
+    return _photo_job_response(job_id)
+
+def _photo_job_response(job_id):
+    state = get_image_queue().status(job_id, current_user)
+    body = {
+        'job': job_id,
+        'status': state,
+        'status_url': url_for('profile.photo_job_status', job_id=job_id),
+    }
+    if state == DONE:
+        body.update(success=True, message=get_text('profile.photo_updated'),
+                    url=current_user.get_profile_photo_url())
+        return jsonify(body)
+    if state == FAILED:
+        body['error'] = get_text('profile.error_upload')
+        return jsonify(body), 500
+    if state == SUPERSEDED:
+        body['error'] = get_text('profile.photo_superseded')
+        return jsonify(body), 409
+    body['message'] = get_text('profile.photo_processing')
+    return jsonify(body), 202
+
+@profile_bp.route('/photo-jobs/<job_id>')
+@login_required
+def photo_job_status(job_id):
+    """Processing state of one of the current user's photo uploads."""
+    return _photo_job_response(job_id)
 
 @profile_bp.route('/delete-photo', methods=['POST'])
 @login_required
@@ -72,11 +101,75 @@ def delete_photo():
 def get_photo(user_id):
     user = User.query.get_or_404(user_id)
     
-    if user.profile_photo:
-        return send_from_directory(
-            FileUploadHandler.UPLOAD_FOLDER, 
-            user.profile_photo
-        )
-    else:
+    if not user.profile_photo:
         # Return 404 or default placeholder if we had one
         return "No photo", 404
+    
+    if FileUploadHandler.photo_digest(user.profile_photo):
+        # Unversioned URL: point the browser at the immutable, cacheable one
+        return redirect(user.get_profile_photo_url(request.args.get('size', type=int)))
+    
+    # Legacy single-file photo: revalidate every time (werkzeug ETag + 304)
+    response = send_from_directory(FileUploadHandler.UPLOAD_FOLDER, user.profile_photo, max_age=0)
+    response.cache_control.no_cache = True
+    return response
+
+def _accepted_photo_formats():
+    """Stored formats the browser accepts, best first (JPEG always)."""
+    return [
+        ext for ext in FileUploadHandler.photo_formats()
+        if ext == 'jpg' or FileUploadHandler.PHOTO_FORMATS[ext][1] in request.accept_mimetypes
+    ]
+
+def _cache_photo(response, etag):
+    response.set_etag(etag)
+    response.cache_control.no_cache = None
+    response.cache_control.private = True
+    response.cache_control.max_age = current_app.config.get('PROFILE_PHOTO_MAX_AGE', 31536000)
+    response.cache_control.immutable = True
+    response.vary.add('Accept')
+    return response
+
+@profile_bp.route('/photos/<digest>/<int:size>')
+def photo_variant(digest, size):
+    """
+    Serve one immutable photo variant (URL from ``User.get_profile_photo_url``).
+
+    Runs without a database query once the session's user is in the
+    process-wide access cache (which also records deactivated accounts);
+    the content hash names the files, and revalidations are answered with
+    304 before the file system is touched.
+    """
+    access = None
+    user_id = session.get('_user_id')
+    if user_id and str(user_id).isdigit():
+        access = get_cached_access(int(user_id))
+    if access is None and current_user.is_authenticated:
+        access = get_effective_access(current_user)
+    if access is None or not access.active:
+        return current_app.login_manager.unauthorized()
+    if not FileUploadHandler.VARIANT_PATTERN.match(f"{digest}_{size}.jpg") \
+            or size not in FileUploadHandler.photo_sizes():
+        abort(404)
+    
+    formats = _accepted_photo_formats()
+    for ext in formats:
+        etag = f"{digest}-{size}-{ext}"
+        if request.if_none_match.contains(etag):
+            return _cache_photo(current_app.response_class(status=304), etag)
+    
+    for ext in formats:
+        filename = f"{digest}_{size}.{ext}"
+        if os.path.exists(os.path.join(FileUploadHandler.UPLOAD_FOLDER, filename)):
+            break
+    else:
+        abort(404)
+    
+    accel_prefix = current_app.config.get('PROFILE_PHOTO_ACCEL_PREFIX')
+    if accel_prefix:
+        # nginx streams the file from its internal location
+        response = current_app.response_class(mimetype=FileUploadHandler.PHOTO_FORMATS[ext][1])
+        response.headers['X-Accel-Redirect'] = accel_prefix.rstrip('/') + '/' + filename
+    else:
+        response = send_from_directory(FileUploadHandler.UPLOAD_FOLDER, filename, etag=False)
+    return _cache_photo(response, f"{digest}-{size}-{ext}")
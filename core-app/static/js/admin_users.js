@@ -0,0 +1,149 @@
+document.addEventListener('DOMContentLoaded', function() {
+    const rows = document.getElementById('user-rows');
+    if (!rows) {
+        return;
+    }
+
+    function escapeHtml(value) {
+        const div = document.createElement('div');
+        div.textContent = value == null ? '' : String(value);
+        return div.innerHTML;
+    }
+
+    // --- Bulk role assignment ---
+    const bulkBar = document.getElementById('bulk-roles');
+    const selectAll = document.getElementById('select-all-users');
+
+    function selectedUsernames() {
+        return Array.from(rows.querySelectorAll('.user-select:checked')).map(box => box.value);
+    }
+
+    function updateBulkBar() {
+        if (!bulkBar) {
+            return;
+        }
+        const count = selectedUsernames().length;
+        document.getElementById('bulk-selected-count').textContent = count;
+        bulkBar.querySelectorAll('[data-bulk-action]').forEach(btn => { btn.disabled = count === 0; });
+    }
+
+    rows.addEventListener('change', function(e) {
+        if (e.target.classList.contains('user-select')) {
+            updateBulkBar();
+        }
+    });
+
+    if (selectAll) {
+        selectAll.addEventListener('change', function() {
+            rows.querySelectorAll('.user-select').forEach(box => { box.checked = selectAll.checked; });
+            updateBulkBar();
+        });
+    }
+
+    if (bulkBar) {
+        bulkBar.querySelectorAll('[data-bulk-action]').forEach(button => {
+            button.addEventListener('click', function() {
+                const action = this.getAttribute('data-bulk-action');
+                const role = document.getElementById('bulk-role').value;
+                const usernames = selectedUsernames();
+                if (!role || usernames.length === 0) {
+                    return;
+                }
+
+                const csrfMeta = document.querySelector('meta[name="csrf-token"]');
+                const csrfToken = csrfMeta ? csrfMeta.getAttribute('content') : null;
+
+                const originalText = this.innerHTML;
+                this.disabled = true;
+                this.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Speichern...';
+
+                fetch(bulkBar.getAttribute('data-api-url'), {
+                    method: 'POST',
+                    headers: {
+                        'Content-Type': 'application/json',
+                        'X-CSRFToken': csrfToken
+                    },
+                    body: JSON.stringify({
+                        user_roles: usernames.map(user => ({ user: user, role: role, action: action }))
+                    })
+                })
+                .then(response => {
+                    if (!response.ok) {
+                        // API errors carry a JSON message (e.g. a missing permission)
+                        return response.json()
+                            .catch(() => ({}))
+                            .then(data => { throw new Error(data.message || 'Server Error'); });
+                    }
+                    return response.json();
+                })
+                .then(data => {
+                    if (data.skipped && data.skipped.length) {
+                        alert(data.skipped.join('\n'));
+                    }
+                    window.location.reload();
+                })
+                .catch(error => {
+                    console.error('Error updating roles:', error);
+                    alert('Fehler beim Speichern der Rollen.\n' + error.message);
+                    this.disabled = false;
+                    this.innerHTML = originalText;
+                });
+            });
+        });
+    }
+
+    // --- Incremental loading of the admin user list ---
+    const button = document.getElementById('load-more-users');
+    if (!button) {
+        return;
+    }
+
+    function renderRow(user) {
+        const roles = user.roles
+            .map(name => `<span class="badge bg-primary">${escapeHtml(name)}</span>`)
+            .join('\n');
+        const tr = document.createElement('tr');
+        tr.innerHTML = `
+            <td><input type="checkbox" class="form-check-input user-select" value="${escapeHtml(user.username)}"></td>
+            <td>${escapeHtml(user.username)}</td>
+            <td>${escapeHtml(user.display_name)}</td>
+            <td>${escapeHtml(user.department)}</td>
+            <td>${roles}</td>
+            <td><a href="/admin/users/${user.id}/roles" class="btn btn-sm btn-secondary">Manage Roles</a></td>`;
+        return tr;
+    }
+
+    button.addEventListener('click', function(e) {
+        e.preventDefault();
+        const cursor = this.getAttribute('data-next-cursor');
+        const url = new URL(this.getAttribute('data-api-url'), window.location.origin);
+        url.searchParams.set('cursor', cursor);
+
+        const originalText = this.innerHTML;
+        this.classList.add('disabled');
+        this.innerHTML = '<i class="fas fa-spinner fa-spin"></i> Laden...';
+
+        fetch(url, { headers: { 'Accept': 'application/json' } })
+            .then(response => {
+                if (!response.ok) {
+                    throw new Error('Server Error');
+                }
+                return response.json();
+            })
+            .then(data => {
+                data.users.forEach(user => rows.appendChild(renderRow(user)));
+                if (data.next_cursor) {
+                    button.setAttribute('data-next-cursor', data.next_cursor);
+                    button.classList.remove('disabled');
+                    button.innerHTML = originalText;
+                } else {
+                    button.remove();
+                }
+            })
+            .catch(error => {
+                console.error('Error loading users:', error);
+                // Fall back to the server-rendered next page
+                window.location.href = button.getAttribute('href');
+            });
+    });
+});
@@ -99,19 +99,7 @@ document.addEventListener('DOMContentLoaded', function() {
                 }
             })
             .then(response => response.json())
-            .then(data => {
-                if (data.success) {
-                    progressBar.style.width = '100%';
-                    progressBar.classList.add('bg-success');
-                    showMessage(data.message, 'text-success');
-                    setTimeout(() => {
-                        window.location.reload(); 
-                    }, 1000);
-                } else {
-                    progressBar.classList.add('bg-danger');
-                    showMessage(data.error, 'text-danger');
-                }
-            })
+            .then(handleJob)
             .catch(error => {
                 progressBar.classList.add('bg-danger');
                 showMessage('Upload failed', 'text-danger');
@@ -119,6 +107,37 @@ document.addEventListener('DOMContentLoaded', function() {
             });
         }
 
+        // The server resizes the photo in the background: poll until it is done
+        const POLL_INTERVAL_MS = 500;
+        const POLL_LIMIT = 60;
+
+        function handleJob(data, attempt = 0) {
+            if (data.success) {
+                progressBar.style.width = '100%';
+                progressBar.classList.add('bg-success');
+                showMessage(data.message, 'text-success');
+                setTimeout(() => {
+                    window.location.reload(); 
+                }, 1000);
+            } else if (data.status === 'pending' && attempt < POLL_LIMIT) {
+                progressBar.style.width = Math.min(90, 30 + attempt * 5) + '%';
+                showMessage(data.message, 'text-muted');
+                setTimeout(() => {
+                    fetch(data.status_url, { headers: { 'Accept': 'application/json' } })
+                        .then(response => response.json())
+                        .then(next => handleJob(next, attempt + 1))
+                        .catch(error => {
+                            progressBar.classList.add('bg-danger');
+                            showMessage(messages.errorUpload || 'Upload failed', 'text-danger');
+                            console.error('Error:', error);
+                        });
+                }, POLL_INTERVAL_MS);
+            } else {
+                progressBar.classList.add('bg-danger');
+                showMessage(data.error || messages.errorUpload || 'Upload failed', 'text-danger');
+            }
+        }
+
         function showMessage(msg, className) {
             messageArea.textContent = msg;
             messageArea.className = 'mt-2 small ' + className;
@@ -1,64 +1,113 @@
-import os
+import threading
+from typing import Dict, List, Optional, Tuple
 from flask import current_app, url_for
 from flask_login import current_user
 from extensions import db
-from models.rbac import Module
+from auth.rbac_cache import EffectiveAccess, get_access_cache, get_effective_access
+from utils.module_registry import get_module_index
+
+
+class SidebarMenuCache:
+    """
+    Precomputed sidebar entries shared by all requests of a worker.
+
+    The enabled-module list comes from the in-memory ModuleIndex and is
+    rebuilt only when the index is reloaded or the shared RBAC version
+    changes, which ModuleRegistry.sync_database bumps. Rendered menus are
+    memoized per effective-access set, so users with the same roles and
+    permissions share one menu list.
+    """
+
+    MAX_MENUS = 256
+
+    def __init__(self):
+        self._version: Optional[Tuple[int, int]] = None
+        self._dashboard: Optional[Dict] = None
+        self._modules: List[Dict] = []
+        self._menus: Dict[EffectiveAccess, List[Dict]] = {}
+        self._lock = threading.Lock()
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._version = None
+            self._modules = []
+            self._menus = {}
+
+    def _build_modules(self) -> List[Dict]:
+        entries = []
+        # Enabled modules with a registered blueprint, by order then name
+        for mod in get_module_index().active():
+            if mod.name == 'admin':
+                # Force correct URL for admin module
+                try:
+                    url = url_for('admin.index')
+                except Exception:
+                    url = mod.url_prefix or '#'
+            else:
+                url = mod.url_prefix if mod.url_prefix else '#'
+
+            entries.append({
+                'permission': f"{mod.name}.access",
+                'item': {'name': mod.display_name, 'url': url, 'icon': mod.icon},
+            })
+        return entries
+
+    def _ensure_current(self) -> None:
+        rbac_version = get_access_cache().current_version()
+        version = (rbac_version, get_module_index().version)
+        if rbac_version is not None and version == self._version and self._dashboard is not None:
+            return
+
+        dashboard = {
+            'name': 'Dashboard',
+            'url': url_for('main.index'),
+            'icon': 'fa-tachometer-alt'
+        }
+        modules = self._build_modules()
+        with self._lock:
+            self._dashboard = dashboard
+            self._modules = modules
+            self._menus = {}
+            self._version = version
+
+    def get_menu(self, access: EffectiveAccess) -> List[Dict]:
+        """Return the sidebar entries visible with ``access``."""
+        self._ensure_current()
+
+        menu = self._menus.get(access)
+        if menu is not None:
+            return menu
+
+        is_admin = 'admin' in access.roles
+        menu = [self._dashboard] + [
+            entry['item'] for entry in self._modules
+            if is_admin or entry['permission'] in access.permissions
+        ]
+        with self._lock:
+            if len(self._menus) >= self.MAX_MENUS:
+                self._menus = {}
+            self._menus[access] = menu
+        return menu
+
+
+def get_sidebar_cache() -> SidebarMenuCache:
+    """Return the current app's sidebar cache, creating it on first use."""
+    return current_app.extensions.setdefault('sidebar_menu', SidebarMenuCache())
+
 
 def inject_sidebar_menu():
     def get_sidebar_menu():
         if not current_user.is_authenticated:
             return []
-            
-        menu = []
-        
-        # Dashboard
-        menu.append({
-            'name': 'Dashboard',
-            'url': url_for('main.index'),
-            'icon': 'fa-tachometer-alt'
-        })
-        
-        def module_exists(name):
-            """Check if module directory has config.json"""
-            module_path = os.path.join(current_app.root_path, 'modules', name)
-            config_file = os.path.join(module_path, 'config.json')
-            return os.path.exists(config_file)
-
-        # Dynamic Modules
+
         try:
-            modules = Module.query.filter_by(is_enabled=True).all()
-            
-            # Filter valid modules
-            valid_modules = [m for m in modules if module_exists(m.name)]
-            
-            valid_modules.sort(key=lambda x: x.display_name)
-
-            for mod in valid_modules:
-                # Check permission
-                perm_name = f"{mod.name}.access"
-                if current_user.has_role('admin') or current_user.has_permission(perm_name):
-                    # FIX: Use url_for if module is 'admin' or others to ensure relative path is correct.
-                    # Or assume url_prefix is relative and safe.
-                    # If mod.url_prefix is '/admin', it works.
-                    # But if 'Administration' is broken, let's debug.
-                    
-                    if mod.name == 'admin':
-                        # Force correct URL for admin module
-                        try:
-                            url = url_for('admin.index')
-                        except:
-                            url = mod.url_prefix or '#'
-                    else:
-                        url = mod.url_prefix if mod.url_prefix else '#'
-                        
-                    menu.append({
-                        'name': mod.display_name,
-                        'url': url,
-                        'icon': mod.icon
-                    })
+            return get_sidebar_cache().get_menu(get_effective_access(current_user))
         except Exception:
-            pass
-            
-        return menu
-        
+            db.session.rollback()
+            return [{
+                'name': 'Dashboard',
+                'url': url_for('main.index'),
+                'icon': 'fa-tachometer-alt'
+            }]
+
     return dict(get_sidebar_menu=get_sidebar_menu)
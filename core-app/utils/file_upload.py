@@ -1,7 +1,10 @@
+import hashlib
+import io
 import os
-import time
-from werkzeug.utils import secure_filename
-from PIL import Image
+import re
+import tempfile
+from typing import Dict, List, Optional, Tuple
+from PIL import Image, ImageOps, features
 from flask import current_app
 
 class FileUploadHandler:
@@ -9,6 +12,17 @@ class FileUploadHandler:
     MAX_FILE_SIZE = 2 * 1024 * 1024  # 2MB
     UPLOAD_FOLDER = '/opt/admin-panel/data/uploads/profiles'
 
+    # Square edge lengths (px) written for every photo; the largest is the "main" JPEG
+    PHOTO_SIZES = (32, 64, 300)
+    # Extension -> (Pillow format, mimetype, save options); JPEG is always written
+    PHOTO_FORMATS: Dict[str, Tuple[str, str, dict]] = {
+        'avif': ('AVIF', 'image/avif', {'quality': 60}),
+        'webp': ('WEBP', 'image/webp', {'quality': 80, 'method': 4}),
+        'jpg': ('JPEG', 'image/jpeg', {'quality': 85, 'optimize': True, 'progressive': True}),
+    }
+    # <content hash>_<size>.<ext>; older uploads are single user_<id>_<timestamp>.jpg files
+    VARIANT_PATTERN = re.compile(r'^(?P<digest>[0-9a-f]{24})_(?P<size>\d+)\.(?P<ext>[a-z]+)$')
+
     @staticmethod
     def allowed_file(filename):
         return '.' in filename and \
@@ -34,14 +48,123 @@ class FileUploadHandler:
         return True, None
 
     @staticmethod
-    def generate_filename(user_id):
-        timestamp = int(time.time())
-        return secure_filename(f"user_{user_id}_{timestamp}.jpg")
+    def is_supported_image(data: bytes) -> bool:
+        """Check the image header only (no decode) before queueing the upload."""
+        try:
+            with Image.open(io.BytesIO(data)) as image:
+                return image.format in ('JPEG', 'PNG')
+        except Exception:
+            return False
+
+    @staticmethod
+    def photo_sizes() -> Tuple[int, ...]:
+        return tuple(sorted(current_app.config.get('PROFILE_PHOTO_SIZES') or FileUploadHandler.PHOTO_SIZES))
+
+    @staticmethod
+    def photo_formats() -> List[str]:
+        """Extensions written for every size, best first; 'jpg' always included."""
+        configured = current_app.config.get('PROFILE_PHOTO_FORMATS') or ['webp']
+        formats = [
+            ext for ext in FileUploadHandler.PHOTO_FORMATS
+            if ext != 'jpg' and ext in configured and features.check(ext)
+        ]
+        return formats + ['jpg']
+
+    @staticmethod
+    def content_digest(data: bytes, user_id) -> str:
+        """Name shared by all variants of one upload (per user, so deletes never collide)."""
+        return hashlib.sha256(f"{user_id}:".encode() + data).hexdigest()[:24]
+
+    @staticmethod
+    def photo_digest(filename: str) -> Optional[str]:
+        """Content hash of a stored photo, or None for single-file legacy photos."""
+        match = FileUploadHandler.VARIANT_PATTERN.match(filename)
+        return match.group('digest') if match else None
+
+    @staticmethod
+    def closest_size(size: Optional[int] = None) -> int:
+        """Smallest configured size of at least ``size`` px (the largest if none is)."""
+        sizes = FileUploadHandler.photo_sizes()
+        if not size:
+            return sizes[-1]
+        return next((s for s in sizes if s >= size), sizes[-1])
+
+    @staticmethod
+    def variant_filename(filename: str, size: Optional[int] = None, ext: str = 'jpg') -> str:
+        """
+        Return the stored variant of ``filename`` closest to ``size`` in format ``ext``.
+
+        Photos from before the derivative pipeline have a single file and
+        are returned unchanged.
+        """
+        digest = FileUploadHandler.photo_digest(filename)
+        if digest is None:
+            return filename
+        return f"{digest}_{FileUploadHandler.closest_size(size)}.{ext}"
+
+    @staticmethod
+    def variant_filenames(filename: str) -> List[str]:
+        """All files belonging to a stored photo (every size and format)."""
+        match = FileUploadHandler.VARIANT_PATTERN.match(filename)
+        if not match:
+            return [filename]
+        digest = match.group('digest')
+        return [
+            f"{digest}_{size}.{ext}"
+            for size in FileUploadHandler.photo_sizes()
+            for ext in FileUploadHandler.PHOTO_FORMATS
+        ]
+
+    @staticmethod
+    def _write_atomic(image, filepath, ext):
+        pil_format, _, options = FileUploadHandler.PHOTO_FORMATS[ext]
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(filepath), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as tmp:
+                image.save(tmp, pil_format, **options)
+            os.replace(tmp_path, filepath)
+        except Exception:
+            os.unlink(tmp_path)
+            raise
+
+    @staticmethod
+    def render_variants(file, digest) -> str:
+        """
+        Decode an upload once and write every size/format variant.
+
+        JPEG sources are decoded at reduced scale with ``Image.draft`` (the
+        decoder skips DCT detail the largest variant does not need), then the
+        image is cropped to a centered square and each size is derived from
+        the previous one with ``thumbnail``. Existing files are kept, since
+        the same digest always produces the same output.
+
+        Returns:
+            Filename of the largest JPEG variant (stored on the user)
+        """
+        sizes = sorted(FileUploadHandler.photo_sizes(), reverse=True)
+        formats = FileUploadHandler.photo_formats()
+        resample = getattr(Image, 'Resampling', Image).LANCZOS
+
+        with Image.open(file) as source:
+            # Keeps both edges >= the largest size, so the square crop still covers it
+            source.draft('RGB', (sizes[0], sizes[0]))
+            image = ImageOps.exif_transpose(source).convert('RGB')
+
+        edge = min(image.size)
+        left, top = (image.width - edge) // 2, (image.height - edge) // 2
+        image = image.crop((left, top, left + edge, top + edge))
+
+        for size in sizes:
+            image.thumbnail((size, size), resample, reducing_gap=3.0)
+            for ext in formats:
+                filepath = os.path.join(FileUploadHandler.UPLOAD_FOLDER, f"{digest}_{size}.{ext}")
+                if not os.path.exists(filepath):
+                    FileUploadHandler._write_atomic(image, filepath, ext)
+
+        return f"{digest}_{sizes[0]}.jpg"
 
     @staticmethod
     def save_profile_photo(file, user_id):
-        filename = FileUploadHandler.generate_filename(user_id)
-        
         if not os.path.exists(FileUploadHandler.UPLOAD_FOLDER):
             try:
                 os.makedirs(FileUploadHandler.UPLOAD_FOLDER, exist_ok=True)
@@ -49,16 +172,10 @@ class FileUploadHandler:
                 current_app.logger.error(f"Error creating upload directory: {e}")
                 return None
 
-        filepath = os.path.join(FileUploadHandler.UPLOAD_FOLDER, filename)
-        
         try:
-            image = Image.open(file)
-            image = image.convert('RGB')
-            # Use getattr for compatibility
-            resample = getattr(Image, 'Resampling', Image).LANCZOS
-            image = image.resize((300, 300), resample)
-            image.save(filepath, "JPEG", quality=85)
-            return filename
+            data = file.read()
+            file.seek(0)
+            return FileUploadHandler.render_variants(file, FileUploadHandler.content_digest(data, user_id))
         except Exception as e:
             current_app.logger.error(f"Error saving profile photo: {e}")
             return None
@@ -68,9 +185,10 @@ class FileUploadHandler:
         if not filename:
             return
         
-        filepath = os.path.join(FileUploadHandler.UPLOAD_FOLDER, filename)
-        if os.path.exists(filepath):
-            try:
-                os.remove(filepath)
-            except Exception as e:
-                current_app.logger.error(f"Error deleting profile photo: {e}")
+        for name in FileUploadHandler.variant_filenames(filename):
+            filepath = os.path.join(FileUploadHandler.UPLOAD_FOLDER, name)
+            if os.path.exists(filepath):
+                try:
+                    os.remove(filepath)
+                except Exception as e:
+                    current_app.logger.error(f"Error deleting profile photo: {e}")
@@ -0,0 +1,257 @@
+"""
+In-process queue for profile photo processing.
+
+``upload_photo`` hands the raw upload to ``ImageJobQueue.submit`` and
+answers 202 right away; a small thread pool decodes the image, writes the
+derivatives (``FileUploadHandler.render_variants``) and only then points
+the user at the new photo. Pillow releases the GIL while decoding and
+resampling, so the pool's threads do not stall request threads.
+
+The job id is the photo's content hash. Job state is not shared between
+gunicorn workers, so ``status`` also derives it from what every worker can
+see: the job is done once the user's stored photo carries that hash, and
+a failure leaves a marker file next to the photos.
+
+Each worker holds at most ``max_pending`` unprocessed uploads, and at most
+``max_pending_per_user`` per user; further uploads are refused
+(``QueueFullError``). Only a user's latest upload is applied: ``submit``
+records it in a ``<user_id>.latest`` marker, and an older job that is
+still queued or finishes later is discarded instead of replacing the
+newer photo.
+"""
+import io
+import logging
+import os
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional
+from flask import Flask, current_app
+from extensions import db
+from utils.file_upload import FileUploadHandler
+
+logger = logging.getLogger(__name__)
+
+_init_lock = threading.Lock()
+
+PENDING = 'pending'
+DONE = 'done'
+FAILED = 'failed'
+SUPERSEDED = 'superseded'
+
+
+class QueueFullError(Exception):
+    """An upload was refused because too many are waiting to be processed.
+
+    Attributes:
+        per_user: True if the user's own limit was hit (else the worker's)
+    """
+
+    def __init__(self, message: str, per_user: bool):
+        super().__init__(message)
+        self.per_user = per_user
+
+
+class ImageJobQueue:
+    """
+    Bounded thread pool running photo jobs inside an application context.
+
+    Attributes:
+        max_workers: Threads per worker process (0 processes uploads inline)
+        max_jobs: Finished job states remembered in memory
+        max_pending: Uploads waiting or running per worker process
+        max_pending_per_user: Uploads of one user waiting or running
+    """
+
+    def __init__(self, app: Flask, max_workers: int = 2, max_jobs: int = 1000,
+                 max_pending: int = 20, max_pending_per_user: int = 2):
+        self.app = app
+        self.max_workers = max_workers
+        self.max_jobs = max_jobs
+        self.max_pending = max_pending
+        self.max_pending_per_user = max_pending_per_user
+        self._jobs: 'OrderedDict[str, str]' = OrderedDict()
+        self._pending: Dict[int, int] = {}
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_config(cls, app: Flask) -> 'ImageJobQueue':
+        config = app.config
+        return cls(
+            app,
+            max_workers=config.get('PHOTO_QUEUE_WORKERS', 2),
+            max_pending=config.get('PHOTO_QUEUE_MAX_PENDING', 20),
+            max_pending_per_user=config.get('PHOTO_QUEUE_MAX_PER_USER', 2),
+        )
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        # Threads are created lazily and never inherited across fork (gunicorn preload)
+        if self._executor is None or self._pid != os.getpid():
+            with self._lock:
+                if self._executor is None or self._pid != os.getpid():
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=self.max_workers, thread_name_prefix='image-job'
+                    )
+                    self._pid = os.getpid()
+        return self._executor
+
+    def _set_state(self, job_id: str, state: str) -> None:
+        with self._lock:
+            self._jobs[job_id] = state
+            self._jobs.move_to_end(job_id)
+            while len(self._jobs) > self.max_jobs:
+                self._jobs.popitem(last=False)
+
+    @staticmethod
+    def _failure_marker(job_id: str) -> str:
+        return os.path.join(FileUploadHandler.UPLOAD_FOLDER, f"{job_id}.failed")
+
+    @staticmethod
+    def _latest_marker(user_id: int) -> str:
+        return os.path.join(FileUploadHandler.UPLOAD_FOLDER, f"{user_id}.latest")
+
+    def _write_latest(self, user_id: int, job_id: str) -> None:
+        path = self._latest_marker(user_id)
+        try:
+            os.makedirs(FileUploadHandler.UPLOAD_FOLDER, exist_ok=True)
+            with open(f"{path}.{os.getpid()}", 'w') as f:
+                f.write(job_id)
+            os.replace(f"{path}.{os.getpid()}", path)
+        except OSError as e:
+            logger.warning(f"Cannot record latest photo job for user {user_id}: {e}")
+
+    def _latest_job(self, user_id: int) -> Optional[str]:
+        try:
+            with open(self._latest_marker(user_id)) as f:
+                return f.read().strip() or None
+        except OSError:
+            return None
+
+    def _is_superseded(self, user_id: int, job_id: str) -> bool:
+        latest = self._latest_job(user_id)
+        return latest is not None and latest != job_id
+
+    def submit(self, user_id: int, data: bytes) -> str:
+        """
+        Queue processing of an uploaded photo for ``user_id``.
+
+        Returns:
+            Job id (the photo's content hash)
+
+        Raises:
+            QueueFullError: The user or this worker has too many uploads pending
+        """
+        with self._lock:
+            if self._pending.get(user_id, 0) >= self.max_pending_per_user:
+                raise QueueFullError(f"user {user_id} has {self.max_pending_per_user} photo(s) pending", True)
+            if sum(self._pending.values()) >= self.max_pending:
+                raise QueueFullError(f"{self.max_pending} photo(s) pending", False)
+            self._pending[user_id] = self._pending.get(user_id, 0) + 1
+
+        job_id = FileUploadHandler.content_digest(data, user_id)
+        self._set_state(job_id, PENDING)
+        self._write_latest(user_id, job_id)
+        if self.max_workers:
+            try:
+                self._get_executor().submit(self._run, user_id, data, job_id)
+            except RuntimeError:
+                self._done(user_id)
+                raise
+        else:
+            self._run(user_id, data, job_id)
+        return job_id
+
+    def _done(self, user_id: int) -> None:
+        with self._lock:
+            remaining = self._pending.get(user_id, 0) - 1
+            if remaining > 0:
+                self._pending[user_id] = remaining
+            else:
+                self._pending.pop(user_id, None)
+
+    def _run(self, user_id: int, data: bytes, job_id: str) -> None:
+        try:
+            self._process(user_id, data, job_id)
+        finally:
+            self._done(user_id)
+
+    def _process(self, user_id: int, data: bytes, job_id: str) -> None:
+        from models.user import User
+
+        with self.app.app_context():
+            try:
+                if self._is_superseded(user_id, job_id):
+                    self._set_state(job_id, SUPERSEDED)
+                    return
+                filename = FileUploadHandler.save_profile_photo(io.BytesIO(data), user_id)
+                if not filename:
+                    raise ValueError("image could not be processed")
+
+                # The row lock orders concurrent jobs of one user across workers
+                user = db.session.get(User, user_id, with_for_update=True)
+                if user is None:
+                    FileUploadHandler.delete_profile_photo(filename)
+                    raise ValueError(f"user {user_id} no longer exists")
+                if self._is_superseded(user_id, job_id):
+                    # A newer upload (other content, other files) replaces this one
+                    db.session.rollback()
+                    FileUploadHandler.delete_profile_photo(filename)
+                    self._set_state(job_id, SUPERSEDED)
+                    return
+                # Delete old photo if exists (re-uploading the same image keeps its files)
+                old_photo = user.profile_photo
+                user.profile_photo = filename
+                user.update_profile({})  # Trigger updated_at and commit
+                if old_photo and old_photo != filename:
+                    FileUploadHandler.delete_profile_photo(old_photo)
+
+                if os.path.exists(self._failure_marker(job_id)):
+                    os.remove(self._failure_marker(job_id))
+                self._set_state(job_id, DONE)
+            except Exception as e:
+                db.session.rollback()
+                logger.error(f"Photo job {job_id} for user {user_id} failed: {e}")
+                self._set_state(job_id, FAILED)
+                try:
+                    open(self._failure_marker(job_id), 'w').close()
+                except OSError:
+                    pass
+
+    def status(self, job_id: str, user) -> str:
+        """State of ``job_id`` (pending, done, failed or superseded) for its owner ``user``."""
+        if user.profile_photo and FileUploadHandler.photo_digest(user.profile_photo) == job_id:
+            return DONE
+        state = self._jobs.get(job_id)
+        if state is not None:
+            return state
+        # Submitted to another worker process
+        if os.path.exists(self._failure_marker(job_id)):
+            return FAILED
+        if self._is_superseded(user.id, job_id):
+            return SUPERSEDED
+        return PENDING
+
+    def shutdown(self) -> None:
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=True)
+                self._executor = None
+
+
+def init_image_queue(app: Flask) -> ImageJobQueue:
+    """Create the photo job queue for ``app`` and store it in ``app.extensions``."""
+    queue = ImageJobQueue.from_config(app)
+    app.extensions['image_queue'] = queue
+    return queue
+
+
+def get_image_queue() -> ImageJobQueue:
+    """Return the current app's photo job queue, creating it lazily."""
+    app = current_app._get_current_object()
+    if 'image_queue' not in app.extensions:
+        with _init_lock:
+            if 'image_queue' not in app.extensions:
+                init_image_queue(app)
+    return app.extensions['image_queue']
@@ -1,7 +1,27 @@
 import os
 import json
+import hashlib
+import importlib
+import logging
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Tuple
+from flask import Flask, current_app
+from sqlalchemy import bindparam, insert, select, update
 from extensions import db
 from models.rbac import Module, Permission
+from auth.rbac_cache import invalidate_access
+
+# Module columns written from config.json (besides name and config_hash)
+MODULE_FIELDS = ('display_name', 'description', 'icon', 'url_prefix', 'is_enabled')
+PERMISSION_FIELDS = ('display_name', 'description', 'module_id')
+
+logger = logging.getLogger(__name__)
+
+_init_lock = threading.Lock()
+
 
 class ModuleRegistry:
     def __init__(self, app=None):
@@ -14,60 +34,94 @@ class ModuleRegistry:
         # We can add a CLI command here if needed
         pass
 
-    def sync_database(self):
-        """Sync discovered modules to database."""
-        if not self.app:
-            raise RuntimeError("ModuleRegistry not initialized with app")
-            
-        with self.app.app_context():
-            modules_dir = os.path.join(self.app.root_path, 'modules')
-            if not os.path.exists(modules_dir):
-                print(f"Modules directory not found: {modules_dir}")
-                return
+    @property
+    def modules_dir(self) -> str:
+        return os.path.join(self.app.root_path, 'modules')
 
-            print(f"Scanning modules in {modules_dir}...")
-            for module_name in os.listdir(modules_dir):
-                module_path = os.path.join(modules_dir, module_name)
-                if os.path.isdir(module_path) and not module_name.startswith('__'):
-                    config_file = os.path.join(module_path, 'config.json')
-                    if os.path.exists(config_file):
-                        try:
-                            self._sync_module_to_db(module_name, module_path)
-                        except Exception as e:
-                            print(f"Failed to sync module {module_name}: {e}")
-
-    def _sync_module_to_db(self, module_name, module_path):
-        config_file = os.path.join(module_path, 'config.json')
-        metadata = {}
-        
-        if os.path.exists(config_file):
-            try:
-                with open(config_file, 'r') as f:
-                    metadata = json.load(f)
-            except Exception as e:
-                print(f"Error reading config for {module_name}: {e}")
-        
+    def read_configs(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Read every module's config.json (without importing any module code).
+
+        Returns:
+            Package directory name -> parsed config ({} if unreadable)
+        """
+        if not os.path.exists(self.modules_dir):
+            logger.warning(f"Modules directory not found: {self.modules_dir}")
+            return {}
+
+        configs = {}
+        for module_name in sorted(os.listdir(self.modules_dir)):
+            module_path = os.path.join(self.modules_dir, module_name)
+            config_file = os.path.join(module_path, 'config.json')
+            if os.path.isdir(module_path) and not module_name.startswith('__') \
+                    and os.path.exists(config_file):
+                try:
+                    with open(config_file, 'r') as f:
+                        configs[module_name] = json.load(f)
+                except Exception as e:
+                    logger.error(f"Error reading config for {module_name}: {e}")
+                    configs[module_name] = {}
+        return configs
+
+    def register_blueprints(self) -> List[str]:
+        """
+        Import and register the blueprints of enabled modules.
+
+        A module is enabled if its config.json sets ``"core": true`` or its
+        name is listed in ``ENABLED_MODULES`` (``*`` enables all). Only
+        enabled packages are imported. The package must expose a blueprint
+        named by the config's ``blueprint`` key (default ``<name>_bp``); it
+        is mounted at the config's ``url_prefix``.
+
+        Returns:
+            Names of the registered modules (also in ``app.extensions['modules']``)
+        """
+        enabled = set(self.app.config.get('ENABLED_MODULES') or [])
+        loaded = []
+        for module_name, metadata in self.read_configs().items():
+            name = metadata.get('name', module_name)
+            if not (metadata.get('core') or '*' in enabled or name in enabled):
+                logger.debug(f"Module {name} not enabled, skipped.")
+                continue
+
+            package = importlib.import_module(f'modules.{module_name}')
+            blueprint = getattr(package, metadata.get('blueprint', f'{name}_bp'))
+            self.app.register_blueprint(blueprint, url_prefix=metadata.get('url_prefix', f'/{name}'))
+            loaded.append(name)
+
+        self.app.extensions['modules'] = frozenset(loaded)
+        return loaded
+
+    def discover(self) -> Dict[str, Tuple[Dict[str, Any], List[Dict[str, Any]]]]:
+        """
+        Read every module's config.json as database rows.
+
+        Returns:
+            Module name -> (module row, permission rows without module_id)
+        """
+        logger.debug(f"Scanning modules in {self.modules_dir}...")
+        discovered = {}
+        for module_name, metadata in self.read_configs().items():
+            module_row, permission_rows = self._rows_from_metadata(module_name, metadata)
+            discovered[module_row['name']] = (module_row, permission_rows)
+        return discovered
+
+    @staticmethod
+    def _rows_from_metadata(module_name, metadata):
         # Defaults
         name = metadata.get('name', module_name)
         display_name = metadata.get('display_name', name.replace('_', ' ').title())
-        
-        # Upsert Module
-        module = Module.query.filter_by(name=name).first()
-        if not module:
-            module = Module(name=name)
-            print(f"Creating new module: {name}")
-        
-        module.display_name = display_name
-        module.description = metadata.get('description', f'{display_name} module')
-        module.icon = metadata.get('icon', 'fa-cube')
-        module.url_prefix = metadata.get('url_prefix', f'/{name}')
-        module.is_enabled = metadata.get('enabled', True)
-        
-        db.session.add(module)
-        db.session.commit()
-        
-        # Sync Permissions
-        defined_permissions = metadata.get('permissions', [])
+
+        module_row = {
+            'name': name,
+            'display_name': display_name,
+            'description': metadata.get('description', f'{display_name} module'),
+            'icon': metadata.get('icon', 'fa-cube'),
+            'url_prefix': metadata.get('url_prefix', f'/{name}'),
+            'is_enabled': metadata.get('enabled', True),
+        }
+
+        defined_permissions = list(metadata.get('permissions', []))
         # Always ensure 'access' permission exists
         access_perm_name = f"{name}.access"
         if not any(p.get('name') == access_perm_name for p in defined_permissions):
@@ -76,22 +130,316 @@ class ModuleRegistry:
                 'display_name': f'Access {display_name}',
                 'description': f'Allow access to {display_name} module'
             })
+        permission_rows = [
+            {
+                'name': perm_data['name'],
+                'display_name': perm_data.get('display_name', perm_data['name']),
+                'description': perm_data.get('description', ''),
+            }
+            for perm_data in defined_permissions
+        ]
+
+        # Hash of everything written to the database, so edited defaults count too
+        module_row['config_hash'] = hashlib.sha256(
+            json.dumps([module_row, permission_rows], sort_keys=True).encode()
+        ).hexdigest()
+        return module_row, permission_rows
+
+    def sync_database(self, force: bool = False) -> List[str]:
+        """
+        Sync discovered modules to database.
+
+        Modules whose config hash matches the stored one are skipped, so an
+        unchanged tree costs a single SELECT. Changed modules and their
+        permissions are upserted in one transaction; permissions removed
+        from a config.json are kept (roles may still hold them).
+
+        Args:
+            force: Rewrite every module even if its config is unchanged
+
+        Returns:
+            Names of the modules that were written
+        """
+        if not self.app:
+            raise RuntimeError("ModuleRegistry not initialized with app")
+
+        with self.app.app_context():
+            discovered = self.discover()
+            if not discovered:
+                return []
+
+            stored = dict(db.session.execute(
+                select(Module.name, Module.config_hash).where(Module.name.in_(discovered))
+            ).all())
+            changed = [
+                name for name, (module_row, _) in discovered.items()
+                if force or stored.get(name) != module_row['config_hash']
+            ]
+            if not changed:
+                logger.info(f"{len(discovered)} module(s) unchanged.")
+                return []
+
+            try:
+                module_rows = [discovered[name][0] for name in changed]
+                _upsert(Module.__table__, module_rows, MODULE_FIELDS + ('config_hash',))
+
+                module_ids = dict(db.session.execute(
+                    select(Module.name, Module.id).where(Module.name.in_(changed))
+                ).all())
+                # One row per name: a statement may not upsert the same row twice
+                permission_rows = {
+                    row['name']: dict(row, module_id=module_ids[name])
+                    for name in changed
+                    for row in discovered[name][1]
+                }
+                _upsert(Permission.__table__, list(permission_rows.values()), PERMISSION_FIELDS)
+                db.session.commit()
+            except Exception:
+                db.session.rollback()
+                raise
+
+            for name in changed:
+                logger.info(f"Synced module: {name} ({len(discovered[name][1])} permission(s))")
+            invalidate_access()
+            return changed
+
+
+def _upsert(table, rows: List[Dict[str, Any]], update_fields: Tuple[str, ...]) -> None:
+    """
+    Insert ``rows`` into ``table`` keyed on its unique ``name`` column,
+    updating ``update_fields`` (and ``updated_at``) of rows that exist.
+
+    PostgreSQL and SQLite use one ``INSERT ... ON CONFLICT DO UPDATE``;
+    other backends fall back to one SELECT, a bulk INSERT and a bulk UPDATE.
+    """
+    if not rows:
+        return
+    now = datetime.utcnow()
+    dialect = db.session.get_bind().dialect.name
+
+    if dialect in ('postgresql', 'sqlite'):
+        if dialect == 'postgresql':
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        stmt = dialect_insert(table)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[table.c.name],
+            set_={**{field: stmt.excluded[field] for field in update_fields}, 'updated_at': now}
+        )
+        db.session.execute(stmt.values([
+            {**row, 'created_at': now, 'updated_at': now} for row in rows
+        ]))
+        return
+
+    existing = set(db.session.scalars(
+        select(table.c.name).where(table.c.name.in_([row['name'] for row in rows]))
+    ))
+    new_rows = [{**row, 'created_at': now, 'updated_at': now}
+                for row in rows if row['name'] not in existing]
+    if new_rows:
+        db.session.execute(insert(table), new_rows)
+    changed_rows = [
+        {'_name': row['name'], **{f'_{field}': row[field] for field in update_fields}}
+        for row in rows if row['name'] in existing
+    ]
+    if changed_rows:
+        db.session.execute(
+            update(table).where(table.c.name == bindparam('_name'))
+            .values(updated_at=now, **{field: bindparam(f'_{field}') for field in update_fields}),
+            changed_rows
+        )
+
+
+@dataclass(frozen=True)
+class ModuleInfo:
+    """Metadata of one module, as declared in its config.json."""
+    name: str
+    package: str
+    display_name: str
+    display_name_de: str
+    description: str
+    icon: str
+    url_prefix: str
+    order: int
+    core: bool
+    enabled: bool
+    loaded: bool
+    permissions: Tuple[str, ...]
+
+
+class ModuleIndex:
+    """
+    In-memory index of every module's config.json, shared by all requests
+    of a worker.
+
+    Built once at startup, so the sidebar, decorators and admin views never
+    read module metadata from disk or the database while serving. A daemon
+    thread per worker process stats the config.json files every
+    ``watch_interval`` seconds; when one is added, removed or edited the
+    index is rebuilt and ``version`` is bumped. Workers never write the
+    change to the database: one process does (``start_module_sync`` in the
+    gunicorn master, or ``flask init-rbac``). Blueprints cannot be added to
+    a running app, so a new module's routes still need a worker restart
+    (``kill -HUP`` gunicorn).
+
+    Attributes:
+        watch_interval: Seconds between mtime checks (0 disables watching)
+        version: Incremented on every rebuild (caches key on it)
+    """
+
+    def __init__(self, registry: ModuleRegistry, watch_interval: float = 5.0):
+        self.registry = registry
+        self.watch_interval = watch_interval
+        self.version = 0
+        self._modules: Dict[str, ModuleInfo] = {}
+        self._ordered: Tuple[ModuleInfo, ...] = ()
+        self._signature: Tuple = ()
+        self._watcher_pid: Optional[int] = None
+        self._syncing = False
+        self._lock = threading.Lock()
+        self.reload()
+
+    @classmethod
+    def from_config(cls, app: Flask) -> 'ModuleIndex':
+        return cls(ModuleRegistry(app), watch_interval=app.config.get('MODULE_WATCH_INTERVAL', 5))
+
+    def _stat_configs(self) -> Tuple:
+        """(package, mtime, size) of every module's config.json."""
+        modules_dir = self.registry.modules_dir
+        try:
+            names = sorted(os.listdir(modules_dir))
+        except OSError:
+            return ()
+        signature = []
+        for name in names:
+            try:
+                stat = os.stat(os.path.join(modules_dir, name, 'config.json'))
+            except OSError:
+                continue
+            signature.append((name, stat.st_mtime_ns, stat.st_size))
+        return tuple(signature)
+
+    def reload(self) -> None:
+        """Rebuild the index from the config.json files."""
+        signature = self._stat_configs()
+        loaded = self.registry.app.extensions.get('modules', frozenset())
+        modules = {}
+        for package, metadata in self.registry.read_configs().items():
+            module_row, permission_rows = self.registry._rows_from_metadata(package, metadata)
+            name = module_row['name']
+            modules[name] = ModuleInfo(
+                name=name,
+                package=package,
+                display_name=module_row['display_name'],
+                display_name_de=metadata.get('display_name_de', module_row['display_name']),
+                description=module_row['description'],
+                icon=module_row['icon'],
+                url_prefix=module_row['url_prefix'],
+                order=metadata.get('order', 100),
+                core=bool(metadata.get('core')),
+                enabled=module_row['is_enabled'],
+                loaded=name in loaded,
+                permissions=tuple(row['name'] for row in permission_rows),
+            )
+        ordered = tuple(sorted(modules.values(), key=lambda m: (m.order, m.display_name)))
+        with self._lock:
+            self._modules = modules
+            self._ordered = ordered
+            self._signature = signature
+            self.version += 1
+
+    def check(self, sync: bool = False) -> bool:
+        """
+        Rebuild the index if a config.json changed.
+
+        Args:
+            sync: Also write the change to the database (one process only)
+
+        Returns:
+            True if the index was rebuilt
+        """
+        if self._stat_configs() == self._signature:
+            return False
+        self.reload()
+        logger.info(f"Module configs changed, index rebuilt ({len(self._modules)} module(s)).")
+        if sync:
+            try:
+                self.registry.sync_database()
+            except Exception as e:
+                logger.error(f"Syncing changed modules failed: {e}")
+        return True
+
+    def _watch(self, sync: bool = False) -> None:
+        while True:
+            time.sleep(self.watch_interval)
+            try:
+                self.check(sync)
+            except Exception as e:
+                logger.error(f"Module watcher error: {e}")
+
+    def _reset_after_fork(self) -> None:
+        # The sync thread may hold the lock while the master forks a worker
+        self._lock = threading.Lock()
+
+    def start_syncing(self) -> None:
+        """Watch and sync changes to the database from this process (once)."""
+        if not self.watch_interval:
+            return
+        with self._lock:
+            if self._syncing:
+                return
+            self._syncing = True
+        os.register_at_fork(after_in_child=self._reset_after_fork)
+        threading.Thread(target=self._watch, args=(True,), name='module-sync', daemon=True).start()
+
+    def ensure_watching(self) -> None:
+        """Start the watcher thread in this process (not inherited across fork)."""
+        if not self.watch_interval or self._watcher_pid == os.getpid():
+            return
+        with self._lock:
+            if self._watcher_pid == os.getpid():
+                return
+            threading.Thread(target=self._watch, name='module-watcher', daemon=True).start()
+            self._watcher_pid = os.getpid()
+
+    def get(self, name: str) -> Optional[ModuleInfo]:
+        return self._modules.get(name)
+
+    def all(self) -> Tuple[ModuleInfo, ...]:
+        """Every module in the tree, by ``order`` then display name."""
+        return self._ordered
+
+    def active(self) -> List[ModuleInfo]:
+        """Enabled modules whose blueprint is registered in this app."""
+        return [m for m in self._ordered if m.enabled and m.loaded]
+
+
+def init_module_index(app: Flask) -> ModuleIndex:
+    """Build the module index for ``app`` and store it in ``app.extensions``."""
+    index = ModuleIndex.from_config(app)
+    app.extensions['module_index'] = index
+    return index
+
+
+def get_module_index() -> ModuleIndex:
+    """Return the current app's module index, creating it lazily."""
+    app = current_app._get_current_object()
+    if 'module_index' not in app.extensions:
+        with _init_lock:
+            if 'module_index' not in app.extensions:
+                init_module_index(app)
+    index = app.extensions['module_index']
+    index.ensure_watching()
+    return index
+
+
+def start_module_sync(app: Flask) -> None:
+    """
+    Sync config.json changes to the database from this process.
 
-        existing_perms = {p.name: p for p in module.permissions}
-        current_perm_names = set()
-
-        for perm_data in defined_permissions:
-            perm_name = perm_data['name']
-            current_perm_names.add(perm_name)
-            
-            if perm_name in existing_perms:
-                perm = existing_perms[perm_name]
-            else:
-                perm = Permission(name=perm_name, module_id=module.id)
-                db.session.add(perm)
-                print(f"  + Permission: {perm_name}")
-            
-            perm.display_name = perm_data.get('display_name', perm_name)
-            perm.description = perm_data.get('description', '')
-            
-        db.session.commit()
+    Call it in exactly one process (gunicorn's ``when_ready`` runs it in the
+    master); workers only rebuild their in-memory index.
+    """
+    index = app.extensions.get('module_index') or init_module_index(app)
+    index.start_syncing()
@@ -0,0 +1,52 @@
+"""
+Jinja bytecode cache and template precompilation.
+
+Without a cache every worker parses and compiles each template the first
+time it is rendered, so the first requests after a deploy are slow. With
+``JINJA_CACHE_DIR`` set, compiled templates are stored there (keyed by
+name and source checksum) and shared by all workers and restarts.
+``flask templates compile`` fills the cache ahead of time, e.g. during
+the Docker build.
+"""
+import logging
+import os
+from typing import List, Optional
+from flask import Flask
+from jinja2 import FileSystemBytecodeCache
+
+logger = logging.getLogger(__name__)
+
+TEMPLATE_EXTENSIONS = ('.html', '.txt', '.xml')
+
+
+def init_template_cache(app: Flask) -> Optional[FileSystemBytecodeCache]:
+    """Attach a filesystem bytecode cache to ``app.jinja_env`` if configured."""
+    directory = app.config.get('JINJA_CACHE_DIR')
+    if not directory:
+        return None
+    try:
+        os.makedirs(directory, exist_ok=True)
+    except OSError as e:
+        logger.warning(f"Jinja bytecode cache disabled, cannot create {directory}: {e}")
+        return None
+
+    cache = FileSystemBytecodeCache(directory)
+    app.jinja_env.bytecode_cache = cache
+    return cache
+
+
+def compile_templates(app: Flask) -> List[str]:
+    """
+    Load every app and blueprint template once.
+
+    Each template is compiled and, with a bytecode cache configured,
+    written to it.
+
+    Returns:
+        Names of the compiled templates
+    """
+    env = app.jinja_env
+    names = [name for name in env.list_templates() if name.endswith(TEMPLATE_EXTENSIONS)]
+    for name in names:
+        env.get_template(name)
+    return names
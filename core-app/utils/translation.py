@@ -1,51 +1,223 @@
 """
 Translation utility for loading localized strings.
+
+Catalogs are built once per app: ``translations/<lang>.json`` and every
+``modules/<name>/translations.json`` (merged under ``modules.<name>.``)
+are flattened into one ``dotted.key -> text`` dict per language, with
+the fallback languages merged underneath. A lookup is a single dict
+access. The language is negotiated once per request from the user's
+choice (``?lang=``, kept in the session), then ``Accept-Language``.
 """
 import json
+import logging
 import os
-from flask import current_app, g
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+from flask import Flask, current_app, g, has_request_context, request, session
+
+logger = logging.getLogger(__name__)
+
+_init_lock = threading.Lock()
+
+SESSION_KEY = 'language'
+
+
+def flatten(tree: Dict, prefix: str = '') -> Dict[str, str]:
+    """Turn nested translation dicts into ``{'a.b.c': text}``."""
+    flat = {}
+    for key, value in tree.items():
+        if isinstance(value, dict):
+            flat.update(flatten(value, f"{prefix}{key}."))
+        elif value is not None:
+            flat[f"{prefix}{key}"] = str(value)
+    return flat
+
+
+class TranslationCatalog:
+    """
+    Flat per-language catalogs of one app.
 
-_translations = {}
+    Each language's dict holds its own strings over those of the fallback
+    languages (English, then the default language), so a key missing in
+    one file still resolves.
 
-def load_translations(lang='de'):
-    """Load translations from JSON file."""
-    global _translations
-    if lang not in _translations:
-        lang_file = os.path.join(current_app.root_path, 'translations', f'{lang}.json')
+    Attributes:
+        languages: Supported language codes
+        default_language: Used when negotiation finds no match
+        auto_reload: Rebuild when a source file's mtime changes (development)
+    """
+
+    FALLBACK_LANGUAGE = 'en'
+    RELOAD_CHECK_INTERVAL = 1.0
+
+    def __init__(self, root_path: str, languages: List[str], default_language: str = 'de',
+                 auto_reload: bool = False):
+        self.root_path = root_path
+        self.languages = list(languages)
+        self.default_language = default_language
+        self.auto_reload = auto_reload
+        self._catalogs: Dict[str, Dict[str, str]] = {}
+        self._signature: Tuple = ()
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+        self.load()
+
+    @classmethod
+    def from_config(cls, app: Flask) -> 'TranslationCatalog':
+        config = app.config
+        return cls(
+            app.root_path,
+            languages=config.get('SUPPORTED_LANGUAGES') or ['de'],
+            default_language=config.get('DEFAULT_LANGUAGE', 'de'),
+            auto_reload=config.get('TRANSLATIONS_AUTO_RELOAD', app.debug),
+        )
+
+    def _sources(self) -> List[Tuple[str, str]]:
+        """(path, key prefix) of every translation file, base files first."""
+        sources = [
+            (os.path.join(self.root_path, 'translations', f'{lang}.json'), '')
+            for lang in self.languages
+        ]
+        modules_dir = os.path.join(self.root_path, 'modules')
+        if os.path.isdir(modules_dir):
+            for name in sorted(os.listdir(modules_dir)):
+                path = os.path.join(modules_dir, name, 'translations.json')
+                if os.path.exists(path):
+                    sources.append((path, f'modules.{name}.'))
+        return sources
+
+    def _stat_sources(self) -> Tuple:
+        signature = []
+        for path, _ in self._sources():
+            try:
+                signature.append((path, os.stat(path).st_mtime_ns))
+            except OSError:
+                continue
+        return tuple(signature)
+
+    @staticmethod
+    def _read(path: str) -> Dict:
         try:
-            if os.path.exists(lang_file):
-                with open(lang_file, 'r', encoding='utf-8') as f:
-                    _translations[lang] = json.load(f)
-            else:
-                current_app.logger.warning(f"Translation file not found: {lang_file}")
-                _translations[lang] = {}
+            with open(path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            logger.warning(f"Translation file not found: {path}")
         except Exception as e:
-            current_app.logger.error(f"Failed to load translations for {lang}: {e}")
-            _translations[lang] = {}
-    return _translations[lang]
+            logger.error(f"Failed to load translations from {path}: {e}")
+        return {}
+
+    def load(self) -> None:
+        """Read all sources and rebuild the flat catalogs."""
+        signature = self._stat_sources()
+        strings: Dict[str, Dict[str, str]] = {lang: {} for lang in self.languages}
+        for path, prefix in self._sources():
+            data = self._read(path)
+            if not prefix:
+                lang = os.path.splitext(os.path.basename(path))[0]
+                strings[lang].update(flatten(data))
+                continue
+            # Module files hold {"de": {...}, "en": {...}}
+            for lang, tree in data.items():
+                if lang in strings and isinstance(tree, dict):
+                    strings[lang].update(flatten(tree, prefix))
+
+        catalogs = {}
+        for lang in self.languages:
+            catalog = {}
+            for source in (self.default_language, self.FALLBACK_LANGUAGE, lang):
+                catalog.update(strings.get(source, {}))
+            catalogs[lang] = catalog
 
-def get_text(key_path, lang='de'):
+        with self._lock:
+            self._catalogs = catalogs
+            self._signature = signature
+            self._checked_at = time.monotonic()
+
+    def reload_if_changed(self) -> bool:
+        """Rebuild if a translation file changed (checked at most once a second)."""
+        now = time.monotonic()
+        if now - self._checked_at < self.RELOAD_CHECK_INTERVAL:
+            return False
+        self._checked_at = now
+        if self._stat_sources() == self._signature:
+            return False
+        self.load()
+        logger.info("Translation files changed, catalogs reloaded.")
+        return True
+
+    def catalog(self, lang: Optional[str] = None) -> Dict[str, str]:
+        """Flat catalog of ``lang`` (the default language's if unsupported)."""
+        return self._catalogs.get(lang) or self._catalogs.get(self.default_language, {})
+
+    def negotiate(self) -> str:
+        """Pick the request's language: session choice, then Accept-Language."""
+        lang = session.get(SESSION_KEY)
+        if lang in self.languages:
+            return lang
+        return request.accept_languages.best_match(self.languages, default=self.default_language)
+
+
+def init_translations(app: Flask) -> TranslationCatalog:
+    """Build the catalogs for ``app`` and register the request/Jinja hooks."""
+    catalog = TranslationCatalog.from_config(app)
+    app.extensions['translations'] = catalog
+
+    if catalog.auto_reload:
+        app.before_request(catalog.reload_if_changed)
+
+    @app.before_request
+    def remember_language_choice():
+        lang = request.args.get('lang')
+        if lang in catalog.languages:
+            session[SESSION_KEY] = lang
+
+    app.jinja_env.globals.update(get_text=get_text, get_language=get_language)
+    app.jinja_env.filters['t'] = get_text
+    return catalog
+
+
+def get_translations() -> TranslationCatalog:
+    """Return the current app's catalogs, creating them lazily (without hooks)."""
+    app = current_app._get_current_object()
+    if 'translations' not in app.extensions:
+        with _init_lock:
+            if 'translations' not in app.extensions:
+                app.extensions['translations'] = TranslationCatalog.from_config(app)
+    return app.extensions['translations']
+
+
+def _request_catalog() -> Dict[str, str]:
+    # Negotiated on first use and kept for the rest of the request
+    catalog = g.get('_translations')
+    if catalog is None:
+        translations = get_translations()
+        g._language = translations.negotiate()
+        catalog = g._translations = translations.catalog(g._language)
+    return catalog
+
+
+def get_language() -> str:
+    """Language code of the current request (the default outside requests)."""
+    if not has_request_context():
+        return get_translations().default_language
+    _request_catalog()
+    return g._language
+
+
+def get_text(key_path, lang=None):
     """
     Get translated text for a given key path (e.g., 'auth.login_title').
-    
+
     Args:
         key_path (str): Dot-separated key path
-        lang (str): Language code (default: 'de')
-        
+        lang (str): Language code (default: the request's language)
+
     Returns:
         str: Translated text or the key itself if not found
     """
-    translations = load_translations(lang)
-    keys = key_path.split('.')
-    value = translations
-    
-    for k in keys:
-        if isinstance(value, dict):
-            value = value.get(k)
-        else:
-            return key_path
-            
-    if value is None:
-        return key_path
-        
-    return str(value)
+    if lang is None and has_request_context():
+        catalog = _request_catalog()
+    else:
+        catalog = get_translations().catalog(lang)
+    return catalog.get(key_path, key_path)